@@ -2,12 +2,17 @@ from flask import Flask
 from flask_cors import CORS
 import os
 
-from backend.config.settings import DEBUG, FLASK_PORT
+from backend.config.settings import DEBUG, FLASK_PORT, INSTANCE_DIR, PRICE_REFRESH_ENABLED, PRICE_HISTORY_ENABLED, PRICE_STORE_DIR, FX_CONVERSION_ENABLED, CRYPTO_SYMBOL_CACHE_PATH
 from backend.utils.logging import logger
 from backend.routes.assets import assets_bp
 from backend.routes.symbols import symbols_bp
-from backend.routes.prices import price_routes
-from backend.services import symbol_service
+from backend.routes.prices import price_routes, price_service
+from backend.routes.async_prices import async_price_routes
+from backend.routes.portfolio import portfolio_bp, fx_service
+from backend.services import symbol_service, aggregate_service
+from backend.services.price_refresher import PriceRefresher
+from backend.services.price_history_writer import PriceHistoryWriter
+from backend.services.price_store import get_price_store, start_price_store_sync
 from backend.models import db
 
 
@@ -19,16 +24,22 @@ def create_app(config_override=None):
 
     # Default configuration
     # Use a file-based SQLite database in the instance folder
-    app.instance_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance')
+    app.instance_path = INSTANCE_DIR
     os.makedirs(app.instance_path, exist_ok=True)
     
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', f'sqlite:///{os.path.join(app.instance_path, "portfolio_analyser.db")}')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['TESTING'] = False # Default to not testing
+    app.config['PRICE_REFRESH_ENABLED'] = PRICE_REFRESH_ENABLED
+    app.config['PRICE_HISTORY_ENABLED'] = PRICE_HISTORY_ENABLED
+    app.config['PRICE_STORE_DIR'] = PRICE_STORE_DIR
+    app.config['CRYPTO_SYMBOL_CACHE_PATH'] = CRYPTO_SYMBOL_CACHE_PATH
 
     # Override with provided config
     if config_override:
         app.config.update(config_override)
+    # Tests stay offline unless they opt in to exchange rate lookups
+    app.config.setdefault('FX_CONVERSION_ENABLED', FX_CONVERSION_ENABLED and not app.config['TESTING'])
     
     # Configure SQLAlchemy
     # app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL') # Moved up
@@ -53,6 +64,8 @@ def create_app(config_override=None):
     app.register_blueprint(assets_bp, url_prefix='/assets')
     app.register_blueprint(symbols_bp)
     app.register_blueprint(price_routes)
+    app.register_blueprint(async_price_routes)
+    app.register_blueprint(portfolio_bp)
     
     # Add a simple root route
     @app.route('/')
@@ -64,9 +77,35 @@ def create_app(config_override=None):
         # Create all database tables
         db.create_all()
         
-        # Load symbol data
-        symbol_service.load_crypto_symbols()
+        # Build portfolio aggregates for databases created before they existed
+        aggregate_service.ensure_built()
+        
+        # Load symbol data; crypto symbols come from the cache file and a stale cache
+        # is refreshed from CoinGecko in the background (not while testing), on its own
+        # rate budget and pausing while the price service backs off from a 429
+        symbol_service.init_crypto_symbols(app.config['CRYPTO_SYMBOL_CACHE_PATH'],
+                                           refresh=not app.config['TESTING'],
+                                           limiter=price_service.coingecko_limiter)
         symbol_service.load_indian_stock_symbols()
         symbol_service.load_us_stock_symbols()
     
+    # Analytics read the price store at its published watermark; it is synced in the
+    # background (at startup and after every history flush), never by requests
+    if not app.config['TESTING']:
+        start_price_store_sync(app)
+    
+    # Persist fetched quotes to price_history through a write-behind buffer (not while testing)
+    if app.config['PRICE_HISTORY_ENABLED'] and not app.config['TESTING']:
+        history_writer = PriceHistoryWriter(app, price_store=get_price_store(app))
+        app.extensions['price_history_writer'] = history_writer
+        price_service.history_writer = history_writer
+        history_writer.start()
+    
+    # Keep Asset.last_price current in the background (not while testing), stored in the base currency
+    if app.config['PRICE_REFRESH_ENABLED'] and not app.config['TESTING']:
+        refresher = PriceRefresher(app, price_service,
+                                   fx_service=fx_service if app.config['FX_CONVERSION_ENABLED'] else None)
+        app.extensions['price_refresher'] = refresher
+        refresher.start()
+    
     return app
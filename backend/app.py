@@ -4,7 +4,10 @@ from backend.config.settings import FLASK_PORT, DEBUG
 from backend.utils.logging import logger
 
 # Create the Flask application
-app = create_app()
+# Monte Carlo worker processes (spawn start method) re-import this module as
+# __mp_main__ when it is run directly; they must not start a second app
+if __name__ != '__mp_main__':
+    app = create_app()
 # --- Global In-Memory Stores ---
 # Portfolio data is now managed by the Portfolio model in backend/models/portfolio.py
 # --- Asset Type Constants (ensure these match frontend if hardcoded there) ---
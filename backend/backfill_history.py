@@ -0,0 +1,54 @@
+"""
+Backfill daily price history for every held symbol
+
+Usage:
+    python -m backend.backfill_history                      # download from Yahoo Finance
+    python -m backend.backfill_history --fixture prices.json  # offline, from recorded data
+    python -m backend.backfill_history --record prices.json   # download and record a fixture
+
+Progress is checkpointed after every chunk; rerunning resumes where the last run stopped.
+"""
+import argparse
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import create_app
+from backend.services.price_store import get_price_store
+from backend.services.history_backfill import (
+    HistoryBackfill, YahooHistorySource, FixtureHistorySource, RecordingHistorySource
+)
+from backend.config.settings import PRICE_BACKFILL_CHUNK_SIZE, PRICE_BACKFILL_CHECKPOINT
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Backfill daily price history from purchase dates')
+    parser.add_argument('--fixture', help='read daily closes from a recorded JSON fixture instead of Yahoo Finance')
+    parser.add_argument('--record', help='save downloaded daily closes to this JSON fixture')
+    parser.add_argument('--checkpoint', default=PRICE_BACKFILL_CHECKPOINT, help='checkpoint file used to resume')
+    parser.add_argument('--chunk-size', type=int, default=PRICE_BACKFILL_CHUNK_SIZE, help='symbols per download')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint and start from purchase dates')
+    args = parser.parse_args(argv)
+
+    source = FixtureHistorySource(args.fixture) if args.fixture else YahooHistorySource()
+    if args.record:
+        source = RecordingHistorySource(source, args.record)
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    # Background threads are not needed for a one-off job
+    app = create_app(config_override={'PRICE_REFRESH_ENABLED': False, 'PRICE_HISTORY_ENABLED': False})
+    backfill = HistoryBackfill(app, source, checkpoint_path=args.checkpoint, chunk_size=args.chunk_size)
+    inserted = backfill.run()
+    print(f"Inserted {inserted} price history rows")
+
+    # Bring the analytics store up to date with the new rows
+    with app.app_context():
+        get_price_store(app).sync()
+
+
+if __name__ == '__main__':
+    main()
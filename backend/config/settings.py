@@ -4,6 +4,9 @@ from dotenv import load_dotenv
 # Load environment variables from .env
 load_dotenv()
 
+# Instance folder for runtime data (database, caches)
+INSTANCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'instance')
+
 # Flask settings
 FLASK_PORT = int(os.environ.get('FLASK_RUN_PORT', 5000))
 DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() in ('true', '1', 't')
@@ -21,5 +24,103 @@ ALPHA_VANTAGE_API_KEY = os.environ.get('ALPHA_VANTAGE_API_KEY', '')
 # Cache settings
 PRICE_CACHE_DURATION = 300  # seconds (5 minutes)
 
+# Price cache backend: 'memory' (per process) or 'sqlite' (shared by all workers on the host)
+PRICE_CACHE_BACKEND = os.environ.get('PRICE_CACHE_BACKEND', 'memory').lower()
+PRICE_CACHE_PATH = os.environ.get('PRICE_CACHE_PATH', os.path.join(INSTANCE_DIR, 'price_cache.sqlite3'))
+# With the sqlite backend one worker fetches a missing symbol while the others wait for it
+PRICE_CACHE_FILL_LEASE = 30  # seconds a worker's claim on a fetch lasts before others may take over
+PRICE_CACHE_FILL_POLL = 0.05  # seconds between shared cache checks while another worker fetches
+
+# Stale-while-revalidate: expired prices are still served for this many seconds past
+# their TTL while a background refresh runs (0 disables)
+PRICE_CACHE_STALE_GRACE = int(os.environ.get('PRICE_CACHE_STALE_GRACE', 300))
+
+# Batch sizes for upstream price lookups
+COINGECKO_BATCH_SIZE = 100  # ids per /simple/price request
+YAHOO_BATCH_SIZE = 50  # tickers per yf.download call (or async chunk of concurrent chart requests)
+
+# Price fetch mode: 'concurrent' runs providers in parallel, 'serial' one after another
+PRICE_FETCH_MODE = os.environ.get('PRICE_FETCH_MODE', 'concurrent').lower()
+
+# Per-provider worker limits and timeout budgets for concurrent fetching
+COINGECKO_MAX_CONCURRENCY = 1
+COINGECKO_FETCH_TIMEOUT = 8  # seconds
+YAHOO_MAX_CONCURRENCY = 4
+YAHOO_FETCH_TIMEOUT = 8  # seconds
+
+# Token-bucket rate limits per provider, per worker process (divide the provider quota by the worker count)
+COINGECKO_RATE_LIMIT_PER_MINUTE = float(os.environ.get('COINGECKO_RATE_LIMIT_PER_MINUTE', 10))  # conservative for the free API
+COINGECKO_RATE_LIMIT_BURST = 3
+YAHOO_RATE_LIMIT_PER_MINUTE = float(os.environ.get('YAHOO_RATE_LIMIT_PER_MINUTE', 120))
+YAHOO_RATE_LIMIT_BURST = 20
+RATE_LIMIT_MAX_WAIT = 10  # seconds a caller queues for a token before giving up (capped by the fetch budget above)
+RATE_LIMIT_DEFAULT_BACKOFF = 60  # seconds to pause after a 429 without Retry-After
+
+# Maximum concurrent upstream connections for the async price service
+ASYNC_MAX_IN_FLIGHT = 200
+
+# Background refresh of Asset.last_price
+PRICE_REFRESH_ENABLED = os.environ.get('PRICE_REFRESH_ENABLED', 'True').lower() in ('true', '1', 't')
+PRICE_REFRESH_INTERVAL = int(os.environ.get('PRICE_REFRESH_INTERVAL', 300))  # seconds between refresh runs
+PRICE_REFRESH_BATCH_SIZE = COINGECKO_BATCH_SIZE  # assets per refresh batch
+PRICE_REFRESH_BATCH_PAUSE = 6  # seconds between batches (CoinGecko free tier allows ~10 requests/minute)
+
+# Write-behind persistence of fetched quotes into price_history
+PRICE_HISTORY_ENABLED = os.environ.get('PRICE_HISTORY_ENABLED', 'True').lower() in ('true', '1', 't')
+PRICE_HISTORY_FLUSH_SIZE = 500  # buffered quotes that trigger an early flush
+PRICE_HISTORY_FLUSH_INTERVAL = int(os.environ.get('PRICE_HISTORY_FLUSH_INTERVAL', 30))  # seconds between flushes
+PRICE_HISTORY_MAX_BUFFER = 50000  # quotes kept in memory while the database is unavailable
+PRICE_HISTORY_MAX_BUCKETS = 5000  # candles per symbol a history query may return
+
+# Memory-mapped columnar copy of price_history used by analytics
+PRICE_STORE_DIR = os.environ.get('PRICE_STORE_DIR', os.path.join(INSTANCE_DIR, 'price_store'))
+
+# Currency normalization: purchase prices are stored in BASE_CURRENCY, while
+# CoinGecko quotes USD and Yahoo quotes each exchange's currency
+BASE_CURRENCY = os.environ.get('BASE_CURRENCY', 'INR').upper()
+FX_CONVERSION_ENABLED = os.environ.get('FX_CONVERSION_ENABLED', 'True').lower() in ('true', '1', 't')
+FX_CACHE_DURATION = 3600  # seconds an exchange rate is reused
+FX_RETRY_INTERVAL = 300  # seconds before retrying a rate that could not be fetched
+FX_RATE_LIMIT_PER_MINUTE = 30
+FX_RATE_LIMIT_BURST = 5
+
+# Historical backfill of price_history (backend/backfill_history.py)
+PRICE_BACKFILL_CHUNK_SIZE = YAHOO_BATCH_SIZE  # symbols per multi-ticker history download
+PRICE_BACKFILL_CHECKPOINT = os.path.join(INSTANCE_DIR, 'backfill_checkpoint.json')
+
+# Portfolio risk analytics (/api/portfolio/risk)
+RISK_LOOKBACK_DAYS = 365  # daily returns used for volatility, covariance and VaR
+RISK_MAX_LOOKBACK_DAYS = 3650
+RISK_CONFIDENCE = 0.95  # VaR confidence level
+RISK_CACHE_SIZE = 8  # memoized results (one per holdings/price-data/parameter combination)
+
+# Monte Carlo projections (/api/portfolio/monte-carlo)
+MONTE_CARLO_WORKERS = int(os.environ.get('MONTE_CARLO_WORKERS', os.cpu_count() or 1))  # worker processes
+MONTE_CARLO_CHUNK_PATHS = 50000  # paths simulated per pool task; also the cancellation granularity
+MONTE_CARLO_MAX_PATHS = 5000000
+MONTE_CARLO_MAX_HORIZON = 3650  # days
+MONTE_CARLO_MAX_POINTS = 250  # horizon days reported in the percentile bands
+MONTE_CARLO_BINS = 4000  # histogram bins per reported day used to merge worker results
+MONTE_CARLO_PERCENTILES = (5, 25, 50, 75, 95)
+MONTE_CARLO_JOB_TTL = 3600  # seconds finished jobs stay retrievable
+
+# Crypto symbol list, cached on disk so startup never waits on CoinGecko
+CRYPTO_SYMBOL_CACHE_PATH = os.environ.get('CRYPTO_SYMBOL_CACHE_PATH', os.path.join(INSTANCE_DIR, 'crypto_symbols.json'))
+CRYPTO_SYMBOL_CACHE_TTL = int(os.environ.get('CRYPTO_SYMBOL_CACHE_TTL', 86400))  # seconds before a background refresh
+CRYPTO_SYMBOL_RETRY_INTERVAL = 300  # seconds between background refreshes started because the list is empty
+COINGECKO_MARKETS_PAGE_SIZE = 250  # coins per /coins/markets page (the API maximum)
+CRYPTO_SYMBOL_MAX_PAGES = int(os.environ.get('CRYPTO_SYMBOL_MAX_PAGES', 80))  # pages per full refresh (20,000 coins)
+CRYPTO_SYMBOL_PAGE_WAIT = 300  # seconds a refresh waits for a CoinGecko request slot per page
+CRYPTO_SYMBOL_PUBLISH_INTERVAL = 120  # seconds between partial lists published while a refresh pages through
+CRYPTO_ID_MEMO_SIZE = 1024  # partial-match crypto ID lookups remembered per loaded list
+# Pages per minute for the refresh: its own budget, on top of COINGECKO_RATE_LIMIT_PER_MINUTE for prices
+CRYPTO_SYMBOL_RATE_LIMIT_PER_MINUTE = float(os.environ.get('CRYPTO_SYMBOL_RATE_LIMIT_PER_MINUTE', 3))
+
+# Symbol autocomplete (/api/symbols/search)
+SYMBOL_SEARCH_DEFAULT_LIMIT = 10
+SYMBOL_SEARCH_MAX_LIMIT = 50
+SYMBOL_MEMORY_BUDGET = 4 * 1024 * 1024  # bytes for ~20,000 symbols: lists plus search index
+SYMBOL_LIST_MAX_AGE = 300  # seconds clients may reuse a symbol list before revalidating its ETag
+
 # Request timeouts
 REQUEST_TIMEOUT = 15  # seconds
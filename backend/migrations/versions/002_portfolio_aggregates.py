@@ -0,0 +1,61 @@
+"""portfolio aggregates
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 09:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Running totals per asset type
+    op.create_table(
+        'portfolioaggregate',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('asset_type', sa.String(length=20), nullable=False),
+        sa.Column('lot_count', sa.Integer(), nullable=False),
+        sa.Column('symbol_count', sa.Integer(), nullable=False),
+        sa.Column('total_quantity', sa.Float(), nullable=False),
+        sa.Column('total_cost', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('asset_type')
+    )
+
+    # Running totals per asset type and symbol
+    op.create_table(
+        'portfoliosymbolaggregate',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('asset_type', sa.String(length=20), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False),
+        sa.Column('lot_count', sa.Integer(), nullable=False),
+        sa.Column('total_quantity', sa.Float(), nullable=False),
+        sa.Column('total_cost', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('asset_type', 'symbol', name='uq_symbol_aggregate_type_symbol')
+    )
+
+    # Fill both tables from the existing assets
+    op.execute(
+        "INSERT INTO portfoliosymbolaggregate (asset_type, symbol, lot_count, total_quantity, total_cost) "
+        "SELECT asset_type, symbol, COUNT(*), SUM(quantity), SUM(quantity * purchase_price) "
+        "FROM asset GROUP BY asset_type, symbol"
+    )
+    op.execute(
+        "INSERT INTO portfolioaggregate (asset_type, lot_count, symbol_count, total_quantity, total_cost) "
+        "SELECT asset_type, SUM(lot_count), COUNT(*), SUM(total_quantity), SUM(total_cost) "
+        "FROM portfoliosymbolaggregate GROUP BY asset_type"
+    )
+
+def downgrade():
+    op.drop_table('portfoliosymbolaggregate')
+    op.drop_table('portfolioaggregate')
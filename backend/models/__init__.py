@@ -1,5 +1,6 @@
 from .base import db
 from .asset import Asset
 from .price_history import PriceHistory
+from .portfolio_aggregate import PortfolioAggregate, PortfolioSymbolAggregate
 
-__all__ = ['db', 'Asset', 'PriceHistory']
\ No newline at end of file
+__all__ = ['db', 'Asset', 'PriceHistory', 'PortfolioAggregate', 'PortfolioSymbolAggregate']
\ No newline at end of file
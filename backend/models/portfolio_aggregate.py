@@ -0,0 +1,41 @@
+from .base import db, Base
+
+
+class PortfolioAggregate(Base):
+    """Running totals per asset type, kept in step with the asset table"""
+    asset_type = db.Column(db.String(20), nullable=False, unique=True)
+    lot_count = db.Column(db.Integer, nullable=False, default=0)
+    symbol_count = db.Column(db.Integer, nullable=False, default=0)
+    total_quantity = db.Column(db.Float, nullable=False, default=0.0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)  # sum of quantity * purchase_price
+
+    def to_dict(self):
+        return {
+            'asset_type': self.asset_type,
+            'lot_count': self.lot_count,
+            'symbol_count': self.symbol_count,
+            'total_quantity': self.total_quantity,
+            'total_cost': self.total_cost,
+        }
+
+
+class PortfolioSymbolAggregate(Base):
+    """Running totals per (asset type, symbol); tells when a type gains or loses a symbol"""
+    asset_type = db.Column(db.String(20), nullable=False)
+    symbol = db.Column(db.String(20), nullable=False)
+    lot_count = db.Column(db.Integer, nullable=False, default=0)
+    total_quantity = db.Column(db.Float, nullable=False, default=0.0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint('asset_type', 'symbol', name='uq_symbol_aggregate_type_symbol'),
+    )
+
+    def to_dict(self):
+        return {
+            'asset_type': self.asset_type,
+            'symbol': self.symbol,
+            'lot_count': self.lot_count,
+            'total_quantity': self.total_quantity,
+            'total_cost': self.total_cost,
+        }
@@ -3,6 +3,7 @@ from datetime import datetime
 
 from backend.models import db, Asset # Updated import
 from backend.utils.logging import logger
+from backend.services import aggregate_service
 from backend.config.settings import ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO
 
 # Create a Blueprint for asset routes
@@ -54,6 +55,7 @@ def add_asset():
         purchase_date=purchase_date
     )
     db.session.add(new_asset)
+    aggregate_service.record_added(new_asset)
     db.session.commit()
     return jsonify(new_asset.to_dict()), 201
 
@@ -102,11 +104,14 @@ def update_asset(asset_id: int):
     except TypeError:
         return jsonify({"error": "Invalid type for purchase_date, expected string in YYYY-MM-DD format"}), 400
 
+    # Swap the lot's old contribution to the aggregates for the new one
+    aggregate_service.record_removed(asset)
     asset.symbol = data['symbol']
     asset.asset_type = data['asset_type']
     asset.purchase_price = purchase_price
     asset.quantity = quantity
     asset.purchase_date = purchase_date
+    aggregate_service.record_added(asset)
     
     db.session.commit()
     return jsonify(asset.to_dict())
@@ -121,6 +126,7 @@ def delete_asset(asset_id: int):
     if not asset:
         return jsonify({"error": "Asset not found"}), 404
 
+    aggregate_service.record_removed(asset)
     db.session.delete(asset)
     db.session.commit()
     return jsonify({"message": "Asset deleted successfully"})
@@ -145,6 +151,7 @@ def bulk_delete_assets():
     except ValueError:
         return jsonify({"error": "All asset IDs must be integers"}), 400
 
+    aggregate_service.record_bulk_removed(processed_ids)
     deleted_count = Asset.query.filter(Asset.id.in_(processed_ids)).delete(synchronize_session=False)
     db.session.commit()
     
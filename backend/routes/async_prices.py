@@ -0,0 +1,41 @@
+from flask import Blueprint, jsonify, request
+from backend.services.async_price_service import AsyncPriceService
+from backend.routes.prices import price_service
+
+async_price_routes = Blueprint('async_prices', __name__)
+# Share the cache and rate-limit state of the synchronous price service
+async_price_service = AsyncPriceService(price_service)
+
+@async_price_routes.route('/api/async/prices', methods=['POST'])
+async def get_prices():
+    """
+    Async variant of POST /api/prices
+    Expected request body: { "assets": [{"symbol": "AAPL", "asset_type": "US Stock"}, ...] }
+    Returns: { "AAPL": 150.25, "MSFT": 300.50, ... }
+    """
+    assets = request.json.get('assets', [])
+    if not assets:
+        return jsonify({"error": "No assets provided"}), 400
+
+    prices = await async_price_service.get_prices_for_assets(assets)
+    return jsonify(prices)
+
+@async_price_routes.route('/api/async/prices/<symbol>', methods=['GET'])
+async def get_price(symbol):
+    """
+    Async variant of GET /api/prices/<symbol>
+    URL params: ?type=US Stock|Indian Stock|Crypto
+    Returns: {"symbol": "AAPL", "price": 150.25}
+    """
+    if not symbol:
+        return jsonify({"error": "No symbol provided"}), 400
+
+    asset_type = request.args.get('type', 'US Stock')  # Default to US Stock
+
+    asset = {"symbol": symbol, "asset_type": asset_type}
+    price = await async_price_service.get_price_for_asset(asset)
+
+    if price is None:
+        return jsonify({'error': f'Unable to fetch price for {symbol}'}), 404
+
+    return jsonify({'symbol': symbol, 'price': price})
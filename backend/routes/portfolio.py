@@ -0,0 +1,153 @@
+from datetime import date
+from flask import Blueprint, jsonify, request, current_app
+from backend.routes.prices import price_service
+from backend.services import valuation_service, aggregate_service, returns_service
+from backend.services.price_store import get_price_store
+from backend.services.fx_service import FxService
+from backend.services.value_curve_service import ValueCurveEngine
+from backend.services.risk_service import RiskEngine
+from backend.services.monte_carlo_service import MonteCarloEngine
+from backend.config.settings import RISK_LOOKBACK_DAYS, RISK_MAX_LOOKBACK_DAYS, RISK_CONFIDENCE
+
+# Create a Blueprint for portfolio analytics routes
+portfolio_bp = Blueprint('portfolio', __name__, url_prefix='/api/portfolio')
+fx_service = FxService()
+value_curve_engine = ValueCurveEngine()
+risk_engine = RiskEngine()
+monte_carlo_engine = MonteCarloEngine()
+
+
+def _flag(name: str, default: bool = True) -> bool:
+    """Read a boolean query parameter such as ?live=false"""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('true', '1', 't', 'yes')
+
+
+def _fx():
+    """FX service used to convert quotes into the base currency, if enabled"""
+    return fx_service if current_app.config['FX_CONVERSION_ENABLED'] else None
+
+
+@portfolio_bp.route('/summary', methods=['GET'])
+def get_portfolio_summary():
+    """
+    Get purchase value, current value and P&L per asset, per asset type and in total
+    Quotes are converted into the base currency when FX conversion is enabled
+    URL params: ?live=false to value with stored last prices, ?assets=false to omit per-asset rows
+    Returns: {"assets": [...], "by_type": {"Crypto": {...}, ...}, "total": {...}, "fx": {...}}
+    """
+    summary = valuation_service.portfolio_summary(
+        price_service if _flag('live') else None,
+        include_assets=_flag('assets'),
+        fx_service=_fx(),
+    )
+    return jsonify(summary)
+
+
+@portfolio_bp.route('/aggregates', methods=['GET'])
+def get_portfolio_aggregates():
+    """
+    Get lot count, symbol count, total quantity and total cost per asset type and overall
+    Read from the incrementally maintained aggregate table, independent of the number of assets
+    Returns: {"by_type": {"Crypto": {...}, ...}, "total": {...}}
+    """
+    return jsonify(aggregate_service.get_aggregates())
+
+
+@portfolio_bp.route('/returns', methods=['GET'])
+def get_portfolio_returns():
+    """
+    Get money-weighted (XIRR) and time-weighted returns per asset, per asset type and in total
+    URL params: ?live=false to value with stored last prices
+    Returns: {"assets": [{"id": 1, "xirr": 0.12, "twr": 0.3}, ...], "by_type": {...}, "total": {...}, "fx": {...}}
+    """
+    returns = returns_service.portfolio_returns(
+        price_service if _flag('live') else None,
+        get_price_store(),
+        fx_service=_fx(),
+    )
+    return jsonify(returns)
+
+@portfolio_bp.route('/value-history', methods=['GET'])
+def get_portfolio_value_history():
+    """
+    Get the daily portfolio value since the first purchase
+    URL params: ?from=YYYY-MM-DD&to=YYYY-MM-DD
+    Returns: {"dates": ["2023-01-01", ...], "value": [...], "invested": [...], "fx": {...}}
+    """
+    try:
+        start = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        end = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({"error": "from and to must be dates in YYYY-MM-DD format"}), 400
+
+    return jsonify(value_curve_engine.value_curve(get_price_store(), start, end, fx_service=_fx()))
+
+
+@portfolio_bp.route('/risk', methods=['GET'])
+def get_portfolio_risk():
+    """
+    Get per-symbol volatility, portfolio volatility and 1-day historical and parametric VaR
+    URL params: ?days=365 lookback, ?confidence=0.95, ?matrix=true to include the
+    annualized covariance and correlation matrices
+    Returns: {"portfolio_value": ..., "volatility": {...}, "var": {...}, "assets": [...], "fx": {...}}
+    """
+    try:
+        days = int(request.args.get('days', RISK_LOOKBACK_DAYS))
+        confidence = float(request.args.get('confidence', RISK_CONFIDENCE))
+    except ValueError:
+        return jsonify({"error": "days must be an integer and confidence a number"}), 400
+    if not 2 <= days <= RISK_MAX_LOOKBACK_DAYS:
+        return jsonify({"error": f"days must be between 2 and {RISK_MAX_LOOKBACK_DAYS}"}), 400
+    if not 0.5 <= confidence < 1:
+        return jsonify({"error": "confidence must be between 0.5 and 1"}), 400
+
+    return jsonify(risk_engine.risk(get_price_store(), days, confidence, include_matrix=_flag('matrix', False),
+                                    fx_service=_fx()))
+
+
+@portfolio_bp.route('/monte-carlo', methods=['POST'])
+def start_monte_carlo():
+    """
+    Start a Monte Carlo projection of the portfolio value as a background job
+    Request body: {"horizon_days": 365, "paths": 100000, "model": "gbm" | "bootstrap",
+                   "lookback_days": 365, "seed": 42}
+    Returns: the job with its id and status (202)
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        job = monte_carlo_engine.submit(
+            get_price_store(),
+            horizon_days=int(data.get('horizon_days', 365)),
+            paths=int(data.get('paths', 100000)),
+            model=data.get('model', 'gbm'),
+            lookback_days=int(data.get('lookback_days', RISK_LOOKBACK_DAYS)),
+            seed=int(data['seed']) if data.get('seed') is not None else None,
+            fx_service=_fx(),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job), 202
+
+
+@portfolio_bp.route('/monte-carlo/<job_id>', methods=['GET'])
+def get_monte_carlo(job_id):
+    """
+    Get a Monte Carlo job's status and progress, and its percentile bands once completed
+    Returns: {"id": ..., "status": "running" | "completed" | "cancelled" | "failed", "progress": 0.5, "result": {...}}
+    """
+    job = monte_carlo_engine.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@portfolio_bp.route('/monte-carlo/<job_id>', methods=['DELETE'])
+def cancel_monte_carlo(job_id):
+    """Cancel a running Monte Carlo job"""
+    job = monte_carlo_engine.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
@@ -1,5 +1,7 @@
+from datetime import datetime
 from flask import Blueprint, jsonify, request
 from backend.services.price_service import PriceService
+from backend.services import price_history_service
 
 price_routes = Blueprint('prices', __name__)
 price_service = PriceService()
@@ -50,3 +52,48 @@ def refresh_prices():
         "status": "success",
         "message": "Price cache cleared"
     })
+
+def _history_params():
+    """Read interval/from/to query params; raises ValueError for bad dates"""
+    interval = request.args.get('interval', '1d')
+    start = request.args.get('from')
+    end = request.args.get('to')
+    return (
+        interval,
+        datetime.fromisoformat(start) if start else None,
+        datetime.fromisoformat(end) if end else None,
+    )
+
+@price_routes.route('/api/prices/<symbol>/history', methods=['GET'])
+def get_price_history(symbol):
+    """
+    Get OHLC candles for a symbol from the recorded price history
+    URL params: ?interval=1m|1h|1d|1w&from=<ISO date>&to=<ISO date>
+    Returns: {"symbol": "AAPL", "interval": "1d", "candles": [{"time": ..., "open": ..., "high": ..., "low": ..., "close": ..., "count": ...}]}
+    """
+    try:
+        interval, start, end = _history_params()
+        series = price_history_service.get_ohlc([symbol], interval, start, end)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'symbol': symbol, 'interval': interval, 'candles': series[symbol]})
+
+@price_routes.route('/api/prices/history', methods=['GET'])
+def get_prices_history():
+    """
+    Get OHLC candles for several symbols at once
+    URL params: ?symbols=AAPL,BTC&interval=1m|1h|1d|1w&from=<ISO date>&to=<ISO date>
+    Returns: {"interval": "1d", "series": {"AAPL": [...], "BTC": [...]}}
+    """
+    symbols = [symbol.strip() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+    if not symbols:
+        return jsonify({"error": "No symbols provided"}), 400
+
+    try:
+        interval, start, end = _history_params()
+        series = price_history_service.get_ohlc(symbols, interval, start, end)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'interval': interval, 'series': series})
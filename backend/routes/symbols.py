@@ -1,17 +1,44 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify, request
 from backend.services import symbol_service
 from backend.utils.logging import logger
+from backend.config.settings import (
+    ASSET_TYPE_CRYPTO, ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK,
+    SYMBOL_SEARCH_DEFAULT_LIMIT, SYMBOL_SEARCH_MAX_LIMIT, SYMBOL_LIST_MAX_AGE
+)
 
 # Create a Blueprint for symbol routes
 symbols_bp = Blueprint('symbols', __name__, url_prefix='/api/symbols')
 
 
+def _symbol_list_response(name: str) -> Response:
+    """
+    Serve a pre-encoded symbol list: gzip bytes when the client accepts them, a strong
+    ETag per encoding, and 304 Not Modified when If-None-Match matches
+    """
+    encoded = symbol_service.get_encoded_symbols(name)
+    use_gzip = request.accept_encodings['gzip'] > 0
+    etag = f"{encoded.etag}-gzip" if use_gzip else encoded.etag
+
+    # Either encoding of an unchanged list is still valid for the client
+    if any(request.if_none_match.contains_weak(tag) for tag in (encoded.etag, f"{encoded.etag}-gzip")):
+        response = Response(status=304)
+    elif use_gzip:
+        response = Response(encoded.gzipped, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(encoded.body(), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={SYMBOL_LIST_MAX_AGE}'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
 @symbols_bp.route('/crypto', methods=['GET'])
 def get_crypto_symbols():
     """
     Get all cryptocurrency symbols
     """
-    return jsonify(symbol_service.get_crypto_symbols())
+    return _symbol_list_response('crypto')
 
 
 @symbols_bp.route('/indian_stocks', methods=['GET'])
@@ -19,7 +46,7 @@ def get_indian_stock_symbols():
     """
     Get all Indian stock symbols
     """
-    return jsonify(symbol_service.get_indian_stock_symbols())
+    return _symbol_list_response('indian_stocks')
 
 
 @symbols_bp.route('/us_stocks', methods=['GET'])
@@ -27,4 +54,38 @@ def get_us_stock_symbols():
     """
     Get all US stock symbols
     """
-    return jsonify(symbol_service.get_us_stock_symbols())
+    return _symbol_list_response('us_stocks')
+
+
+@symbols_bp.route('/stats', methods=['GET'])
+def get_symbol_stats():
+    """
+    Get the size of each loaded symbol list and of the search index
+    Returns: {"crypto": {"count": 17000, "bytes": 1500000}, "indian_stocks": {...}, "us_stocks": {...},
+              "search_index": {...}, "total_bytes": 2500000}
+    """
+    return jsonify(symbol_service.get_catalogue_stats())
+
+
+@symbols_bp.route('/search', methods=['GET'])
+def search_symbols():
+    """
+    Search symbols and names of all asset types for autocomplete
+    URL params: ?q=text&type=Crypto|Indian Stock|US Stock&limit=10&offset=0
+    Returns: {"results": [{"symbol": "BTC", "name": "Bitcoin", "asset_type": "Crypto", "id": "bitcoin"}, ...],
+              "total": 1, "offset": 0, "limit": 10}
+    Results are ranked: exact symbol, symbol prefix, name prefix, then substring matches
+    """
+    asset_type = request.args.get('type') or None
+    if asset_type not in (None, ASSET_TYPE_CRYPTO, ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK):
+        return jsonify({"error": f"Unknown asset type: {asset_type}"}), 400
+    try:
+        limit = int(request.args.get('limit', SYMBOL_SEARCH_DEFAULT_LIMIT))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    if not 1 <= limit <= SYMBOL_SEARCH_MAX_LIMIT or offset < 0:
+        return jsonify({"error": f"limit must be between 1 and {SYMBOL_SEARCH_MAX_LIMIT} and offset non-negative"}), 400
+
+    index = symbol_service.get_search_index()
+    return jsonify(index.search(request.args.get('q', ''), asset_type, limit, offset))
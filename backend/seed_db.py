@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app import create_app
 from backend import db
 from backend.models.asset import Asset
+from backend.services import aggregate_service
 
 def seed_database():
     app = create_app()
@@ -76,6 +77,9 @@ def seed_database():
         
         # Commit the changes
         db.session.commit()
+        
+        # Recompute the portfolio aggregates for the new assets
+        aggregate_service.rebuild()
         print("✅ Database seeded with sample data!")
 
 if __name__ == '__main__':
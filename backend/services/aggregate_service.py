@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Dict, Any, List
+from sqlalchemy import select, update, delete, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from backend.models import db, Asset, PortfolioAggregate, PortfolioSymbolAggregate
+from backend.utils.logging import logger
+
+# Functions here only stage changes in db.session; the calling route commits them
+# together with the asset change so the aggregates never drift from the asset table.
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def _add_to_row(model, keys: Dict[str, Any], deltas: Dict[str, float]) -> int:
+    """
+    Add deltas to the row matching keys, creating it with the deltas as its values if missing
+    Uses one INSERT ... ON CONFLICT DO UPDATE where the dialect has it, so two
+    transactions creating the same row at once both succeed. Returns the row's lot_count afterwards.
+    The upsert's update sets updated_at itself, as the model's onupdate does not apply to it.
+    """
+    table = model.__table__
+    increments = {column: table.c[column] + value for column, value in deltas.items()}
+    match = [table.c[column] == value for column, value in keys.items()]
+
+    dialect_insert = _UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(table).values(**keys, **deltas)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_=dict({column: table.c[column] + statement.excluded[column] for column in deltas},
+                      updated_at=datetime.utcnow()),
+        ).returning(table.c.lot_count)
+        return db.session.execute(statement).scalar_one()
+
+    # Other databases: update, else insert in a savepoint and update after all if another transaction won
+    if not db.session.execute(update(table).where(*match).values(increments)).rowcount:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table).values(**keys, **deltas))
+        except IntegrityError:
+            db.session.execute(update(table).where(*match).values(increments))
+    return db.session.execute(select(table.c.lot_count).where(*match)).scalar_one()
+
+
+def _apply(asset_type: str, symbol: str, lots: int, quantity: float, cost: float) -> None:
+    """Add signed deltas for one (asset_type, symbol) to both aggregate tables"""
+    deltas = {'lot_count': lots, 'total_quantity': quantity, 'total_cost': cost}
+    symbol_delta = 0
+    if lots > 0:
+        # The row is new exactly when it holds only these lots (empty rows are deleted)
+        if _add_to_row(PortfolioSymbolAggregate, {'asset_type': asset_type, 'symbol': symbol}, deltas) == lots:
+            symbol_delta = 1
+    else:
+        symbol_match = (PortfolioSymbolAggregate.asset_type == asset_type, PortfolioSymbolAggregate.symbol == symbol)
+        updated = db.session.execute(
+            update(PortfolioSymbolAggregate).where(*symbol_match).values(
+                lot_count=PortfolioSymbolAggregate.lot_count + lots,
+                total_quantity=PortfolioSymbolAggregate.total_quantity + quantity,
+                total_cost=PortfolioSymbolAggregate.total_cost + cost,
+            )
+        ).rowcount
+        if not updated:
+            logger.warning(f"No aggregate row for {symbol} ({asset_type}); aggregates may need a rebuild")
+            return
+        symbol_delta = -db.session.execute(
+            delete(PortfolioSymbolAggregate).where(*symbol_match, PortfolioSymbolAggregate.lot_count <= 0)
+        ).rowcount
+
+    _add_to_row(PortfolioAggregate, {'asset_type': asset_type}, dict(deltas, symbol_count=symbol_delta))
+
+
+def record_added(asset: Asset) -> None:
+    """Stage the aggregate change for a new lot"""
+    _apply(asset.asset_type, asset.symbol, 1, asset.quantity, asset.quantity * asset.purchase_price)
+
+
+def record_removed(asset: Asset) -> None:
+    """Stage the aggregate change for a lot about to be deleted (or before it is edited)"""
+    _apply(asset.asset_type, asset.symbol, -1, -asset.quantity, -asset.quantity * asset.purchase_price)
+
+
+def record_bulk_removed(asset_ids: List[int]) -> None:
+    """Stage the aggregate changes for lots about to be bulk-deleted, one update per (type, symbol)"""
+    groups = db.session.execute(
+        select(Asset.asset_type, Asset.symbol, func.count(), func.sum(Asset.quantity),
+               func.sum(Asset.quantity * Asset.purchase_price))
+        .where(Asset.id.in_(asset_ids))
+        .group_by(Asset.asset_type, Asset.symbol)
+    ).all()
+    for asset_type, symbol, lots, quantity, cost in groups:
+        _apply(asset_type, symbol, -lots, -quantity, -cost)
+
+
+def rebuild() -> None:
+    """Recompute both aggregate tables from the asset table and commit"""
+    db.session.execute(delete(PortfolioSymbolAggregate))
+    db.session.execute(delete(PortfolioAggregate))
+
+    groups = db.session.execute(
+        select(Asset.asset_type, Asset.symbol, func.count(), func.sum(Asset.quantity),
+               func.sum(Asset.quantity * Asset.purchase_price))
+        .group_by(Asset.asset_type, Asset.symbol)
+    ).all()
+    totals = {}
+    for asset_type, symbol, lots, quantity, cost in groups:
+        db.session.add(PortfolioSymbolAggregate(
+            asset_type=asset_type, symbol=symbol, lot_count=lots, total_quantity=quantity, total_cost=cost))
+        total = totals.setdefault(asset_type, PortfolioAggregate(
+            asset_type=asset_type, lot_count=0, symbol_count=0, total_quantity=0.0, total_cost=0.0))
+        total.lot_count += lots
+        total.symbol_count += 1
+        total.total_quantity += quantity
+        total.total_cost += cost
+    db.session.add_all(totals.values())
+    db.session.commit()
+    logger.info(f"Rebuilt portfolio aggregates for {len(totals)} asset types and {len(groups)} symbols")
+
+
+def ensure_built() -> None:
+    """Rebuild the aggregates if they are empty while assets exist (new table or fresh seed)"""
+    has_aggregates = db.session.execute(select(PortfolioAggregate.id).limit(1)).first() is not None
+    has_assets = db.session.execute(select(Asset.id).limit(1)).first() is not None
+    if has_assets and not has_aggregates:
+        rebuild()
+
+
+def get_aggregates() -> Dict[str, Any]:
+    """
+    Get totals per asset type and overall, read from the aggregate table
+    Returns {'by_type': {asset_type: {...}}, 'total': {...}}
+    """
+    by_type = {}
+    total = {'lot_count': 0, 'symbol_count': 0, 'total_quantity': 0.0, 'total_cost': 0.0}
+    for aggregate in PortfolioAggregate.query.filter(PortfolioAggregate.lot_count > 0):
+        figures = aggregate.to_dict()
+        del figures['asset_type']
+        by_type[aggregate.asset_type] = figures
+        for key in total:
+            total[key] += figures[key]
+    return {'by_type': by_type, 'total': total}
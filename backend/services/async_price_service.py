@@ -0,0 +1,295 @@
+import asyncio
+import time
+import aiohttp
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import partial
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable
+from backend.utils.logging import logger
+from backend.config.settings import (
+    COINGECKO_API_URL, YHOO_FINANCE_API_URL, REQUEST_TIMEOUT, COINGECKO_BATCH_SIZE, YAHOO_BATCH_SIZE,
+    ASYNC_MAX_IN_FLIGHT, RATE_LIMIT_MAX_WAIT, PRICE_CACHE_FILL_LEASE, PRICE_CACHE_FILL_POLL
+)
+from backend.services.price_service import PriceService
+from backend.services.rate_limiter import parse_retry_after
+
+# Yahoo rejects requests without a browser-like user agent
+_YAHOO_HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; PortfolioAnalyser/1.0)'}
+
+
+class AsyncCoinGeckoClient:
+    """Async client for the CoinGecko /simple/price endpoint"""
+    def __init__(self, session: aiohttp.ClientSession, base_url: str = COINGECKO_API_URL):
+        self.session = session
+        self.base_url = base_url
+
+    async def get_prices(self, symbol_ids: List[str]) -> Dict[str, float]:
+        """
+        Fetch USD prices for a batch of CoinGecko IDs in one request
+        Raises aiohttp.ClientResponseError for non-2xx responses (including 429, with Retry-After in e.headers)
+        """
+        params = {'ids': ','.join(symbol_ids), 'vs_currencies': 'usd'}
+        async with self.session.get(f"{self.base_url}/simple/price", params=params) as response:
+            response.raise_for_status()
+            data = await response.json() or {}
+
+        return {
+            symbol_id: data[symbol_id]['usd']
+            for symbol_id in symbol_ids
+            if data.get(symbol_id, {}).get('usd') is not None
+        }
+
+
+class AsyncYahooClient:
+    """
+    Async client for the Yahoo Finance v8 chart endpoint, the one yfinance uses
+    It serves one ticker per request but, unlike the multi-ticker v7 quote
+    endpoint, needs no cookie and crumb.
+    """
+    def __init__(self, session: aiohttp.ClientSession, base_url: str = YHOO_FINANCE_API_URL):
+        self.session = session
+        self.base_url = base_url
+
+    async def get_price(self, symbol: str) -> Optional[float]:
+        """
+        Fetch the latest market price for one ticker
+        Raises aiohttp.ClientResponseError for non-2xx responses (including 429, with Retry-After in e.headers)
+        """
+        params = {'range': '1d', 'interval': '1d'}
+        async with self.session.get(f"{self.base_url}/{symbol}", params=params, headers=_YAHOO_HEADERS) as response:
+            response.raise_for_status()
+            data = await response.json() or {}
+
+        results = (data.get('chart') or {}).get('result') or []
+        if not results:
+            return None
+        price = (results[0].get('meta') or {}).get('regularMarketPrice')
+        return float(price) if price is not None else None
+
+
+class AsyncPriceService:
+    """
+    asyncio counterpart of PriceService
+    Shares the cache, TTL rules and provider rate limiters of a PriceService
+    instance but talks to the providers through aiohttp, so a single worker can
+    keep up to max_in_flight upstream requests open at once
+    """
+    def __init__(self, price_service: Optional[PriceService] = None,
+                 coingecko_url: str = COINGECKO_API_URL,
+                 yahoo_url: str = YHOO_FINANCE_API_URL,
+                 max_in_flight: int = ASYNC_MAX_IN_FLIGHT):
+        self.price_service = price_service or PriceService()
+        self.coingecko_url = coingecko_url
+        self.yahoo_url = yahoo_url
+        self.max_in_flight = max_in_flight
+
+    @asynccontextmanager
+    async def _client_session(self):
+        """Open an aiohttp session whose connector caps the number of in-flight requests"""
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            yield session
+
+    async def get_prices_for_assets(self, assets: List[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Get current prices for a list of assets
+        Crypto and stock lookups run concurrently; returns a dictionary mapping symbols to prices
+        """
+        crypto_ids, stock_symbols = self.price_service._partition_assets(assets)
+
+        async with self._client_session() as session:
+            crypto_prices, stock_prices = await asyncio.gather(
+                self._crypto_prices(session, list(dict.fromkeys(crypto_ids.values()))),
+                self._stock_prices(session, stock_symbols),
+            )
+
+        result = {
+            symbol: crypto_prices[crypto_id]
+            for symbol, crypto_id in crypto_ids.items()
+            if crypto_id in crypto_prices
+        }
+        result.update(stock_prices)
+        return result
+
+    async def get_price_for_asset(self, asset: Dict[str, Any]) -> Optional[float]:
+        """Get current price for a single asset based on its type"""
+        symbol = asset.get('symbol')
+        if not symbol or not asset.get('asset_type'):
+            logger.error("Invalid asset data: missing symbol or asset_type")
+            return None
+
+        prices = await self.get_prices_for_assets([asset])
+        return prices.get(symbol)
+
+    async def get_crypto_prices(self, symbol_ids: List[str]) -> Dict[str, float]:
+        """Get current prices for several CoinGecko IDs"""
+        async with self._client_session() as session:
+            return await self._crypto_prices(session, [symbol_id.lower() for symbol_id in symbol_ids])
+
+    async def get_stock_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Get current prices for several stock tickers"""
+        async with self._client_session() as session:
+            return await self._stock_prices(session, symbols)
+
+    def _cached(self, symbols: List[str], is_crypto: bool = False) -> Tuple[Dict[str, float], List[str]]:
+        """Split symbols into fresh cache hits and the ones still to fetch"""
+        result = {}
+        missing = []
+        for symbol in symbols:
+            price = self.price_service._valid_cached_price(symbol, is_crypto=is_crypto)
+            if price is not None:
+                result[symbol] = price
+            else:
+                missing.append(symbol)
+        return result, missing
+
+    @staticmethod
+    async def _fetch_batches(fetch_batch: Callable[[List[str]], Awaitable[Dict[str, float]]], batch_size: int,
+                             keys: List[str]) -> Dict[str, float]:
+        """Fetch keys in concurrent batches of batch_size"""
+        result = {}
+        batches = [keys[start:start + batch_size] for start in range(0, len(keys), batch_size)]
+        for batch_prices in await asyncio.gather(*(fetch_batch(batch) for batch in batches)):
+            result.update(batch_prices)
+        return result
+
+    async def _fetch_host_wide(self, keys: List[str], fetch: Callable[[List[str]], Awaitable[Dict[str, float]]],
+                               is_crypto: bool = False) -> Dict[str, float]:
+        """PriceService._fetch_host_wide for coroutines"""
+        service = self.price_service
+        owned, others = service._claim_host_fills(keys)
+        result = {}
+        try:
+            if owned:
+                result.update(await fetch(owned))
+        finally:
+            service._release_host_fills(owned)
+        if others:
+            waited, leftover = await self._wait_for_host_fills(others, is_crypto)
+            result.update(waited)
+            if leftover:
+                result.update(await fetch(leftover))
+        return result
+
+    async def _wait_for_host_fills(self, keys: List[str], is_crypto: bool = False) -> Tuple[Dict[str, float], List[str]]:
+        """PriceService._wait_for_host_fills polling with asyncio.sleep, so waiting holds no thread"""
+        service = self.price_service
+        deadline = time.monotonic() + PRICE_CACHE_FILL_LEASE
+        result = {}
+        pending = list(keys)
+        while True:
+            pending = service._poll_host_fills(pending, result, is_crypto)
+            if not pending or time.monotonic() >= deadline or not service.price_cache.pending_fills(pending):
+                return result, pending
+            await asyncio.sleep(PRICE_CACHE_FILL_POLL)
+
+    async def _crypto_prices(self, session: aiohttp.ClientSession, symbol_ids: List[str]) -> Dict[str, float]:
+        """Serve cached (or stale-while-revalidate) crypto prices and fetch the rest in concurrent batches"""
+        service = self.price_service
+        result, stale, missing = service._split_by_cache(list(dict.fromkeys(symbol_ids)), is_crypto=True)
+        if stale:
+            service._revalidate_in_background(stale, service._refresh_crypto)
+
+        if missing:
+            result.update(await service._crypto_flight.fetch_async(
+                missing, lambda owned: self._fetch_crypto_misses(session, owned)))
+        return result
+
+    async def _fetch_crypto_misses(self, session: aiohttp.ClientSession, symbol_ids: List[str]) -> Dict[str, float]:
+        """Re-check the cache (another flight may have just filled it) and fetch the rest in concurrent batches"""
+        result, missing = self._cached(symbol_ids, is_crypto=True)
+        fetch = partial(self._fetch_batches, partial(self._fetch_crypto_batch, session), COINGECKO_BATCH_SIZE)
+        result.update(await self._fetch_host_wide(missing, fetch, is_crypto=True))
+        return result
+
+    async def _fetch_crypto_batch(self, session: aiohttp.ClientSession, symbol_ids: List[str]) -> Dict[str, float]:
+        """Fetch one chunk of CoinGecko IDs, falling back to expired cache when rate limited"""
+        service = self.price_service
+        if not await service.coingecko_limiter.acquire_async(RATE_LIMIT_MAX_WAIT):
+            logger.warning("Skipping CoinGecko request due to rate limiting")
+            return service._expired_cache_fallback(symbol_ids)
+
+        try:
+            logger.info(f"Fetching crypto prices for {len(symbol_ids)} ids (async)")
+            prices = await AsyncCoinGeckoClient(session, self.coingecko_url).get_prices(symbol_ids)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 429:
+                service._mark_coingecko_rate_limited(parse_retry_after((e.headers or {}).get('Retry-After')))
+                return service._expired_cache_fallback(symbol_ids)
+            logger.error(f"Error fetching crypto prices for {', '.join(symbol_ids)}: {e}")
+            return {}
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Error fetching crypto prices for {', '.join(symbol_ids)}: {e}")
+            return {}
+
+        now = datetime.now()
+        for symbol_id, price in prices.items():
+            service.price_cache[symbol_id] = {'price': price, 'timestamp': now}
+        service._record_history(prices, now, is_crypto=True)
+        return prices
+
+    async def _stock_prices(self, session: aiohttp.ClientSession, symbols: List[str]) -> Dict[str, float]:
+        """Serve cached (or stale-while-revalidate) stock prices and fetch the misses in concurrent batches"""
+        service = self.price_service
+        result, stale, missing = service._split_by_cache(list(dict.fromkeys(symbols)))
+        if stale:
+            service._revalidate_in_background(stale, service._refresh_stocks)
+
+        if missing:
+            result.update(await service._stock_flight.fetch_async(
+                missing, lambda owned: self._fetch_stock_misses(session, owned)))
+        return result
+
+    async def _fetch_stock_misses(self, session: aiohttp.ClientSession, symbols: List[str]) -> Dict[str, float]:
+        """Re-check the cache (another flight may have just filled it) and fetch the rest in concurrent batches"""
+        result, missing = self._cached(symbols)
+        client = AsyncYahooClient(session, self.yahoo_url)
+        fetch = partial(self._fetch_batches, partial(self._fetch_stock_batch, client), YAHOO_BATCH_SIZE)
+        result.update(await self._fetch_host_wide(missing, fetch))
+        return result
+
+    async def _fetch_stock_batch(self, client: AsyncYahooClient, symbols: List[str]) -> Dict[str, float]:
+        """Fetch one chunk of tickers with concurrent chart requests, one Yahoo token each"""
+        service = self.price_service
+        quotes = await asyncio.gather(*(self._fetch_stock_price(client, symbol) for symbol in symbols))
+
+        now = datetime.now()
+        prices = {}
+        fetched = {}
+        for symbol, (price, is_fresh) in zip(symbols, quotes):
+            if price is None:
+                continue
+            prices[symbol] = price
+            if is_fresh:
+                fetched[symbol] = price
+                service.price_cache[symbol] = {'price': price, 'timestamp': now}
+        service._record_history(fetched, now)
+        return prices
+
+    async def _fetch_stock_price(self, client: AsyncYahooClient, symbol: str) -> Tuple[Optional[float], bool]:
+        """
+        Fetch one ticker, falling back to expired cache when rate limited
+        Returns (price, whether it was fetched now)
+        """
+        service = self.price_service
+        if not await service.yahoo_limiter.acquire_async(RATE_LIMIT_MAX_WAIT):
+            logger.warning("Skipping Yahoo Finance request due to rate limiting")
+            return service._expired_cache_fallback([symbol]).get(symbol), False
+
+        try:
+            logger.info(f"Fetching stock price for {symbol} (async)")
+            price = await client.get_price(symbol)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 429:
+                service.yahoo_limiter.penalize(parse_retry_after((e.headers or {}).get('Retry-After')))
+                return service._expired_cache_fallback([symbol]).get(symbol), False
+            logger.error(f"Error fetching stock price for {symbol}: {e}")
+            return None, False
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Error fetching stock price for {symbol}: {e}")
+            return None, False
+
+        if price is None:
+            logger.warning(f"No price data found for stock {symbol}")
+        return price, True
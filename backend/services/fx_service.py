@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+import yfinance as yf
+from backend.services.price_service import PriceService
+from backend.services.rate_limiter import TokenBucketRateLimiter
+from backend.services.valuation_service import Holdings, ASSET_TYPES, OTHER_ASSET_TYPE
+from backend.utils.logging import logger
+from backend.config.settings import (
+    ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO, BASE_CURRENCY,
+    FX_CACHE_DURATION, FX_RETRY_INTERVAL, FX_RATE_LIMIT_PER_MINUTE, FX_RATE_LIMIT_BURST,
+    RATE_LIMIT_MAX_WAIT, REQUEST_TIMEOUT
+)
+
+# Currency each asset type is quoted in by its price provider
+ASSET_CURRENCIES = {
+    ASSET_TYPE_INDIAN_STOCK: 'INR',
+    ASSET_TYPE_US_STOCK: 'USD',
+    ASSET_TYPE_CRYPTO: 'USD',  # CoinGecko prices are requested in usd
+}
+
+
+def fx_ticker(currency: str, base: str) -> str:
+    """Yahoo Finance ticker for the price of one unit of currency in base, e.g. USDINR=X"""
+    return f"{currency}{base}=X"
+
+
+class FxService:
+    """
+    Exchange rates into the base currency with a TTL cache
+    All missing or expired rates are fetched with one yf.download call, behind
+    its own token bucket. When a fetch fails the expired rate keeps being
+    served; a currency that was never fetched has no rate (None) and is not
+    retried for FX_RETRY_INTERVAL seconds.
+    """
+    def __init__(self, base_currency: str = BASE_CURRENCY, cache_duration: float = FX_CACHE_DURATION,
+                 limiter: Optional[TokenBucketRateLimiter] = None):
+        self.base_currency = base_currency
+        self.cache_duration = cache_duration
+        self.limiter = limiter or TokenBucketRateLimiter('Yahoo Finance FX', FX_RATE_LIMIT_PER_MINUTE,
+                                                         burst=FX_RATE_LIMIT_BURST)
+        self._lock = threading.Lock()
+        # Format: {currency: (rate, fetched_at)}
+        self._rates: Dict[str, Tuple[float, float]] = {}
+        self._failed: Dict[str, float] = {}
+
+    def get_rates(self, currencies: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Get the base-currency value of one unit of each currency"""
+        now = time.time()
+        result = {}
+        with self._lock:
+            missing = []
+            for currency in set(currencies):
+                cached = self._rates.get(currency)
+                if currency == self.base_currency:
+                    result[currency] = 1.0
+                elif cached and now - cached[1] < self.cache_duration:
+                    result[currency] = cached[0]
+                elif now - self._failed.get(currency, 0.0) >= FX_RETRY_INTERVAL:
+                    missing.append(currency)
+                else:
+                    result[currency] = cached[0] if cached else None
+
+            # Fetching under the lock makes concurrent callers share one request
+            fetched = self._fetch(sorted(missing)) if missing else {}
+            for currency in missing:
+                if currency in fetched:
+                    self._rates[currency] = (fetched[currency], now)
+                    self._failed.pop(currency, None)
+                else:
+                    self._failed[currency] = now
+                cached = self._rates.get(currency)
+                result[currency] = cached[0] if cached else None
+        return result
+
+    def _fetch(self, currencies) -> Dict[str, float]:
+        """Download the latest close of every currency pair in one request"""
+        if not self.limiter.acquire(timeout=RATE_LIMIT_MAX_WAIT):
+            logger.warning("Skipping exchange rate request due to rate limiting")
+            return {}
+
+        tickers = [fx_ticker(currency, self.base_currency) for currency in currencies]
+        try:
+            logger.info(f"Fetching exchange rates: {', '.join(tickers)}")
+            data = yf.download(tickers=tickers, period='5d', group_by='ticker', auto_adjust=True,
+                               progress=False, timeout=REQUEST_TIMEOUT)
+        except Exception as e:
+            if type(e).__name__ == 'YFRateLimitError':
+                self.limiter.penalize()
+            logger.error(f"Error fetching exchange rates: {e}")
+            return {}
+
+        rates = {}
+        for currency, ticker in zip(currencies, tickers):
+            rate = PriceService._last_close(data, ticker, single=len(tickers) == 1)
+            if rate is None:
+                logger.warning(f"No exchange rate found for {ticker}")
+                continue
+            rates[currency] = rate
+        return rates
+
+    def lot_rates(self, holdings: Holdings) -> Tuple[np.ndarray, Dict[str, Optional[float]]]:
+        """
+        Conversion factor for every lot, from one rate lookup per asset type
+        Returns (rates, rates_by_currency); lots whose rate is unavailable get NaN so
+        they are valued like unquoted lots (at cost) instead of mixing currencies
+        """
+        currencies = [ASSET_CURRENCIES.get(asset_type, self.base_currency)
+                      for asset_type in ASSET_TYPES + (OTHER_ASSET_TYPE,)]
+        rates = self.get_rates(currencies[code] for code in np.unique(holdings.type_codes).tolist())
+        type_rates = np.array([np.nan if rates.get(currency) is None else rates[currency] for currency in currencies],
+                              dtype=np.float64)
+        return type_rates[holdings.type_codes], rates
+
+    def convert_prices(self, prices: Dict[str, float], asset_types: Dict[str, str]) -> Dict[str, float]:
+        """
+        Convert quotes keyed by symbol into the base currency
+        asset_types maps each symbol to its asset type; quotes whose currency has no rate are left out
+        """
+        currencies = {symbol: ASSET_CURRENCIES.get(asset_types.get(symbol), self.base_currency) for symbol in prices}
+        rates = self.get_rates(currencies.values())
+        return {
+            symbol: price * rates[currencies[symbol]]
+            for symbol, price in prices.items()
+            if rates.get(currencies[symbol]) is not None
+        }
+
+    def describe(self, rates: Dict[str, Optional[float]]) -> Dict[str, Any]:
+        """The 'fx' block of a response: base currency, rates used and currencies left unconverted"""
+        return {
+            'base': self.base_currency,
+            'rates': rates,
+            'unconverted': sorted(currency for currency, rate in rates.items() if rate is None),
+        }
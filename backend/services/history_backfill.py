@@ -0,0 +1,225 @@
+import json
+import os
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Tuple
+import yfinance as yf
+from sqlalchemy import select, func, insert
+from backend.models import db, Asset, PriceHistory
+from backend.utils.logging import logger
+from backend.services.rate_limiter import TokenBucketRateLimiter
+from backend.config.settings import (
+    ASSET_TYPE_CRYPTO, REQUEST_TIMEOUT, YAHOO_RATE_LIMIT_PER_MINUTE, YAHOO_RATE_LIMIT_BURST, RATE_LIMIT_MAX_WAIT,
+    PRICE_BACKFILL_CHUNK_SIZE, PRICE_BACKFILL_CHECKPOINT
+)
+
+# Daily closes keyed by provider ticker, format: {ticker: [(date, close), ...]}
+DailySeries = Dict[str, List[Tuple[date, float]]]
+
+
+def provider_ticker(symbol: str, asset_type: str) -> str:
+    """Yahoo Finance ticker for a held symbol (crypto trades as e.g. BTC-USD)"""
+    if asset_type == ASSET_TYPE_CRYPTO and '-' not in symbol:
+        return f"{symbol.upper()}-USD"
+    return symbol
+
+
+class YahooHistorySource:
+    """Downloads daily closes for several tickers per yf.download call"""
+    def __init__(self, limiter: Optional[TokenBucketRateLimiter] = None):
+        self.limiter = limiter or TokenBucketRateLimiter(
+            'Yahoo Finance', YAHOO_RATE_LIMIT_PER_MINUTE, burst=YAHOO_RATE_LIMIT_BURST)
+
+    def daily_closes(self, tickers: List[str], start: date, end: date) -> DailySeries:
+        if not self.limiter.acquire(timeout=RATE_LIMIT_MAX_WAIT):
+            raise RuntimeError("Yahoo Finance rate limit: no request slot available")
+
+        data = yf.download(
+            tickers=tickers,
+            start=start.isoformat(),
+            end=(end + timedelta(days=1)).isoformat(),  # end is exclusive
+            interval='1d',
+            group_by='ticker',
+            auto_adjust=True,
+            progress=False,
+            timeout=REQUEST_TIMEOUT
+        )
+
+        series = {}
+        for ticker in tickers:
+            if data is None or data.empty:
+                break
+            if data.columns.nlevels > 1:
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                frame = data[ticker]
+            else:
+                frame = data
+            if 'Close' not in frame:
+                continue
+            closes = frame['Close'].dropna()
+            series[ticker] = [(timestamp.date(), float(close)) for timestamp, close in closes.items()]
+        return series
+
+
+class FixtureHistorySource:
+    """
+    Serves daily closes from a recorded JSON fixture, for offline runs
+    Fixture format: {"AAPL": {"2024-01-02": 185.64, ...}, "BTC-USD": {...}}
+    """
+    def __init__(self, path: str):
+        with open(path) as f:
+            self.data = json.load(f)
+
+    def daily_closes(self, tickers: List[str], start: date, end: date) -> DailySeries:
+        series = {}
+        for ticker in tickers:
+            closes = [
+                (date.fromisoformat(day), float(close))
+                for day, close in sorted(self.data.get(ticker, {}).items())
+            ]
+            series[ticker] = [(day, close) for day, close in closes if start <= day <= end]
+        return series
+
+
+class RecordingHistorySource:
+    """Wraps another source and saves everything it returns as a fixture file"""
+    def __init__(self, source, path: str):
+        self.source = source
+        self.path = path
+
+    def daily_closes(self, tickers: List[str], start: date, end: date) -> DailySeries:
+        series = self.source.daily_closes(tickers, start, end)
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+        for ticker, closes in series.items():
+            data.setdefault(ticker, {}).update((day.isoformat(), close) for day, close in closes)
+        with open(self.path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        return series
+
+
+class HistoryBackfill:
+    """
+    Backfills daily closes into price_history for every held symbol
+    Each symbol is filled from its earliest purchase date up to yesterday. The
+    checkpoint records the range of days already covered per symbol, so a rerun
+    only downloads the days after it and, when a lot with an earlier purchase
+    date has been added, the days before it. Symbols are fetched in multi-ticker
+    chunks, rows already present are skipped, and the checkpoint file is
+    rewritten after every committed chunk so an interrupted run resumes where
+    it stopped.
+    """
+    def __init__(self, app, source=None,
+                 checkpoint_path: str = PRICE_BACKFILL_CHECKPOINT,
+                 chunk_size: int = PRICE_BACKFILL_CHUNK_SIZE):
+        self.app = app
+        self.source = source or YahooHistorySource()
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+
+    def load_checkpoint(self) -> Dict[str, Dict[str, str]]:
+        """Return {symbol: {'first': ISO date, 'last': ISO date}} of the days already backfilled"""
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable backfill checkpoint {self.checkpoint_path}: {e}")
+            return {}
+        # Older checkpoints kept only the last date; the days before it are checked again
+        return {
+            symbol: covered if isinstance(covered, dict) else {'first': covered, 'last': covered}
+            for symbol, covered in checkpoint.items()
+        }
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Dict[str, str]]) -> None:
+        """Write the checkpoint atomically so a crash never leaves a partial file"""
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(checkpoint, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _pending_ranges(self, checkpoint: Dict[str, Dict[str, str]], until: date) -> List[Tuple[str, str, date, date]]:
+        """Day ranges left to backfill for held symbols, as (symbol, asset_type, start, end)"""
+        holdings = db.session.execute(
+            select(Asset.symbol, Asset.asset_type, func.min(Asset.purchase_date))
+            .group_by(Asset.symbol, Asset.asset_type)
+        ).all()
+
+        pending = []
+        for symbol, asset_type, first_purchase in holdings:
+            start = first_purchase.date()
+            covered = checkpoint.get(symbol)
+            if covered is None:
+                ranges = [(start, until)]
+            else:
+                first, last = date.fromisoformat(covered['first']), date.fromisoformat(covered['last'])
+                # Lots bought before the covered range (days already complete), then the days since it
+                ranges = [(start, first - timedelta(days=1)), (last + timedelta(days=1), until)]
+            pending.extend((symbol, asset_type, begin, end) for begin, end in ranges if begin <= end)
+        return pending
+
+    def run(self, until: Optional[date] = None) -> int:
+        """
+        Backfill every held symbol up to until (default yesterday, the last complete session)
+        Returns the number of rows inserted
+        """
+        until = until or date.today() - timedelta(days=1)
+        with self.app.app_context():
+            checkpoint = self.load_checkpoint()
+            pending = self._pending_ranges(checkpoint, until)
+            logger.info(f"Backfilling {len(pending)} price history ranges")
+
+            inserted = 0
+            for start in range(0, len(pending), self.chunk_size):
+                chunk = pending[start:start + self.chunk_size]
+                inserted += self._backfill_chunk(chunk)
+                for symbol, _, begin, end in chunk:
+                    # Each range adjoins the covered one, so the union is still one range
+                    covered = checkpoint.get(symbol, {'first': begin.isoformat(), 'last': end.isoformat()})
+                    checkpoint[symbol] = {
+                        'first': min(covered['first'], begin.isoformat()),
+                        'last': max(covered['last'], end.isoformat()),
+                    }
+                self._save_checkpoint(checkpoint)
+
+            logger.info(f"Backfill inserted {inserted} price history rows")
+            return inserted
+
+    def _backfill_chunk(self, chunk: List[Tuple[str, str, date, date]]) -> int:
+        """Download one chunk of ranges and insert the rows not yet in price_history"""
+        tickers: Dict[str, List[Tuple[str, str, date, date]]] = {}
+        for symbol, asset_type, start, end in chunk:
+            tickers.setdefault(provider_ticker(symbol, asset_type), []).append((symbol, asset_type, start, end))
+        first_start = min(start for _, _, start, _ in chunk)
+        last_end = max(end for _, _, _, end in chunk)
+        series = self.source.daily_closes(list(tickers), first_start, last_end)
+
+        first_day = datetime.combine(first_start, datetime.min.time())
+        existing = {tuple(row) for row in db.session.execute(
+            select(PriceHistory.symbol, PriceHistory.timestamp).where(
+                PriceHistory.symbol.in_({symbol for symbol, _, _, _ in chunk}),
+                PriceHistory.timestamp >= first_day,
+            )
+        )}
+
+        rows = []
+        for ticker, ranges in tickers.items():
+            for day, close in series.get(ticker, []):
+                timestamp = datetime.combine(day, datetime.min.time())
+                for symbol, asset_type, start, end in ranges:
+                    if start <= day <= end and (symbol, timestamp) not in existing:
+                        existing.add((symbol, timestamp))
+                        rows.append({'symbol': symbol, 'asset_type': asset_type, 'price': close, 'timestamp': timestamp})
+
+        if rows:
+            db.session.execute(insert(PriceHistory), rows)
+        db.session.commit()
+        logger.info(f"Backfilled {len(rows)} rows for {', '.join(dict.fromkeys(symbol for symbol, _, _, _ in chunk))}")
+        return len(rows)
@@ -0,0 +1,289 @@
+import atexit
+import multiprocessing
+import secrets
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import date, timedelta
+from functools import partial
+from typing import Dict, Any, Optional, Sequence
+import numpy as np
+from backend.services.valuation_service import load_holdings
+from backend.services.risk_service import exposure_and_returns, portfolio_pnl
+from backend.utils.logging import logger
+from backend.config.settings import (
+    MONTE_CARLO_WORKERS, MONTE_CARLO_CHUNK_PATHS, MONTE_CARLO_MAX_PATHS, MONTE_CARLO_MAX_HORIZON,
+    MONTE_CARLO_MAX_POINTS, MONTE_CARLO_BINS, MONTE_CARLO_PERCENTILES, MONTE_CARLO_JOB_TTL,
+    RISK_LOOKBACK_DAYS, RISK_MAX_LOOKBACK_DAYS
+)
+
+MODELS = ('gbm', 'bootstrap')
+# Histogram range around the expected log value, in standard deviations
+RANGE_SIGMAS = 10
+# Largest seed a JavaScript client can read back from JSON exactly (Number.MAX_SAFE_INTEGER)
+MAX_SEED = 2 ** 53 - 1
+
+
+def simulate_chunk(model: str, drift: float, volatility: float, history: np.ndarray, checkpoints: np.ndarray,
+                   low: np.ndarray, width: np.ndarray, bins: int, paths: int, seed) -> tuple:
+    """
+    Simulate paths of the portfolio's log value and histogram them at each checkpoint
+    Runs in a worker process. Returns (counts, sums): counts is checkpoints x bins
+    and sums the total of exp(log value) per checkpoint, used for the mean.
+    """
+    rng = np.random.default_rng(seed)
+    log_value = np.zeros(paths)
+    draws = np.empty(paths)
+    counts = np.empty((len(checkpoints), bins), dtype=np.int64)
+    sums = np.empty(len(checkpoints))
+
+    point = 0
+    for step in range(1, int(checkpoints[-1]) + 1):
+        if model == 'gbm':
+            rng.standard_normal(out=draws)
+            draws *= volatility
+            draws += drift
+        else:
+            np.take(history, rng.integers(0, len(history), paths), out=draws)
+        log_value += draws
+
+        if step == checkpoints[point]:
+            index = ((log_value - low[point]) / width[point]).astype(np.int64)
+            np.clip(index, 0, bins - 1, out=index)
+            counts[point] = np.bincount(index, minlength=bins)
+            sums[point] = np.exp(log_value).sum()
+            point += 1
+    return counts, sums
+
+
+def histogram_percentiles(counts: np.ndarray, low: np.ndarray, width: np.ndarray,
+                          percentiles: Sequence[int]) -> Dict[int, np.ndarray]:
+    """Percentiles of the log value per checkpoint, interpolated inside histogram bins"""
+    cdf = np.cumsum(counts, axis=1)
+    total = cdf[:, -1]
+    rows = np.arange(len(counts))
+    result = {}
+    for percentile in percentiles:
+        target = total * percentile / 100.0
+        bin_index = np.minimum((cdf < target[:, None]).sum(axis=1), counts.shape[1] - 1)
+        in_bin = counts[rows, bin_index]
+        before = cdf[rows, bin_index] - in_bin
+        fraction = np.clip((target - before) / np.maximum(in_bin, 1), 0.0, 1.0)
+        result[percentile] = low + width * (bin_index + fraction)
+    return result
+
+
+class MonteCarloJob:
+    """State of one simulation: parameters, pool futures and the merged histograms"""
+    def __init__(self, job_id, params, start_value, drift, volatility, checkpoints, low, width, bins, chunks):
+        self.id = job_id
+        self.params = params
+        self.start_value = start_value
+        self.drift = drift
+        self.volatility = volatility
+        self.checkpoints = checkpoints
+        self.low = low
+        self.width = width
+        self.chunks = chunks
+        self.completed = 0
+        self.counts = np.zeros((len(checkpoints), bins), dtype=np.int64)
+        self.sums = np.zeros(len(checkpoints))
+        self.futures = []
+        self.status = 'running'
+        self.error = None
+        self.result = None
+        self.created = time.time()
+        self.finished = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        job = dict(self.params, id=self.id, status=self.status, progress=self.completed / self.chunks)
+        if self.error:
+            job['error'] = self.error
+        if self.result is not None:
+            job['result'] = self.result
+        return job
+
+
+class MonteCarloEngine:
+    """
+    Monte Carlo projections of the portfolio value, run as cancellable background jobs
+    Daily portfolio log returns over the lookback window (current weights applied
+    to the price store's daily returns, on the days every priced symbol has one) drive either geometric Brownian motion
+    with their mean and volatility, or bootstrap resampling of the observed days,
+    which keeps the cross-asset correlation of each day.
+
+    Paths are split into chunks of MONTE_CARLO_CHUNK_PATHS executed on a spawn
+    process pool, each with its own child of one SeedSequence, so a seeded run
+    gives the same result for any number of workers. Workers return fixed-size
+    histograms per reported day instead of paths; merging them is a sum, so
+    memory stays constant and throughput grows with the number of cores.
+    Cancelling a job cancels its queued chunks; chunks already running finish
+    and are discarded.
+    """
+    def __init__(self, max_workers: int = MONTE_CARLO_WORKERS, chunk_paths: int = MONTE_CARLO_CHUNK_PATHS,
+                 bins: int = MONTE_CARLO_BINS):
+        self.max_workers = max_workers
+        self.chunk_paths = chunk_paths
+        self.bins = bins
+        self._lock = threading.RLock()
+        self._executor = None
+        self._jobs: Dict[str, MonteCarloJob] = {}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(self.shutdown)
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, dropping queued chunks"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def submit(self, store, horizon_days: int = 365, paths: int = 100000, model: str = 'gbm',
+               lookback_days: int = RISK_LOOKBACK_DAYS, seed: Optional[int] = None,
+               fx_service=None) -> Dict[str, Any]:
+        """
+        Start a simulation of the current holdings; must run inside an application context
+        With an fx_service, stored quotes are converted at the current rates (reported under 'fx')
+        Raises ValueError for invalid parameters or when there is no price history to calibrate on
+        """
+        if model not in MODELS:
+            raise ValueError(f"model must be one of {', '.join(MODELS)}")
+        if not 1 <= horizon_days <= MONTE_CARLO_MAX_HORIZON:
+            raise ValueError(f"horizon_days must be between 1 and {MONTE_CARLO_MAX_HORIZON}")
+        if not 1 <= paths <= MONTE_CARLO_MAX_PATHS:
+            raise ValueError(f"paths must be between 1 and {MONTE_CARLO_MAX_PATHS}")
+        if not 2 <= lookback_days <= RISK_MAX_LOOKBACK_DAYS:
+            raise ValueError(f"lookback_days must be between 2 and {RISK_MAX_LOOKBACK_DAYS}")
+        if seed is not None and not 0 <= seed <= MAX_SEED:
+            raise ValueError(f"seed must be between 0 and {MAX_SEED}")
+
+        holdings = load_holdings()
+        if not len(holdings):
+            raise ValueError("There are no assets to simulate")
+        lot_rates, rates = fx_service.lot_rates(holdings) if fx_service is not None else (None, {})
+        store.reload()
+        today = date.today()
+        _, exposure, returns, observations = exposure_and_returns(holdings, store, today, lookback_days, lot_rates)
+        start_value = float(exposure.sum())
+        if start_value <= 0:
+            raise ValueError("The portfolio has no value to simulate")
+
+        history = np.log1p(portfolio_pnl(returns, exposure, observations) / start_value)
+        if len(history) < 2:
+            raise ValueError("There is not enough overlapping price history to calibrate on")
+        drift, volatility = float(history.mean()), float(history.std(ddof=1))
+
+        checkpoints = np.unique(np.linspace(1, horizon_days, min(horizon_days, MONTE_CARLO_MAX_POINTS)).round().astype(np.int64))
+        spread = RANGE_SIGMAS * max(volatility, 1e-6) * np.sqrt(checkpoints)
+        low = drift * checkpoints - spread
+        width = 2 * spread / self.bins
+
+        # Unseeded runs draw a seed that is reported back, so any run can be repeated
+        seed = secrets.randbelow(MAX_SEED + 1) if seed is None else seed
+        seed_sequence = np.random.SeedSequence(seed)
+        chunk_sizes = [self.chunk_paths] * (paths // self.chunk_paths)
+        if paths % self.chunk_paths:
+            chunk_sizes.append(paths % self.chunk_paths)
+        params = {'model': model, 'paths': paths, 'horizon_days': horizon_days,
+                  'lookback_days': lookback_days, 'seed': seed, 'as_of': today.isoformat()}
+        if fx_service is not None:
+            params['fx'] = fx_service.describe(rates)
+        job = MonteCarloJob(uuid.uuid4().hex, params, start_value, drift, volatility, checkpoints, low, width,
+                            self.bins, len(chunk_sizes))
+
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            pool = self._pool()
+            for size, chunk_seed in zip(chunk_sizes, seed_sequence.spawn(len(chunk_sizes))):
+                future = pool.submit(simulate_chunk, model, drift, volatility, history, checkpoints,
+                                     low, width, self.bins, size, chunk_seed)
+                job.futures.append(future)
+                future.add_done_callback(partial(self._collect, job))
+            logger.info(f"Monte Carlo job {job.id}: {paths} {model} paths over {horizon_days} days in {len(chunk_sizes)} chunks")
+            return job.to_dict()
+
+    def _collect(self, job: MonteCarloJob, future) -> None:
+        """Merge a finished chunk into its job"""
+        if future.cancelled():
+            return
+        with self._lock:
+            if job.status != 'running':
+                return
+            error = future.exception()
+            if error is not None:
+                logger.error(f"Monte Carlo job {job.id} failed: {error}")
+                self._finish(job, 'failed')
+                job.error = str(error)
+                return
+
+            counts, sums = future.result()
+            job.counts += counts
+            job.sums += sums
+            job.completed += 1
+            if job.completed == job.chunks:
+                job.result = self._result(job)
+                self._finish(job, 'completed')
+
+    def _finish(self, job: MonteCarloJob, status: str) -> None:
+        job.status = status
+        job.finished = time.time()
+        for future in job.futures:
+            future.cancel()
+        job.futures = []
+
+    def _result(self, job: MonteCarloJob) -> Dict[str, Any]:
+        """Percentile bands and mean value per reported day"""
+        start = date.fromisoformat(job.params['as_of'])
+        bands = histogram_percentiles(job.counts, job.low, job.width, MONTE_CARLO_PERCENTILES)
+        return {
+            'start_value': job.start_value,
+            'daily_drift': job.drift,
+            'daily_volatility': job.volatility,
+            'days': job.checkpoints.tolist(),
+            'dates': [(start + timedelta(days=int(day))).isoformat() for day in job.checkpoints],
+            'percentiles': {str(percentile): (job.start_value * np.exp(band)).tolist()
+                            for percentile, band in bands.items()},
+            'mean': (job.start_value * job.sums / job.params['paths']).tolist(),
+        }
+
+    def _prune(self) -> None:
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished is not None and time.time() - job.finished > MONTE_CARLO_JOB_TTL]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's status, progress and (once completed) result"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a running job; finished jobs are returned unchanged"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status == 'running':
+                self._finish(job, 'cancelled')
+                logger.info(f"Monte Carlo job {job.id} cancelled after {job.completed}/{job.chunks} chunks")
+            return job.to_dict()
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until a job is no longer running or the timeout expires"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            job = self._jobs.get(job_id)
+            futures = list(job.futures) if job else []
+        wait(futures, timeout=timeout)
+        # Callbacks run on the pool's management thread just after the futures resolve
+        while job is not None and job.status == 'running' and (deadline is None or time.time() < deadline):
+            time.sleep(0.01)
+        return self.get(job_id)
@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Set
+from backend.utils.logging import logger
+from backend.config.settings import PRICE_CACHE_BACKEND, PRICE_CACHE_PATH
+
+# Cache backends selectable through PRICE_CACHE_BACKEND
+CACHE_BACKEND_MEMORY = 'memory'
+CACHE_BACKEND_SQLITE = 'sqlite'
+
+
+class InMemoryPriceCache(MutableMapping):
+    """
+    Per-process, thread-safe price cache
+    Entries have the format {symbol: {'price': float, 'timestamp': datetime}}.
+    Keys are spread over striped locks so threads touching different symbols
+    do not contend; whole-cache operations take every stripe.
+    """
+    def __init__(self, stripes: int = 16):
+        self._entries = {}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    @contextmanager
+    def _all_locks(self):
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        with self._lock_for(key):
+            return self._entries[key]
+
+    def get(self, key: str, default=None):
+        with self._lock_for(key):
+            return self._entries.get(key, default)
+
+    def __setitem__(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock_for(key):
+            self._entries[key] = entry
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock_for(key):
+            del self._entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._all_locks():
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock_for(key):
+            return key in self._entries
+
+    def clear(self) -> None:
+        with self._all_locks():
+            self._entries.clear()
+
+
+class SQLitePriceCache(MutableMapping):
+    """
+    Price cache stored in a local SQLite file so every worker process on the host shares it
+    Entries have the same format as InMemoryPriceCache; TTL rules stay in PriceService.
+    Fill leases (one row per symbol being fetched) let a worker claim a miss so
+    the other workers wait for its result instead of fetching the symbol too.
+    """
+    def __init__(self, path: str = PRICE_CACHE_PATH):
+        self.path = path
+        self._owner = uuid.uuid4().hex
+        # Connections must not cross threads or forked worker processes
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS price_cache ('
+            'key TEXT PRIMARY KEY, price REAL NOT NULL, timestamp REAL NOT NULL)'
+        )
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS price_fill_lease ('
+            'key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)'
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening a new one after a fork"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        row = self._connection().execute(
+            'SELECT price, timestamp FROM price_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return {'price': row[0], 'timestamp': datetime.fromtimestamp(row[1])}
+
+    def __setitem__(self, key: str, entry: Dict[str, Any]) -> None:
+        self._connection().execute(
+            'INSERT OR REPLACE INTO price_cache (key, price, timestamp) VALUES (?, ?, ?)',
+            (key, float(entry['price']), entry['timestamp'].timestamp())
+        )
+
+    def __delitem__(self, key: str) -> None:
+        cursor = self._connection().execute('DELETE FROM price_cache WHERE key = ?', (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._connection().execute('SELECT key FROM price_cache').fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM price_cache').fetchone()[0]
+
+    def __contains__(self, key: object) -> bool:
+        row = self._connection().execute('SELECT 1 FROM price_cache WHERE key = ?', (key,)).fetchone()
+        return row is not None
+
+    def clear(self) -> None:
+        self._connection().execute('DELETE FROM price_cache')
+
+    def claim_fills(self, keys: List[str], lease_seconds: float) -> List[str]:
+        """
+        Claim the host-wide fetch of each key no other worker holds a live lease on
+        Returns the keys this cache now owns; if the lease table is unavailable every key is owned
+        """
+        now = time.time()
+        connection = self._connection()
+        claimed = []
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('DELETE FROM price_fill_lease WHERE expires <= ?', (now,))
+                for key in keys:
+                    cursor = connection.execute(
+                        'INSERT OR IGNORE INTO price_fill_lease (key, owner, expires) VALUES (?, ?, ?)',
+                        (key, self._owner, now + lease_seconds)
+                    )
+                    if cursor.rowcount:
+                        claimed.append(key)
+                connection.execute('COMMIT')
+            except sqlite3.Error:
+                connection.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Could not claim shared price fetches, fetching without coordination: {e}")
+            return list(keys)
+        return claimed
+
+    def release_fills(self, keys: List[str]) -> None:
+        """Drop this cache's leases on keys once their fetch has finished (or failed)"""
+        try:
+            self._connection().executemany(
+                'DELETE FROM price_fill_lease WHERE key = ? AND owner = ?', [(key, self._owner) for key in keys]
+            )
+        except sqlite3.Error as e:
+            # Leases expire on their own
+            logger.warning(f"Could not release shared price fetches: {e}")
+
+    def pending_fills(self, keys: List[str]) -> Set[str]:
+        """Keys some worker currently holds a live lease on"""
+        if not keys:
+            return set()
+        placeholders = ','.join('?' * len(keys))
+        try:
+            rows = self._connection().execute(
+                f'SELECT key FROM price_fill_lease WHERE expires > ? AND key IN ({placeholders})', (time.time(), *keys)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read shared price fetches: {e}")
+            return set()
+        return {row[0] for row in rows}
+
+
+def create_price_cache(backend: str = PRICE_CACHE_BACKEND, path: str = PRICE_CACHE_PATH) -> MutableMapping:
+    """Build the price cache configured by PRICE_CACHE_BACKEND"""
+    if backend == CACHE_BACKEND_SQLITE:
+        try:
+            return SQLitePriceCache(path)
+        except sqlite3.Error as e:
+            logger.error(f"Could not open shared price cache at {path}, using in-memory cache: {e}")
+    elif backend != CACHE_BACKEND_MEMORY:
+        logger.warning(f"Unknown price cache backend '{backend}', using in-memory cache")
+    return InMemoryPriceCache()
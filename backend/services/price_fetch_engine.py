@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Tuple
+from backend.utils.logging import logger
+
+# Provider names used as keys for budgets and jobs
+PROVIDER_COINGECKO = 'coingecko'
+PROVIDER_YAHOO = 'yahoo'
+
+PriceJob = Callable[[], Dict[str, float]]
+
+# Deadline (time.monotonic()) of the job running on the current worker thread
+_job_deadline = threading.local()
+
+
+def remaining_budget(default: float) -> float:
+    """
+    Seconds the current job may still wait (e.g. for a rate-limit token): default,
+    capped by the deadline of the fetch engine job running on this thread
+    """
+    deadline = getattr(_job_deadline, 'value', None)
+    if deadline is None:
+        return default
+    return max(min(default, deadline - time.monotonic()), 0.0)
+
+
+class PriceFetchEngine:
+    """
+    Runs price lookups for several providers at the same time
+    Every provider has its own bounded worker pool and timeout budget. Jobs that
+    miss their provider's deadline keep running in the background (so they still
+    fill the price cache) but are left out of the returned result. Rate-limit
+    waits inside a job are capped by its deadline (see remaining_budget), and
+    jobs still queued when the deadline passes are cancelled, so a backlog
+    cannot build up behind a slow provider.
+    """
+    def __init__(self, budgets: Dict[str, Tuple[int, float]]):
+        # Format: {provider: (max_workers, timeout_seconds)}
+        self.budgets = budgets
+        self._executors = {
+            provider: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"price-{provider}")
+            for provider, (max_workers, _) in budgets.items()
+        }
+
+    def run(self, jobs: Dict[str, List[PriceJob]]) -> Dict[str, Dict[str, float]]:
+        """
+        Submit all jobs and collect what finishes within each provider's budget
+        Returns {provider: merged job results}
+        """
+        started = time.monotonic()
+        submitted = [
+            (provider, self._executors[provider].submit(self._run_job, job, started + self.budgets[provider][1]))
+            for provider, provider_jobs in jobs.items()
+            for job in provider_jobs
+        ]
+
+        results = {provider: {} for provider in jobs}
+        for provider, future in submitted:
+            timeout = self.budgets[provider][1]
+            remaining = timeout - (time.monotonic() - started)
+            try:
+                results[provider].update(future.result(timeout=max(remaining, 0)))
+            except FutureTimeoutError:
+                future.cancel()  # Only succeeds while the job is still queued
+                logger.warning(f"{provider} lookup exceeded its {timeout}s budget, returning partial results")
+            except Exception as e:
+                logger.error(f"Unexpected error in {provider} price lookup: {e}")
+
+        return results
+
+    @staticmethod
+    def _run_job(job: PriceJob, deadline: float) -> Dict[str, float]:
+        """Run a job on a worker thread with its deadline visible to remaining_budget"""
+        if time.monotonic() >= deadline:
+            return {}
+        _job_deadline.value = deadline
+        try:
+            return job()
+        finally:
+            _job_deadline.value = None
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release the worker threads"""
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from sqlalchemy import func, select, literal_column
+from backend.models import db, PriceHistory
+from backend.utils.logging import logger
+from backend.config.settings import PRICE_HISTORY_MAX_BUCKETS
+
+# Supported candle intervals: (bucket width, default lookback when no start is given)
+INTERVALS = {
+    '1m': (timedelta(minutes=1), timedelta(days=1)),
+    '1h': (timedelta(hours=1), timedelta(days=30)),
+    '1d': (timedelta(days=1), timedelta(days=365)),
+    '1w': (timedelta(weeks=1), timedelta(days=365 * 5)),
+}
+
+# Bucket start per interval, as SQLite strftime/date expressions and PostgreSQL date_trunc units
+_SQLITE_FORMATS = {'1m': '%Y-%m-%d %H:%M:00', '1h': '%Y-%m-%d %H:00:00', '1d': '%Y-%m-%d 00:00:00'}
+_POSTGRES_UNITS = {'1m': 'minute', '1h': 'hour', '1d': 'day', '1w': 'week'}
+
+
+def _bucket_expression(interval: str):
+    """SQL expression truncating PriceHistory.timestamp to the start of its bucket"""
+    dialect = db.session.get_bind().dialect.name
+    column = PriceHistory.timestamp
+
+    if dialect == 'postgresql':
+        return func.date_trunc(literal_column(f"'{_POSTGRES_UNITS[interval]}'"), column)
+    if dialect == 'sqlite':
+        if interval == '1w':
+            # Weeks start on Monday, as with date_trunc('week')
+            return func.strftime('%Y-%m-%d 00:00:00', column, 'weekday 0', '-6 days')
+        return func.strftime(_SQLITE_FORMATS[interval], column)
+    raise ValueError(f"Price history bucketing is not supported on {dialect}")
+
+
+def _bucket_start(value) -> str:
+    """Normalize a bucket value (datetime or SQLite text) to an ISO timestamp"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.isoformat()
+
+
+def resolve_range(interval: str, start: Optional[datetime], end: Optional[datetime]):
+    """
+    Fill in default bounds for a history query and validate them
+    Returns (start, end); raises ValueError for unknown intervals or ranges
+    that would produce more than PRICE_HISTORY_MAX_BUCKETS candles
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Unsupported interval '{interval}', expected one of {', '.join(INTERVALS)}")
+
+    width, lookback = INTERVALS[interval]
+    end = end or datetime.now()
+    start = start or end - lookback
+    if start >= end:
+        raise ValueError("'from' must be before 'to'")
+    if (end - start) / width > PRICE_HISTORY_MAX_BUCKETS:
+        raise ValueError(f"Range too large for interval '{interval}', use a coarser interval")
+    return start, end
+
+
+def get_ohlc(symbols: List[str], interval: str = '1d',
+             start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Get OHLC candles for one or more symbols, aggregated in the database
+    Rows are selected through idx_symbol_timestamp and bucketed in SQL; open and
+    close are the first and last price in each bucket
+    Returns {symbol: [{'time', 'open', 'high', 'low', 'close', 'count'}, ...]}
+    """
+    start, end = resolve_range(interval, start, end)
+    symbols = list(dict.fromkeys(symbols))
+    result = {symbol: [] for symbol in symbols}
+    if not symbols:
+        return result
+
+    bucket = _bucket_expression(interval).label('bucket')
+    window = {'partition_by': (PriceHistory.symbol, bucket)}
+    ticks = (
+        select(
+            PriceHistory.symbol,
+            bucket,
+            PriceHistory.price,
+            func.first_value(PriceHistory.price).over(order_by=PriceHistory.timestamp.asc(), **window).label('open'),
+            func.first_value(PriceHistory.price).over(order_by=PriceHistory.timestamp.desc(), **window).label('close'),
+        )
+        .where(
+            PriceHistory.symbol.in_(symbols),
+            PriceHistory.timestamp >= start,
+            PriceHistory.timestamp < end,
+        )
+        .subquery()
+    )
+    query = (
+        select(
+            ticks.c.symbol,
+            ticks.c.bucket,
+            func.max(ticks.c.open),
+            func.max(ticks.c.price),
+            func.min(ticks.c.price),
+            func.max(ticks.c.close),
+            func.count(),
+        )
+        .group_by(ticks.c.symbol, ticks.c.bucket)
+        .order_by(ticks.c.symbol, ticks.c.bucket)
+    )
+
+    rows = db.session.execute(query).all()
+    for symbol, bucket_start, open_, high, low, close, count in rows:
+        result[symbol].append({
+            'time': _bucket_start(bucket_start),
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'count': count,
+        })
+
+    logger.debug(f"Built {len(rows)} {interval} candles for {len(symbols)} symbols")
+    return result
@@ -0,0 +1,113 @@
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert
+from backend.models import db, PriceHistory
+from backend.utils.logging import logger
+from backend.config.settings import PRICE_HISTORY_FLUSH_SIZE, PRICE_HISTORY_FLUSH_INTERVAL, PRICE_HISTORY_MAX_BUFFER
+
+
+class PriceHistoryWriter:
+    """
+    Write-behind buffer for the price_history table
+    PriceService records every freshly fetched quote here; a daemon thread
+    flushes the buffer with one bulk INSERT when it reaches flush_size rows or
+    every flush_interval seconds, whichever comes first, so request threads
+    never wait on a commit. Whatever is left is flushed at interpreter exit.
+    """
+    def __init__(self, app, price_store=None,
+                 flush_size: int = PRICE_HISTORY_FLUSH_SIZE,
+                 flush_interval: float = PRICE_HISTORY_FLUSH_INTERVAL,
+                 max_buffer: int = PRICE_HISTORY_MAX_BUFFER):
+        self.app = app
+        # Optional ColumnarPriceStore brought up to date after every flush
+        self.price_store = price_store
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        # Oldest rows are dropped if the database stays unavailable for long
+        self._buffer = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def record(self, symbol: str, asset_type: str, price: float, timestamp: Optional[datetime] = None) -> None:
+        """Queue one quote for persistence; never blocks on the database"""
+        row = {
+            'symbol': symbol,
+            'asset_type': asset_type,
+            'price': float(price),
+            'timestamp': timestamp or datetime.now(),
+        }
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                logger.warning("Price history buffer full, dropping the oldest quote")
+            self._buffer.append(row)
+            if len(self._buffer) >= self.flush_size:
+                self._wake.set()
+
+    def pending(self) -> int:
+        """Number of quotes waiting to be written"""
+        return len(self._buffer)
+
+    def start(self) -> None:
+        """Start the flush loop in a daemon thread and flush the remainder at exit"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='price-history-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"Price history writer started (every {self.flush_interval}s or {self.flush_size} quotes)")
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop the flush loop and write out anything still buffered"""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Price history flush failed: {e}")
+
+    def flush(self) -> int:
+        """
+        Write all buffered quotes with a single bulk INSERT
+        Returns the number of rows written; on failure the rows are put back
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._buffer)
+                self._buffer.clear()
+            if not rows:
+                return 0
+
+            with self.app.app_context():
+                try:
+                    db.session.execute(insert(PriceHistory), rows)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Could not write {len(rows)} price history rows, will retry: {e}")
+                    with self._lock:
+                        self._buffer.extendleft(reversed(rows))
+                    return 0
+
+                if self.price_store is not None:
+                    try:
+                        self.price_store.sync()
+                    except Exception as e:
+                        logger.error(f"Price store sync failed: {e}")
+
+            logger.info(f"Wrote {len(rows)} quotes to price history")
+            return len(rows)
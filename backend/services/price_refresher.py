@@ -0,0 +1,99 @@
+import threading
+from datetime import datetime
+from typing import Dict
+from sqlalchemy import select, bindparam
+from backend.models import db, Asset
+from backend.utils.logging import logger
+from backend.config.settings import PRICE_REFRESH_INTERVAL, PRICE_REFRESH_BATCH_SIZE, PRICE_REFRESH_BATCH_PAUSE
+
+
+class PriceRefresher:
+    """
+    Keeps Asset.last_price and Asset.last_price_updated current in the background
+    Every run collects the distinct symbols held in the asset table, prices them
+    in batches spaced out to stay within provider rate limits, and bulk-updates
+    the two columns so GET /assets can serve valuations straight from the database.
+    With an fx_service, quotes are converted into its base currency (the currency
+    of purchase_price) before they are stored; a quote whose currency has no
+    rate leaves the previous last_price in place.
+    """
+    def __init__(self, app, price_service, fx_service=None,
+                 interval: float = PRICE_REFRESH_INTERVAL,
+                 batch_size: int = PRICE_REFRESH_BATCH_SIZE,
+                 batch_pause: float = PRICE_REFRESH_BATCH_PAUSE):
+        self.app = app
+        self.price_service = price_service
+        self.fx_service = fx_service
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start the refresh loop in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='price-refresher', daemon=True)
+        self._thread.start()
+        logger.info(f"Price refresher started (every {self.interval}s)")
+
+    def stop(self, timeout: float = None) -> None:
+        """Ask the refresh loop to stop and wait for it"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.refresh_once()
+            except Exception as e:
+                logger.error(f"Price refresh failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def refresh_once(self) -> int:
+        """
+        Refresh the last price of every held symbol
+        Returns the number of asset rows updated
+        """
+        with self.app.app_context():
+            holdings = db.session.execute(select(Asset.symbol, Asset.asset_type).distinct()).all()
+            updated = 0
+
+            for start in range(0, len(holdings), self.batch_size):
+                # Space out batches so each one fits in the provider rate limits
+                if start and self._stop_event.wait(self.batch_pause):
+                    break
+                batch = [{'symbol': symbol, 'asset_type': asset_type} for symbol, asset_type in holdings[start:start + self.batch_size]]
+                prices = self.price_service.get_prices_for_assets(batch)
+                if self.fx_service is not None:
+                    quoted = len(prices)
+                    prices = self.fx_service.convert_prices(
+                        prices, {asset['symbol']: asset['asset_type'] for asset in batch})
+                    if len(prices) < quoted:
+                        logger.warning(f"Kept the stored price of {quoted - len(prices)} symbols without an exchange rate")
+                updated += self._store_prices(prices)
+
+            logger.info(f"Price refresh updated {updated} assets across {len(holdings)} symbols")
+            return updated
+
+    def _store_prices(self, prices: Dict[str, float]) -> int:
+        """Bulk-update last_price/last_price_updated for all assets with the given symbols"""
+        if not prices:
+            return 0
+
+        asset_table = Asset.__table__
+        statement = (
+            asset_table.update()
+            .where(asset_table.c.symbol == bindparam('b_symbol'))
+            .values(last_price=bindparam('b_price'), last_price_updated=bindparam('b_updated'))
+        )
+        now = datetime.now()
+        result = db.session.execute(statement, [
+            {'b_symbol': symbol, 'b_price': float(price), 'b_updated': now}
+            for symbol, price in prices.items()
+        ])
+        db.session.commit()
+        return result.rowcount
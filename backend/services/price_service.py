@@ -1,11 +1,27 @@
 import requests
 import yfinance as yf
+import threading
 import time
-from typing import Dict, Any, Optional, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from datetime import datetime, timedelta
 from backend.utils.logging import logger
-from backend.config.settings import COINGECKO_API_URL, REQUEST_TIMEOUT
+from backend.config.settings import (
+    COINGECKO_API_URL, REQUEST_TIMEOUT, COINGECKO_BATCH_SIZE, YAHOO_BATCH_SIZE, ASSET_TYPE_CRYPTO, ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK,
+    PRICE_FETCH_MODE, COINGECKO_MAX_CONCURRENCY, COINGECKO_FETCH_TIMEOUT, YAHOO_MAX_CONCURRENCY, YAHOO_FETCH_TIMEOUT,
+    PRICE_CACHE_STALE_GRACE, COINGECKO_RATE_LIMIT_PER_MINUTE, COINGECKO_RATE_LIMIT_BURST,
+    YAHOO_RATE_LIMIT_PER_MINUTE, YAHOO_RATE_LIMIT_BURST, RATE_LIMIT_MAX_WAIT, PRICE_CACHE_FILL_LEASE, PRICE_CACHE_FILL_POLL
+)
 from backend.services import symbol_service
+from backend.services.price_fetch_engine import PriceFetchEngine, PROVIDER_COINGECKO, PROVIDER_YAHOO, remaining_budget
+from backend.services.price_cache import create_price_cache
+from backend.services.single_flight import SingleFlight
+from backend.services.rate_limiter import TokenBucketRateLimiter, parse_retry_after
+
+# Fetch modes for get_prices_for_assets
+FETCH_MODE_CONCURRENT = 'concurrent'
+FETCH_MODE_SERIAL = 'serial'
 
 class PriceService:
     """
@@ -13,104 +29,333 @@ class PriceService:
     Supports Indian stocks, US stocks, and cryptocurrencies
     Implements advanced caching to reduce API calls with rate limiting awareness
     """
-    def __init__(self):
+    def __init__(self, fetch_mode: str = PRICE_FETCH_MODE, price_cache=None, stale_grace: float = PRICE_CACHE_STALE_GRACE,
+                 coingecko_limiter: Optional[TokenBucketRateLimiter] = None,
+                 yahoo_limiter: Optional[TokenBucketRateLimiter] = None,
+                 history_writer=None):
         # Cache to store prices with a 15-minute expiry for crypto (to reduce API calls)
-        # and 5-minute expiry for stocks
-        self.price_cache = {}  # Format: {symbol: {price: float, timestamp: datetime}}
+        # and 5-minute expiry for stocks. The backend (in-memory or shared SQLite)
+        # comes from PRICE_CACHE_BACKEND unless one is passed in
+        # Format: {symbol: {price: float, timestamp: datetime}}
+        self.price_cache = price_cache if price_cache is not None else create_price_cache()
         self.stock_cache_duration = timedelta(minutes=5)
         self.crypto_cache_duration = timedelta(minutes=15)
         
-        # Rate limiting parameters for CoinGecko
-        self.last_coingecko_request = datetime.now() - timedelta(seconds=10)  # Initialize with a past time
-        self.coingecko_request_limit = 10  # requests per minute (conservative for free API)
-        self.coingecko_min_request_interval = 60 / self.coingecko_request_limit  # seconds between requests
+        # Stale-while-revalidate: within this window past the TTL an expired price is
+        # returned immediately and refreshed in the background
+        self.stale_grace = timedelta(seconds=stale_grace)
+        self._revalidate_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='price-revalidate')
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
         
-        # Flag to indicate if we're experiencing rate limiting
-        self.coingecko_rate_limited = False
-        self.rate_limit_reset_time = None
-    
-    def _is_cache_valid(self, symbol: str, is_crypto: bool = False) -> bool:
-        """Check if the cached price for a symbol is still valid"""
-        if symbol not in self.price_cache:
-            return False
+        # Concurrent misses for the same symbol share one upstream request
+        self._stock_flight = SingleFlight()
+        self._crypto_flight = SingleFlight()
+        
+        # Token buckets shared by every thread (and the async service) calling each provider
+        self.coingecko_limiter = coingecko_limiter or TokenBucketRateLimiter(
+            'CoinGecko', COINGECKO_RATE_LIMIT_PER_MINUTE, burst=COINGECKO_RATE_LIMIT_BURST)
+        self.yahoo_limiter = yahoo_limiter or TokenBucketRateLimiter(
+            'Yahoo Finance', YAHOO_RATE_LIMIT_PER_MINUTE, burst=YAHOO_RATE_LIMIT_BURST)
         
-        cache_time = self.price_cache[symbol]['timestamp']
+        # Optional PriceHistoryWriter that persists every fresh upstream quote
+        self.history_writer = history_writer
+        
+        # 'concurrent' fans out to both providers at once; 'serial' is the fallback
+        if fetch_mode not in (FETCH_MODE_CONCURRENT, FETCH_MODE_SERIAL):
+            logger.warning(f"Unknown price fetch mode '{fetch_mode}', falling back to '{FETCH_MODE_SERIAL}'")
+            fetch_mode = FETCH_MODE_SERIAL
+        self.fetch_mode = fetch_mode
+        self.fetch_engine = None
+        if fetch_mode == FETCH_MODE_CONCURRENT:
+            self.fetch_engine = PriceFetchEngine({
+                PROVIDER_COINGECKO: (COINGECKO_MAX_CONCURRENCY, COINGECKO_FETCH_TIMEOUT),
+                PROVIDER_YAHOO: (YAHOO_MAX_CONCURRENCY, YAHOO_FETCH_TIMEOUT),
+            })
+    
+    @property
+    def coingecko_rate_limited(self) -> bool:
+        """True while CoinGecko has asked us to back off"""
+        return self.coingecko_limiter.is_backing_off
+    
+    def _cache_duration(self, is_crypto: bool = False) -> timedelta:
+        """TTL for a cached price"""
         duration = self.crypto_cache_duration if is_crypto else self.stock_cache_duration
         
         # If we're rate limited by CoinGecko, extend crypto cache validity
         if is_crypto and self.coingecko_rate_limited:
             # Double the cache duration during rate limiting
             duration = duration * 2
+        
+        return duration
+    
+    def _is_cache_valid(self, symbol: str, is_crypto: bool = False) -> bool:
+        """Check if the cached price for a symbol is still valid"""
+        return self._valid_cached_price(symbol, is_crypto) is not None
+    
+    def _valid_cached_price(self, symbol: str, is_crypto: bool = False) -> Optional[float]:
+        """Return the cached price for a symbol if it has not expired"""
+        # Entries are replaced as a whole, never mutated, so one read is consistent
+        entry = self.price_cache.get(symbol)
+        if entry is None or datetime.now() - entry['timestamp'] >= self._cache_duration(is_crypto):
+            return None
+        return entry['price']
+    
+    def _split_by_cache(self, symbols: List[str], is_crypto: bool = False) -> Tuple[Dict[str, float], List[str], List[str]]:
+        """
+        Sort symbols into cache hits, stale hits and misses
+        Stale hits are expired but still inside the stale-while-revalidate grace
+        window; their prices are included in the returned prices
+        Returns (prices, stale_symbols, missing_symbols)
+        """
+        prices = {}
+        stale = []
+        missing = []
+        duration = self._cache_duration(is_crypto)
+        now = datetime.now()
+        
+        for symbol in symbols:
+            entry = self.price_cache.get(symbol)
+            if entry is None:
+                missing.append(symbol)
+                continue
             
-        return datetime.now() - cache_time < duration
+            age = now - entry['timestamp']
+            if age < duration:
+                prices[symbol] = entry['price']
+            elif age < duration + self.stale_grace:
+                prices[symbol] = entry['price']
+                stale.append(symbol)
+            else:
+                missing.append(symbol)
+        
+        return prices, stale, missing
+    
+    def _revalidate_in_background(self, symbols: List[str], fetch) -> None:
+        """Refresh stale symbols off the request path, at most one refresh per symbol at a time"""
+        with self._revalidating_lock:
+            symbols = [symbol for symbol in symbols if symbol not in self._revalidating]
+            self._revalidating.update(symbols)
+        if not symbols:
+            return
+        
+        def revalidate():
+            try:
+                fetch(symbols)
+            except Exception as e:
+                logger.error(f"Background refresh failed for {', '.join(symbols)}: {e}")
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.difference_update(symbols)
+        
+        logger.info(f"Serving stale prices and refreshing in background: {', '.join(symbols)}")
+        self._revalidate_executor.submit(revalidate)
+    
+    def _record_history(self, prices: Dict[str, float], timestamp: datetime, is_crypto: bool = False) -> None:
+        """
+        Hand freshly fetched prices to the write-behind history buffer
+        Crypto quotes are keyed by CoinGecko ID and recorded under the coin's symbol
+        """
+        if self.history_writer is None:
+            return
+        crypto_index = symbol_service.get_crypto_id_index() if is_crypto else None
+        for key, price in prices.items():
+            if is_crypto:
+                symbol, asset_type = crypto_index.symbol_of(key), ASSET_TYPE_CRYPTO
+            else:
+                symbol = key
+                asset_type = ASSET_TYPE_INDIAN_STOCK if key.upper().endswith('.NS') else ASSET_TYPE_US_STOCK
+            self.history_writer.record(symbol, asset_type, price, timestamp)
     
     def get_stock_price(self, symbol: str) -> Optional[float]:
         """
         Get current stock price using Yahoo Finance API
         Works for both US and Indian stocks
         """
-        # Check cache first
-        if self._is_cache_valid(symbol):
-            return self.price_cache[symbol]['price']
+        return self.get_stock_prices([symbol]).get(symbol)
+    
+    def get_stock_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Get current prices for several stocks at once
+        US and Indian (.NS) tickers missing from the cache are fetched together
+        with a single multi-symbol Yahoo Finance download
+        Returns a dictionary mapping symbols to prices
+        """
+        result, stale, missing = self._split_by_cache(list(dict.fromkeys(symbols)))
+        
+        if stale:
+            self._revalidate_in_background(stale, self._refresh_stocks)
+        if missing:
+            result.update(self._refresh_stocks(missing))
+        
+        return result
+    
+    def _refresh_stocks(self, symbols: List[str]) -> Dict[str, float]:
+        """Fetch stock prices upstream, coalescing with lookups already in flight"""
+        return self._stock_flight.fetch(symbols, self._fetch_stock_misses)
+    
+    def _fetch_stock_misses(self, symbols: List[str]) -> Dict[str, float]:
+        """Re-check the cache (another flight may have just filled it) and download the rest"""
+        result = {}
+        missing = []
+        for symbol in symbols:
+            price = self._valid_cached_price(symbol)
+            if price is not None:
+                result[symbol] = price
+            else:
+                missing.append(symbol)
+        if missing:
+            result.update(self._fetch_host_wide(missing, self._fetch_stock_batch))
+        return result
+    
+    def _claim_host_fills(self, keys: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Split keys into ones this worker fetches and ones another worker on the host is already fetching
+        Only the shared SQLite cache coordinates workers; with a per-process cache every key is ours
+        """
+        if not hasattr(self.price_cache, 'claim_fills'):
+            return list(keys), []
+        owned = self.price_cache.claim_fills(keys, PRICE_CACHE_FILL_LEASE)
+        claimed = set(owned)
+        return owned, [key for key in keys if key not in claimed]
+    
+    def _release_host_fills(self, keys: List[str]) -> None:
+        if keys and hasattr(self.price_cache, 'release_fills'):
+            self.price_cache.release_fills(keys)
+    
+    def _wait_for_host_fills(self, keys: List[str], is_crypto: bool = False) -> Tuple[Dict[str, float], List[str]]:
+        """
+        Wait for other workers' fetches of keys to land in the shared cache
+        Stops when their leases are gone or the fetch budget runs out; returns (prices, keys still missing)
+        """
+        deadline = time.monotonic() + remaining_budget(PRICE_CACHE_FILL_LEASE)
+        result = {}
+        pending = list(keys)
+        while True:
+            pending = self._poll_host_fills(pending, result, is_crypto)
+            if not pending or time.monotonic() >= deadline or not self.price_cache.pending_fills(pending):
+                return result, pending
+            time.sleep(PRICE_CACHE_FILL_POLL)
+    
+    def _poll_host_fills(self, pending: List[str], result: Dict[str, float], is_crypto: bool = False) -> List[str]:
+        """Move keys that have landed in the shared cache into result; returns the keys still missing"""
+        for key in pending:
+            price = self._valid_cached_price(key, is_crypto)
+            if price is not None:
+                result[key] = price
+        return [key for key in pending if key not in result]
+    
+    def _fetch_host_wide(self, keys: List[str], fetch: Callable[[List[str]], Dict[str, float]],
+                         is_crypto: bool = False) -> Dict[str, float]:
+        """Fetch keys upstream unless another worker on the host is already fetching them"""
+        owned, others = self._claim_host_fills(keys)
+        result = {}
+        try:
+            if owned:
+                result.update(fetch(owned))
+        finally:
+            self._release_host_fills(owned)
+        if others:
+            waited, leftover = self._wait_for_host_fills(others, is_crypto)
+            result.update(waited)
+            if leftover:
+                # The other worker failed or ran out of time; fetch them here
+                result.update(fetch(leftover))
+        return result
+    
+    def _fetch_stock_batch(self, symbols: List[str]) -> Dict[str, float]:
+        """Fetch the latest close for all given tickers with one yf.download call"""
+        if not self.yahoo_limiter.acquire(timeout=remaining_budget(RATE_LIMIT_MAX_WAIT)):
+            logger.warning("Skipping Yahoo Finance request due to rate limiting")
+            return self._expired_cache_fallback(symbols)
         
         try:
-            logger.info(f"Fetching stock price for {symbol}")
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period="1d")
-            
-            if not data.empty:
-                # Get most recent closing price
-                price = data['Close'].iloc[-1]
-                
-                # Update cache
-                self.price_cache[symbol] = {
-                    'price': price,
-                    'timestamp': datetime.now()
-                }
-                
-                return price
+            logger.info(f"Fetching stock prices for {len(symbols)} symbols: {', '.join(symbols)}")
+            data = yf.download(
+                tickers=symbols,
+                period="1d",
+                group_by='ticker',
+                auto_adjust=True,
+                progress=False,
+                timeout=REQUEST_TIMEOUT
+            )
+        except Exception as e:
+            # yfinance raises YFRateLimitError when Yahoo answers with HTTP 429
+            if type(e).__name__ == 'YFRateLimitError':
+                self.yahoo_limiter.penalize()
+                return self._expired_cache_fallback(symbols)
+            logger.error(f"Error fetching stock prices for {', '.join(symbols)}: {e}")
+            return {}
+        
+        result = {}
+        now = datetime.now()
+        for symbol in symbols:
+            price = self._last_close(data, symbol, single=len(symbols) == 1)
+            if price is None:
+                logger.warning(f"No price data found for stock {symbol}")
+                continue
             
-            logger.warning(f"No price data found for stock {symbol}")
+            # Update cache
+            self.price_cache[symbol] = {
+                'price': price,
+                'timestamp': now
+            }
+            result[symbol] = price
+        
+        self._record_history(result, now)
+        return result
+    
+    @staticmethod
+    def _last_close(data, symbol: str, single: bool = False) -> Optional[float]:
+        """Extract the most recent closing price for a ticker from a yf.download frame"""
+        if data is None or data.empty:
             return None
-            
-        except Exception as e:
-            logger.error(f"Error fetching stock price for {symbol}: {e}")
+        
+        if data.columns.nlevels > 1:
+            # Grouped by ticker: columns are (ticker, field)
+            if symbol not in data.columns.get_level_values(0):
+                return None
+            frame = data[symbol]
+        elif single:
+            # Older yfinance versions return flat columns for a single ticker
+            frame = data
+        else:
+            return None
+        
+        if 'Close' not in frame:
+            return None
+        closes = frame['Close'].dropna()
+        if closes.empty:
             return None
+        return float(closes.iloc[-1])
     
-    def _manage_coingecko_rate_limiting(self) -> Tuple[bool, Optional[str]]:
+    def _manage_coingecko_rate_limiting(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[str]]:
         """Manage CoinGecko API rate limiting
+        Waits in line for a token for at most timeout seconds (default RATE_LIMIT_MAX_WAIT,
+        capped by the remaining fetch budget)
         Returns a tuple of (can_proceed, error_message)
         """
-        now = datetime.now()
-        
-        # If we know we're rate limited and the reset time hasn't passed yet
-        if self.coingecko_rate_limited and self.rate_limit_reset_time and now < self.rate_limit_reset_time:
-            time_to_wait = (self.rate_limit_reset_time - now).total_seconds()
-            return False, f"Rate limited. Try again in {int(time_to_wait)} seconds."
-        
-        # Reset rate limited flag if needed
-        if self.coingecko_rate_limited and self.rate_limit_reset_time and now >= self.rate_limit_reset_time:
-            logger.info("CoinGecko rate limit period has passed, resetting rate limit flag")
-            self.coingecko_rate_limited = False
-            self.rate_limit_reset_time = None
-        
-        # Calculate time since last request to enforce minimum interval
-        time_since_last_request = (now - self.last_coingecko_request).total_seconds()
-        
-        # If we need to wait, return False with message
-        if time_since_last_request < self.coingecko_min_request_interval:
-            wait_time = self.coingecko_min_request_interval - time_since_last_request
-            # For short waits (< 1 second), just wait instead of returning error
-            if wait_time < 1.0:
-                time.sleep(wait_time)
-                self.last_coingecko_request = datetime.now()
-                return True, None
-            return False, f"Too many requests. Try again in {int(wait_time)} seconds."
-        
-        # Update last request time and allow the request
-        self.last_coingecko_request = now
-        return True, None
-            
+        if timeout is None:
+            timeout = remaining_budget(RATE_LIMIT_MAX_WAIT)
+        if self.coingecko_limiter.acquire(timeout=timeout):
+            return True, None
+        if self.coingecko_rate_limited:
+            return False, "Rate limited by CoinGecko, backing off."
+        return False, f"Too many requests. No request slot within {int(timeout)} seconds."
+
+    def _mark_coingecko_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Record that CoinGecko answered with HTTP 429, honouring Retry-After when given"""
+        self.coingecko_limiter.penalize(retry_after)
+
+    def _expired_cache_fallback(self, symbol_ids: List[str]) -> Dict[str, float]:
+        """Return cached prices for the given IDs even if they have expired"""
+        result = {}
+        for symbol_id in symbol_ids:
+            if symbol_id in self.price_cache:
+                logger.info(f"Using expired cache for {symbol_id} due to rate limiting")
+                result[symbol_id] = self.price_cache[symbol_id]['price']
+        return result
+
     def get_crypto_price(self, symbol_id: str) -> Optional[float]:
         """
         Get current cryptocurrency price using CoinGecko API
@@ -125,29 +370,66 @@ class PriceService:
             # Try to find the CoinGecko ID for this symbol
             symbol_id = self._find_crypto_id_by_symbol(base_symbol)
             if not symbol_id:
-                logger.error(f"Could not find CoinGecko ID for symbol: {base_symbol}")
                 return None
         
-        # Check cache first with crypto flag set to true
-        if self._is_cache_valid(symbol_id, is_crypto=True):
-            logger.info(f"Using cached price for {symbol_id}")
-            return self.price_cache[symbol_id]['price']
+        return self.get_crypto_prices([symbol_id]).get(symbol_id)
+
+    def get_crypto_prices(self, symbol_ids: List[str]) -> Dict[str, float]:
+        """
+        Get current prices for several CoinGecko IDs at once
+        Cached IDs are served from the cache; the rest are fetched with
+        comma-separated `ids=` requests of at most COINGECKO_BATCH_SIZE IDs
+        Returns a dictionary mapping CoinGecko IDs to prices
+        """
+        # De-duplicate while keeping the caller's order
+        unique_ids = list(dict.fromkeys(symbol_id.lower() for symbol_id in symbol_ids))
+        result, stale, missing = self._split_by_cache(unique_ids, is_crypto=True)
+        
+        if stale:
+            self._revalidate_in_background(stale, self._refresh_crypto)
+        if missing:
+            result.update(self._refresh_crypto(missing))
         
+        return result
+    
+    def _refresh_crypto(self, symbol_ids: List[str]) -> Dict[str, float]:
+        """Fetch crypto prices upstream, coalescing with lookups already in flight"""
+        return self._crypto_flight.fetch(symbol_ids, self._fetch_crypto_misses)
+    
+    def _fetch_crypto_misses(self, symbol_ids: List[str]) -> Dict[str, float]:
+        """Re-check the cache (another flight may have just filled it) and fetch the rest"""
+        result = {}
+        missing = []
+        for symbol_id in symbol_ids:
+            price = self._valid_cached_price(symbol_id, is_crypto=True)
+            if price is not None:
+                result[symbol_id] = price
+            else:
+                missing.append(symbol_id)
+        if missing:
+            result.update(self._fetch_host_wide(missing, self._fetch_crypto_ids, is_crypto=True))
+        return result
+    
+    def _fetch_crypto_ids(self, symbol_ids: List[str]) -> Dict[str, float]:
+        """Fetch CoinGecko IDs upstream in chunks of COINGECKO_BATCH_SIZE"""
+        result = {}
+        for start in range(0, len(symbol_ids), COINGECKO_BATCH_SIZE):
+            result.update(self._fetch_crypto_batch(symbol_ids[start:start + COINGECKO_BATCH_SIZE]))
+        return result
+    
+    def _fetch_crypto_batch(self, symbol_ids: List[str]) -> Dict[str, float]:
+        """Fetch one chunk of CoinGecko IDs with a single /simple/price request"""
         # Check if we can proceed with the API request (rate limiting)
         can_proceed, error_message = self._manage_coingecko_rate_limiting()
         if not can_proceed:
             logger.warning(f"Skipping CoinGecko request due to rate limiting: {error_message}")
-            # Return cached value even if expired rather than nothing
-            if symbol_id in self.price_cache:
-                logger.info(f"Using expired cache for {symbol_id} due to rate limiting")
-                return self.price_cache[symbol_id]['price']
-            return None
+            # Return cached values even if expired rather than nothing
+            return self._expired_cache_fallback(symbol_ids)
         
         try:
-            logger.info(f"Fetching crypto price for {symbol_id}")
+            logger.info(f"Fetching crypto prices for {len(symbol_ids)} ids: {', '.join(symbol_ids)}")
             
-            # First try with simple/price endpoint
-            params = {'ids': symbol_id, 'vs_currencies': 'usd'}
+            params = {'ids': ','.join(symbol_ids), 'vs_currencies': 'usd'}
             
             response = requests.get(
                 f"{COINGECKO_API_URL}/simple/price", 
@@ -157,139 +439,49 @@ class PriceService:
             
             # Check if we hit rate limits
             if response.status_code == 429:
-                logger.warning("CoinGecko rate limit reached")
-                self.coingecko_rate_limited = True
-                # Set a reset time 60 seconds from now (typical for CoinGecko)
-                self.rate_limit_reset_time = datetime.now() + timedelta(seconds=60)
-                
-                # Return cached value even if expired
-                if symbol_id in self.price_cache:
-                    logger.info(f"Using expired cache for {symbol_id} due to rate limiting")
-                    return self.price_cache[symbol_id]['price']
-                return None
+                self._mark_coingecko_rate_limited(parse_retry_after(response.headers.get('Retry-After')))
+                return self._expired_cache_fallback(symbol_ids)
             
             response.raise_for_status()
             
-            data = response.json()
-            if data and symbol_id in data and 'usd' in data[symbol_id]:
-                price = data[symbol_id]['usd']
+            data = response.json() or {}
+            result = {}
+            now = datetime.now()
+            for symbol_id in symbol_ids:
+                price = data.get(symbol_id, {}).get('usd')
+                if price is None:
+                    logger.warning(f"No price data found for crypto {symbol_id}")
+                    continue
                 
                 # Update cache
-                if price is not None:
-                    self.price_cache[symbol_id] = {
-                        'price': price,
-                        'timestamp': datetime.now()
-                    }
-                    
-                return price
+                self.price_cache[symbol_id] = {
+                    'price': price,
+                    'timestamp': now
+                }
+                result[symbol_id] = price
             
-            logger.warning(f"No price data found for crypto {symbol_id}")
-            return None
+            self._record_history(result, now, is_crypto=True)
+            return result
             
         except requests.exceptions.RequestException as e:
             # Handle rate limiting explicitly
-            if hasattr(e, 'response') and e.response and e.response.status_code == 429:
-                logger.warning("CoinGecko rate limit reached (from exception)")
-                self.coingecko_rate_limited = True
-                self.rate_limit_reset_time = datetime.now() + timedelta(seconds=60)
-                
-                # Return cached value even if expired
-                if symbol_id in self.price_cache:
-                    logger.info(f"Using expired cache for {symbol_id} due to rate limiting")
-                    return self.price_cache[symbol_id]['price']
+            if getattr(e, 'response', None) is not None and e.response.status_code == 429:
+                self._mark_coingecko_rate_limited(parse_retry_after(e.response.headers.get('Retry-After')))
+                return self._expired_cache_fallback(symbol_ids)
             
-            logger.error(f"Error fetching crypto price for {symbol_id}: {e}")
-            return None
+            logger.error(f"Error fetching crypto prices for {', '.join(symbol_ids)}: {e}")
+            return {}
         except Exception as e:
-            logger.error(f"Unexpected error fetching crypto price for {symbol_id}: {e}")
-            return None
+            logger.error(f"Unexpected error fetching crypto prices for {', '.join(symbol_ids)}: {e}")
+            return {}
     
     def _find_crypto_id_by_symbol(self, symbol: str) -> Optional[str]:
         """
         Find the CoinGecko ID for a given crypto symbol.
         Symbol can be either the CoinGecko ID, symbol (e.g., 'btc'), or name (e.g., 'bitcoin')
+        Resolved through the symbol service's memoized index, so repeat lookups are one dict hit
         """
-        logger.info(f"Looking up CoinGecko ID for symbol: {symbol}")
-        
-        # Get the list of crypto symbols from the symbol service
-        crypto_symbols = symbol_service.get_crypto_symbols()
-        
-        if not crypto_symbols:
-            logger.error("No crypto symbols loaded from symbol service!")
-            return None
-            
-        logger.info(f"Loaded {len(crypto_symbols)} crypto symbols from symbol service")
-        
-        # First try exact match on symbol (case-insensitive)
-        for coin in crypto_symbols:
-            if 'symbol' not in coin or 'id' not in coin or 'name' not in coin:
-                logger.warning(f"Malformed coin data: {coin}")
-                continue
-                
-            if coin['symbol'].lower() == symbol.lower() or \
-               coin['id'].lower() == symbol.lower() or \
-               coin['name'].lower() == symbol.lower():
-                logger.info(f"Found exact match for {symbol}: {coin['id']}")
-                return coin['id']
-                
-        # If no exact match, try partial match on name or symbol
-        for coin in crypto_symbols:
-            if 'symbol' not in coin or 'id' not in coin or 'name' not in coin:
-                continue
-                
-            if symbol.lower() in coin['symbol'].lower() or \
-               symbol.lower() in coin['name'].lower() or \
-               symbol.lower() in coin['id'].lower():
-                logger.info(f"Found partial match for {symbol}: {coin['id']}")
-                return coin['id']
-        
-        # Log the first few symbols for debugging
-        sample_symbols = [f"{c.get('id', '?')} ({c.get('symbol', '?')})" for c in crypto_symbols[:5]]
-        logger.warning(f"Could not find CoinGecko ID for symbol: {symbol}")
-        logger.warning(f"Sample of available symbols: {', '.join(sample_symbols)}...")
-        
-        return None
-        
-        # Normalize the input symbol (uppercase for comparison)
-        symbol = symbol.upper()
-        
-        # Look for an exact match on the symbol
-        for crypto in crypto_symbols:
-            if crypto['symbol'] == symbol:
-                logger.info(f"Found CoinGecko ID for {symbol}: {crypto['id']}")
-                return crypto['id']
-        
-        # If no exact match, try a case-insensitive search
-        for crypto in crypto_symbols:
-            if crypto['symbol'].upper() == symbol:
-                logger.info(f"Found CoinGecko ID for {symbol}: {crypto['id']}")
-                return crypto['id']
-                
-        # If still no match, try common symbol mappings
-        symbol_mappings = {
-            'BTC': 'bitcoin',
-            'ETH': 'ethereum',
-            'USDT': 'tether',
-            'BNB': 'binancecoin',
-            'XRP': 'ripple',
-            'ADA': 'cardano',
-            'SOL': 'solana',
-            'DOT': 'polkadot',
-            'DOGE': 'dogecoin',
-            'AVAX': 'avalanche-2',
-            'MATIC': 'matic-network',  # Polygon
-            'LINK': 'chainlink',
-            'UNI': 'uniswap',
-            'SHIB': 'shiba-inu',
-            'LTC': 'litecoin'
-        }
-        
-        if symbol in symbol_mappings:
-            logger.info(f"Found CoinGecko ID for {symbol} in hardcoded mappings: {symbol_mappings[symbol]}")
-            return symbol_mappings[symbol]
-        
-        logger.warning(f"Could not find CoinGecko ID for crypto symbol: {symbol}")
-        return None
+        return symbol_service.get_crypto_id_index().resolve(symbol)
     
     def get_price_for_asset(self, asset: Dict[str, Any]) -> Optional[float]:
         """Get current price for a single asset based on its type"""
@@ -304,32 +496,81 @@ class PriceService:
             # Find the CoinGecko ID for this crypto symbol
             crypto_id = self._find_crypto_id_by_symbol(symbol)
             if not crypto_id:
-                logger.error(f"Could not find CoinGecko ID for symbol: {symbol}")
                 return None
                 
             return self.get_crypto_price(crypto_id)
         else:  # 'Indian Stock' or 'US Stock'
             return self.get_stock_price(symbol)
     
+    def _partition_assets(self, assets: List[Dict[str, Any]]) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Split assets into crypto and stock lookups
+        Returns ({symbol: coingecko_id}, [stock symbols]); unresolvable crypto symbols are dropped
+        """
+        crypto_ids = {}
+        stock_symbols = []
+        
+        for asset in assets:
+            symbol = asset.get('symbol')
+            asset_type = asset.get('asset_type')
+            if not symbol or not asset_type:
+                continue
+            
+            if asset_type == ASSET_TYPE_CRYPTO:
+                if symbol in crypto_ids:
+                    continue
+                crypto_id = self._find_crypto_id_by_symbol(symbol)
+                if not crypto_id:
+                    continue
+                crypto_ids[symbol] = crypto_id
+            elif symbol not in stock_symbols:
+                stock_symbols.append(symbol)
+        
+        return crypto_ids, stock_symbols
+    
     def get_prices_for_assets(self, assets: List[Dict[str, Any]]) -> Dict[str, float]:
         """
         Get current prices for a list of assets
+        All crypto symbols are resolved first and priced with batched CoinGecko calls,
+        and all stocks are priced with multi-symbol Yahoo Finance downloads
         Returns a dictionary mapping symbols to prices
         """
         result = {}
+        crypto_ids, stock_symbols = self._partition_assets(assets)
+        unique_crypto_ids = list(dict.fromkeys(crypto_ids.values()))
         
-        for asset in assets:
-            symbol = asset.get('symbol')
-            if not symbol:
-                continue
-                
-            price = self.get_price_for_asset(asset)
-            if price is not None:
-                result[symbol] = price
+        if self.fetch_mode == FETCH_MODE_CONCURRENT:
+            crypto_prices, stock_prices = self._fetch_concurrently(unique_crypto_ids, stock_symbols)
+        else:
+            crypto_prices = self.get_crypto_prices(unique_crypto_ids)
+            stock_prices = self.get_stock_prices(stock_symbols)
+        
+        for symbol, crypto_id in crypto_ids.items():
+            if crypto_id in crypto_prices:
+                result[symbol] = crypto_prices[crypto_id]
+        result.update(stock_prices)
                 
         return result
     
+    def _fetch_concurrently(self, crypto_ids: List[str], stock_symbols: List[str]) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """
+        Run the CoinGecko and Yahoo lookups in parallel through the fetch engine
+        Lookups that miss their provider's deadline are omitted (partial results)
+        """
+        jobs = {
+            PROVIDER_COINGECKO: [
+                partial(self.get_crypto_prices, crypto_ids[start:start + COINGECKO_BATCH_SIZE])
+                for start in range(0, len(crypto_ids), COINGECKO_BATCH_SIZE)
+            ],
+            PROVIDER_YAHOO: [
+                partial(self.get_stock_prices, stock_symbols[start:start + YAHOO_BATCH_SIZE])
+                for start in range(0, len(stock_symbols), YAHOO_BATCH_SIZE)
+            ],
+        }
+        results = self.fetch_engine.run(jobs)
+        return results[PROVIDER_COINGECKO], results[PROVIDER_YAHOO]
+    
     def clear_cache(self) -> None:
         """Clear the price cache completely"""
-        self.price_cache = {}
+        self.price_cache.clear()
         logger.info("Price cache cleared")
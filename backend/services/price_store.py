@@ -0,0 +1,241 @@
+import fcntl
+import json
+import os
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+from backend.models import db, PriceHistory
+from backend.utils.logging import logger
+from backend.config.settings import PRICE_STORE_DIR
+
+INDEX_FILE = 'index.json'
+LOCK_FILE = 'sync.lock'
+SERIES_DIR = 'series'
+TIMESTAMP_DTYPE = 'datetime64[s]'
+
+_EMPTY_TIMESTAMPS = np.empty(0, dtype=TIMESTAMP_DTYPE)
+_EMPTY_PRICES = np.empty(0, dtype=np.float64)
+
+
+class ColumnarPriceStore:
+    """
+    Columnar, memory-mapped copy of price_history for analytics
+    Each symbol's history is a pair of flat files (timestamps as datetime64[s],
+    prices as float64) sorted by timestamp. index.json maps symbol ->
+    (file, version, length) and records the last PriceHistory.id included.
+    Range reads are zero-copy slices of the memory-mapped files.
+
+    sync() appends rows with a higher id than the watermark to the end of
+    their symbols' files and then atomically replaces index.json; readers only
+    map the lengths in the index they loaded, so they never see a partial
+    append. A symbol receiving rows older than its last one (e.g. a backfill)
+    gets a new version of its files instead. A sync costs the new rows plus
+    the index, never the whole store. A file lock keeps worker processes on
+    the same host from syncing at the same time.
+    """
+    def __init__(self, directory: str = PRICE_STORE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._index_stat = None
+        self._index = {'revision': 0, 'watermark': 0, 'next_file': 0, 'symbols': {}}
+        # Swapped as one tuple so readers never mix two revisions
+        # Format: (watermark, {symbol: (timestamps, prices)})
+        self._state = (0, {})
+        os.makedirs(os.path.join(directory, SERIES_DIR), exist_ok=True)
+        self.reload()
+
+    def _path(self, file: int, version: int, column: str) -> str:
+        return os.path.join(self.directory, SERIES_DIR, f"{file}.{version}.{column}")
+
+    @property
+    def watermark(self) -> int:
+        """Highest PriceHistory.id contained in the store"""
+        return self._state[0]
+
+    def reload(self) -> bool:
+        """
+        Map the newest revision on disk; returns True if it changed
+        Cheap when nothing changed (one stat call), so readers call it per request
+        """
+        with self._lock:
+            return self._reload_locked()
+
+    def _reload_locked(self) -> bool:
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            stat = os.stat(index_path)
+            if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._index_stat:
+                return False
+            with open(index_path) as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read price store index {index_path}: {e}")
+            return False
+
+        self._index_stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if index['revision'] == self._index['revision']:
+            return False
+
+        _, current = self._state
+        series = {}
+        for symbol, (file, version, length) in index['symbols'].items():
+            mapped = current.get(symbol)
+            if mapped is not None and self._index['symbols'].get(symbol) == [file, version, length]:
+                series[symbol] = mapped
+                continue
+            series[symbol] = (
+                np.memmap(self._path(file, version, 'timestamps'), dtype=TIMESTAMP_DTYPE, mode='r', shape=(length,)),
+                np.memmap(self._path(file, version, 'prices'), dtype=np.float64, mode='r', shape=(length,)),
+            )
+        self._index = index
+        self._state = (index['watermark'], series)
+        return True
+
+    def symbols(self) -> List[str]:
+        """Symbols with at least one stored price"""
+        return list(self._state[1])
+
+    def get_range(self, symbol: str, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (timestamps, prices) for a symbol with start <= timestamp < end
+        Both arrays are read-only views into the memory-mapped files
+        """
+        mapped = self._state[1].get(symbol)
+        if mapped is None:
+            return _EMPTY_TIMESTAMPS, _EMPTY_PRICES
+
+        timestamps, prices = mapped
+        lo = 0 if start is None else int(np.searchsorted(timestamps, np.datetime64(start, 's'), side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, np.datetime64(end, 's'), side='left'))
+        return timestamps[lo:hi], prices[lo:hi]
+
+    def latest(self, symbol: str) -> Optional[Tuple[datetime, float]]:
+        """Most recent (timestamp, price) for a symbol"""
+        mapped = self._state[1].get(symbol)
+        if mapped is None:
+            return None
+        timestamps, prices = mapped
+        return timestamps[-1].astype(datetime), float(prices[-1])
+
+    def sync(self) -> int:
+        """
+        Pull price_history rows added since the watermark into the store
+        Must run inside an application context; returns the number of rows added
+        """
+        with open(os.path.join(self.directory, LOCK_FILE), 'w') as lock_file, self._lock:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Another process may have published a newer revision meanwhile
+            self._reload_locked()
+            rows = db.session.execute(
+                select(PriceHistory.id, PriceHistory.symbol, PriceHistory.timestamp, PriceHistory.price)
+                .where(PriceHistory.id > self._index['watermark'])
+                .order_by(PriceHistory.id)
+            ).all()
+            if not rows:
+                return 0
+
+            ids, symbols, timestamps, prices = zip(*rows)
+            self._write_revision(
+                np.asarray(symbols, dtype=str),
+                np.asarray(timestamps, dtype=TIMESTAMP_DTYPE),
+                np.asarray(prices, dtype=np.float64),
+                max(ids),
+            )
+            self._reload_locked()
+
+        logger.info(f"Price store synced {len(rows)} rows (watermark {self.watermark})")
+        return len(rows)
+
+    def _write_revision(self, new_symbols: np.ndarray, new_timestamps: np.ndarray,
+                        new_prices: np.ndarray, watermark: int) -> None:
+        """Add new rows to their symbols' files and publish the updated index"""
+        index = dict(self._index, symbols=dict(self._index['symbols']))
+        superseded = []
+        # Group the new rows by symbol, each group sorted by timestamp
+        order = np.lexsort((new_timestamps, new_symbols))
+        new_symbols, new_timestamps, new_prices = new_symbols[order], new_timestamps[order], new_prices[order]
+        unique_symbols, starts = np.unique(new_symbols, return_index=True)
+        bounds = np.append(starts, len(new_symbols))
+
+        for number, symbol in enumerate(unique_symbols.tolist()):
+            timestamps = new_timestamps[bounds[number]:bounds[number + 1]]
+            prices = new_prices[bounds[number]:bounds[number + 1]]
+            entry = index['symbols'].get(symbol)
+            if entry is None:
+                file, version, length = index['next_file'], 0, 0
+                index['next_file'] += 1
+            else:
+                file, version, length = entry
+                current_timestamps, current_prices = self._state[1][symbol]
+                if timestamps[0] < current_timestamps[-1]:
+                    # Older rows than the stored ones: write the merged series as a new version
+                    superseded.append((file, version))
+                    timestamps = np.concatenate([current_timestamps, timestamps])
+                    prices = np.concatenate([current_prices, prices])
+                    merged = np.argsort(timestamps, kind='stable')
+                    timestamps, prices = timestamps[merged], prices[merged]
+                    version, length = version + 1, 0
+
+            self._append(file, version, length, timestamps, prices)
+            index['symbols'][symbol] = [file, version, length + len(timestamps)]
+
+        index['revision'] += 1
+        index['watermark'] = int(watermark)
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        with open(f"{index_path}.tmp", 'w') as f:
+            json.dump(index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{index_path}.tmp", index_path)
+        self._remove_files(superseded)
+
+    def _append(self, file: int, version: int, length: int, timestamps: np.ndarray, prices: np.ndarray) -> None:
+        """Write rows after the first length rows of a symbol's files"""
+        for column, array, itemsize in (('timestamps', timestamps, 8), ('prices', prices, 8)):
+            with open(self._path(file, version, column), 'ab') as f:
+                # Drop bytes a crashed sync appended but never published
+                f.truncate(length * itemsize)
+                f.write(np.ascontiguousarray(array).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _remove_files(self, superseded: List[Tuple[int, int]]) -> None:
+        """Delete superseded series files (open memory maps keep working on POSIX)"""
+        for path in (self._path(file, version, column) for file, version in superseded
+                     for column in ('timestamps', 'prices')):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove old price store file {path}: {e}")
+
+
+def get_price_store(app=None) -> ColumnarPriceStore:
+    """Return the application's price store, opening it on first use"""
+    app = app or current_app
+    store = app.extensions.get('price_store')
+    if store is None:
+        store = ColumnarPriceStore(app.config['PRICE_STORE_DIR'])
+        app.extensions['price_store'] = store
+    return store
+
+
+def start_price_store_sync(app) -> threading.Thread:
+    """Catch the store up with price_history in a background thread (e.g. rows written while the app was down)"""
+    def catch_up():
+        with app.app_context():
+            try:
+                get_price_store(app).sync()
+            except Exception as e:
+                logger.error(f"Price store sync failed: {e}")
+            finally:
+                db.session.remove()
+
+    thread = threading.Thread(target=catch_up, name='price-store-sync', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from backend.utils.logging import logger
+from backend.config.settings import RATE_LIMIT_DEFAULT_BACKOFF
+
+# Shortest sleep of a queued coroutine, e.g. while a caller ahead takes the token it is owed
+_ASYNC_MIN_WAIT = 0.005
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Convert a Retry-After header into seconds to wait
+    Accepts both delta-seconds ("120") and HTTP-date forms; returns None if absent or invalid
+    """
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucketRateLimiter:
+    """
+    Token-bucket rate limiter for one upstream provider
+    Tokens refill continuously at rate_per_minute up to burst. Callers queue in
+    arrival order and wait on a condition (no sleeping while holding a lock)
+    until a token is free or their deadline passes. A 429 from the provider
+    pauses the bucket for the Retry-After period.
+    """
+    def __init__(self, name: str, rate_per_minute: float, burst: int = 1,
+                 default_backoff: float = RATE_LIMIT_DEFAULT_BACKOFF):
+        self.name = name
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self.default_backoff = default_backoff
+        self._condition = threading.Condition()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiting = deque()  # Tickets of queued callers, oldest first
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def _seconds_until_token(self, now: float) -> float:
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate_per_second
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take one token, waiting in line for at most timeout seconds (None waits forever)
+        Returns False if the deadline passes before this caller's turn comes
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = object()
+        with self._condition:
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._seconds_until_token(now) if self._waiting[0] is ticket else None
+                    if wait == 0.0:
+                        self._tokens -= 1
+                        return True
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._condition.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right now and nobody is queued"""
+        return self.acquire(timeout=0)
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        """
+        acquire() for coroutines, in the same line as threaded callers
+        Sleeps with asyncio.sleep until the time the tokens for the callers ahead
+        and this one will have refilled, so waiting holds no thread
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = object()
+        with self._condition:
+            self._waiting.append(ticket)
+        try:
+            while True:
+                with self._condition:
+                    now = time.monotonic()
+                    self._refill(now)
+                    position = self._waiting.index(ticket)
+                    if position == 0 and self._seconds_until_token(now) == 0.0:
+                        self._tokens -= 1
+                        return True
+                    wait = max(self._blocked_until - now, (position + 1 - self._tokens) / self.rate_per_second,
+                               _ASYNC_MIN_WAIT)
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                await asyncio.sleep(wait)
+        finally:
+            with self._condition:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        """Pause the bucket after a 429, for Retry-After seconds or the default backoff"""
+        delay = retry_after if retry_after is not None else self.default_backoff
+        logger.warning(f"{self.name} rate limit reached, backing off for {int(delay)} seconds")
+        with self._condition:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._tokens = 0.0
+            self._condition.notify_all()
+
+    @property
+    def is_backing_off(self) -> bool:
+        """True while a 429 backoff is in effect"""
+        return time.monotonic() < self._blocked_until
+
+    @property
+    def backoff_remaining(self) -> float:
+        """Seconds left in the current 429 backoff (0 when none)"""
+        return max(self._blocked_until - time.monotonic(), 0.0)
@@ -0,0 +1,211 @@
+from datetime import date
+from typing import Dict, Any, List, Optional
+import numpy as np
+from backend.services.valuation_service import Holdings, load_holdings, current_prices, ASSET_TYPES, OTHER_ASSET_TYPE
+from backend.services.value_curve_service import forward_fill
+
+DAYS_PER_YEAR = 365.0
+# Bracket for log(1 + rate); wider than any annualized return worth reporting
+LOG_RATE_BOUNDS = (-30.0, 30.0)
+_TYPE_LABELS = ASSET_TYPES + (OTHER_ASSET_TYPE,)
+
+
+def xirr(amounts: np.ndarray, years: np.ndarray, groups: np.ndarray, group_count: int,
+         tol: float = 1e-10, max_iter: int = 100) -> np.ndarray:
+    """
+    Solve the annualized internal rate of return of many cash flow sets at once
+    Each flow is amount (negative when invested) at `years` before the valuation
+    date; group r solves sum(amount * (1 + r) ** years) = 0. All groups take
+    Newton steps on x = log(1 + r) together; a step leaving the group's sign
+    change bracket is replaced by bisection. Groups without a sign change
+    (e.g. every flow on the valuation date) are NaN.
+    """
+    def value_and_slope(x):
+        with np.errstate(over='ignore', invalid='ignore'):
+            growth = amounts * np.exp(np.minimum(years * x[groups], 700.0))
+            return (np.bincount(groups, weights=growth, minlength=group_count),
+                    np.bincount(groups, weights=growth * years, minlength=group_count))
+
+    lo = np.full(group_count, LOG_RATE_BOUNDS[0])
+    hi = np.full(group_count, LOG_RATE_BOUNDS[1])
+    f_lo, _ = value_and_slope(lo)
+    f_hi, _ = value_and_slope(hi)
+    solvable = np.sign(f_lo) * np.sign(f_hi) < 0
+
+    x = np.clip(np.full(group_count, np.log1p(0.1)), lo, hi)
+    active = solvable.copy()
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        f, slope = value_and_slope(x)
+        below = np.sign(f) == np.sign(f_lo)
+        lo = np.where(active & below, x, lo)
+        hi = np.where(active & ~below, x, hi)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = x - f / slope
+        bisect = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+        step = np.where(bisect, (lo + hi) / 2, step)
+        step = np.where(f == 0, x, step)
+
+        done = np.abs(step - x) < tol
+        x = np.where(active, step, x)
+        active &= ~done
+
+    return np.where(solvable, np.expm1(x), np.nan)
+
+
+def _store_prices(store, symbols: List[str], days: np.ndarray) -> np.ndarray:
+    """Last recorded price of each symbol at the end of each day (NaN before the first)"""
+    prices = np.full((len(days), len(symbols)), np.nan)
+    if store is None:
+        return prices
+    day_ends = (days + 1).astype('datetime64[s]')
+    for column, symbol in enumerate(symbols):
+        timestamps, values = store.get_range(symbol)
+        if not len(timestamps):
+            continue
+        index = np.searchsorted(timestamps, day_ends, side='left') - 1
+        prices[:, column] = np.where(index >= 0, values[np.maximum(index, 0)], np.nan)
+    return prices
+
+
+def time_weighted_returns(holdings: Holdings, lot_prices: np.ndarray, today: np.datetime64,
+                          store=None, lot_rates: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Cumulative time-weighted return per asset type code and in total (last element)
+    Sub-periods end at every purchase date. Holdings are valued there at the
+    price store's close for that day, or the price paid by a lot bought that
+    day, or the last price paid for the symbol; today uses lot_prices.
+    Recorded prices are converted with lot_rates like current prices.
+    Works on one (purchase days x (symbol, asset type)) matrix.
+    """
+    pairs, first_lot, pair_index = np.unique(
+        np.char.add(np.char.add(holdings.symbols.astype(str), '\0'), holdings.asset_types.astype(str)),
+        return_index=True, return_inverse=True)
+    lot_days = holdings.purchase_date.astype('datetime64[D]')
+    days = np.union1d(lot_days, [today])
+    day_index = np.searchsorted(days, lot_days)
+
+    paid = np.full((len(days), len(pairs)), np.nan)
+    paid[day_index, pair_index] = holdings.purchase_price
+    recorded = _store_prices(store, holdings.symbols[first_lot].astype(str).tolist(), days)
+    if lot_rates is not None:
+        recorded *= lot_rates[first_lot]
+    prices = np.where(np.isnan(paid), recorded, paid)
+    prices = np.where(np.isnan(prices), forward_fill(paid), prices)
+    prices[-1] = lot_prices[first_lot]
+
+    bought = np.zeros((len(days), len(pairs)))
+    np.add.at(bought, (day_index, pair_index), holdings.quantity)
+    invested = np.zeros((len(days), len(pairs)))
+    np.add.at(invested, (day_index, pair_index), holdings.quantity * holdings.purchase_price)
+    held_before = np.cumsum(bought, axis=0) - bought
+
+    value_before = np.where(held_before > 0, held_before * np.nan_to_num(prices), 0.0)
+    value_after = value_before + invested
+
+    # Membership of each (symbol, type) pair in its asset type group and the total
+    membership = np.zeros((len(pairs), len(_TYPE_LABELS) + 1))
+    membership[np.arange(len(pairs)), holdings.type_codes[first_lot]] = 1.0
+    membership[:, -1] = 1.0
+    group_before = value_before @ membership
+    group_after = value_after @ membership
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        period = np.where(group_after[:-1] > 0, group_before[1:] / group_after[:-1], 1.0)
+    return np.prod(period, axis=0) - 1.0
+
+
+def _annualize(cumulative: np.ndarray, years: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(years > 0, np.power(1.0 + cumulative, 1.0 / years) - 1.0, np.nan)
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+def holding_returns(holdings: Holdings, prices: Dict[str, float], store=None,
+                    today: Optional[date] = None, lot_rates: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Money-weighted (XIRR) and time-weighted returns per asset, per asset type and in total
+    Lots are priced like the portfolio summary; all XIRR cash flow sets
+    (every lot, every asset type, the total) are solved in one batch
+    Returns {'as_of', 'assets': [...], 'by_type': {asset_type: {...}}, 'total': {...}}
+    """
+    today = np.datetime64(today or date.today(), 'D')
+    lot_prices = current_prices(holdings, prices, lot_rates)
+    lot_count, type_count = len(holdings), len(_TYPE_LABELS)
+    cost = holdings.quantity * holdings.purchase_price
+    value = holdings.quantity * lot_prices
+    years = (today - holdings.purchase_date.astype('datetime64[D]')).astype(np.float64) / DAYS_PER_YEAR
+    years = np.maximum(years, 0.0)
+
+    # Groups: one per lot, then one per asset type code, then the total.
+    # Each group has every lot's purchase outflow plus one inflow of its value today.
+    lots = np.arange(lot_count)
+    type_groups = lot_count + holdings.type_codes.astype(np.int64)
+    total_group = lot_count + type_count
+    outflow_groups = np.concatenate([lots, type_groups, np.full(lot_count, total_group)])
+    groups = np.concatenate([outflow_groups, outflow_groups])
+    amounts = np.concatenate([np.tile(-cost, 3), np.tile(value, 3)])
+    flow_years = np.concatenate([np.tile(years, 3), np.zeros(3 * lot_count)])
+    rates = xirr(amounts, flow_years, groups, total_group + 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lot_twr = np.where(cost > 0, value / cost - 1.0, np.nan)
+    group_twr = time_weighted_returns(holdings, lot_prices, today, store, lot_rates) if lot_count else np.zeros(type_count + 1)
+    # Time-weighted returns are annualized over the span since each group's first purchase
+    first_years = np.zeros(type_count + 1)
+    np.maximum.at(first_years, holdings.type_codes.astype(np.int64), years)
+    first_years[-1] = years.max() if lot_count else 0.0
+    group_twr_annualized = _annualize(group_twr, first_years)
+
+    lots_per_type = np.bincount(holdings.type_codes, minlength=type_count)
+    by_type = {
+        asset_type: {
+            'xirr': _optional(float(rates[lot_count + code])),
+            'twr': float(group_twr[code]),
+            'twr_annualized': _optional(float(group_twr_annualized[code])),
+        }
+        for code, asset_type in enumerate(_TYPE_LABELS) if lots_per_type[code]
+    }
+
+    return {
+        'as_of': str(today),
+        'assets': [
+            {'id': asset_id, 'symbol': symbol, 'asset_type': asset_type,
+             'xirr': _optional(rate), 'twr': _optional(twr)}
+            for asset_id, symbol, asset_type, rate, twr in zip(
+                holdings.ids.tolist(), holdings.symbols.tolist(), holdings.asset_types.tolist(),
+                rates[:lot_count].tolist(), lot_twr.tolist())
+        ],
+        'by_type': by_type,
+        'total': {
+            'xirr': _optional(float(rates[total_group])) if lot_count else None,
+            'twr': float(group_twr[-1]),
+            'twr_annualized': _optional(float(group_twr_annualized[-1])),
+        },
+    }
+
+
+def portfolio_returns(price_service=None, store=None, fx_service=None) -> Dict[str, Any]:
+    """
+    Compute returns for the whole portfolio in one pass
+    Live prices come from price_service when given, otherwise stored last prices;
+    fx_service converts quotes into the purchase price currency and is reported under 'fx'
+    """
+    holdings = load_holdings()
+    prices = {}
+    if price_service is not None and len(holdings):
+        prices = price_service.get_prices_for_assets(holdings.unique_holdings())
+    if store is not None:
+        store.reload()
+    if fx_service is None or not len(holdings):
+        return holding_returns(holdings, prices, store)
+
+    lot_rates, rates = fx_service.lot_rates(holdings)
+    returns = holding_returns(holdings, prices, store, lot_rates=lot_rates)
+    returns['fx'] = fx_service.describe(rates)
+    return returns
@@ -0,0 +1,218 @@
+import threading
+import warnings
+from collections import OrderedDict
+from datetime import date
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from backend.services.valuation_service import load_holdings
+from backend.services.value_curve_service import holdings_key, daily_price_matrix
+from backend.utils.logging import logger
+from backend.config.settings import RISK_LOOKBACK_DAYS, RISK_CONFIDENCE, RISK_CACHE_SIZE
+
+# Price rows are forward-filled onto every calendar day, so annualize by 365
+PERIODS_PER_YEAR = 365
+
+
+def daily_returns(prices: np.ndarray) -> np.ndarray:
+    """
+    Simple returns of a (days x symbols) price matrix, shape (days - 1) x symbols
+    Returns before a symbol's first price are NaN, so they never count as flat days
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices[1:] / prices[:-1] - 1.0
+    return np.where(np.isfinite(returns), returns, np.nan)
+
+
+def pairwise_covariance(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Daily (covariance, correlation) of returns with NaN gaps, pairwise complete
+    Each pair uses only the days both symbols have a return; pairs sharing fewer
+    than two days are NaN. The diagonal is each symbol's own sample variance.
+    """
+    observed = ~np.isnan(returns)
+    mask = observed.astype(np.float64)
+    values = np.where(observed, returns, 0.0)
+    counts = mask.T @ mask
+    # sums[i, j]: sum of symbol i's returns on the days symbol j also has one
+    sums = values.T @ mask
+    squares = (values * values).T @ mask
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = (values.T @ values - sums * sums.T / counts) / (counts - 1)
+        # variance[i, j]: variance of symbol i over the days shared with symbol j
+        variance = (squares - sums * sums / counts) / (counts - 1)
+        correlation = covariance / np.sqrt(variance * variance.T)
+    shared = counts >= 2
+    return np.where(shared, covariance, np.nan), np.where(shared, correlation, np.nan)
+
+
+def portfolio_pnl(returns: np.ndarray, exposure: np.ndarray, observations: np.ndarray) -> np.ndarray:
+    """
+    Daily P&L of the exposure over the days every symbol with at least two returns has one
+    Symbols with fewer returns have no volatility either and are left out
+    """
+    modelled = observations >= 2
+    window = returns[:, modelled]
+    return window[~np.isnan(window).any(axis=1)] @ exposure[modelled]
+
+
+def _optional(values) -> List[Optional[float]]:
+    """Convert NaN to None for JSON output"""
+    return [None if value != value else value for value in np.asarray(values, dtype=np.float64).tolist()]
+
+
+def exposure_and_returns(holdings, store, today: date, days: int,
+                         lot_rates: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Current exposure and daily returns of each held symbol over the last days
+    Returns (symbols, exposure, returns, observations): exposure is quantity at
+    the latest price (average cost for never-priced symbols), returns is
+    days x symbols (NaN before a symbol's first price) and observations counts
+    the real returns per symbol.
+    Stored quotes are converted with lot_rates (see FxService.lot_rates).
+    """
+    symbols, first_lot, symbol_index = np.unique(holdings.symbols.astype(str), return_index=True, return_inverse=True)
+    quantity = np.bincount(symbol_index, weights=holdings.quantity, minlength=len(symbols))
+    cost = np.bincount(symbol_index, weights=holdings.quantity * holdings.purchase_price, minlength=len(symbols))
+
+    end = np.datetime64(today, 'D')
+    rates = None if lot_rates is None else lot_rates[first_lot]
+    prices = daily_price_matrix(store, symbols, np.arange(end - days, end + 1), rates)
+    returns = daily_returns(prices)
+    observations = np.count_nonzero(~np.isnan(returns), axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        latest = np.where(np.isnan(prices[-1]), cost / quantity, prices[-1])
+    return symbols, quantity * latest, returns, observations
+
+
+class _RiskResult:
+    __slots__ = ('summary', 'symbols', 'returns', 'matrices')
+
+    def __init__(self, summary, symbols, returns):
+        self.summary = summary
+        self.symbols = symbols
+        self.returns = returns
+        self.matrices = None
+
+
+class RiskEngine:
+    """
+    Volatility, covariance/correlation and 1-day Value at Risk for the portfolio
+    Daily prices for the lookback window come from the columnar price store as
+    one (days x symbols) matrix; returns and per-symbol volatility are computed
+    on the whole matrix at once. A symbol first priced inside the window has
+    NaN returns before that day: its volatility uses its own observations, the
+    covariance is pairwise complete, and portfolio variance is
+    w' * covariance * w over the symbols with a volatility. Historical VaR uses
+    the portfolio P&L on the days all those symbols have a return.
+
+    Results are memoized by (holdings fingerprint, price store watermark, day,
+    lookback, confidence), so repeated dashboard loads are served from memory
+    until a lot or a price changes.
+    """
+    def __init__(self, cache_size: int = RISK_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._cache_size = cache_size
+        self._cache: 'OrderedDict[tuple, _RiskResult]' = OrderedDict()
+
+    def risk(self, store, days: int = RISK_LOOKBACK_DAYS, confidence: float = RISK_CONFIDENCE,
+             include_matrix: bool = False, fx_service=None) -> Dict[str, Any]:
+        """
+        Get risk figures for the current holdings; must run inside an application context
+        Returns {'as_of', 'lookback_days', 'confidence', 'portfolio_value', 'volatility',
+        'var', 'assets'} plus 'symbols', 'covariance' and 'correlation' with include_matrix
+        and 'fx' with an fx_service (stored quotes are converted at the current rates)
+        """
+        holdings = load_holdings()
+        if not len(holdings):
+            return {'portfolio_value': 0.0, 'volatility': None, 'var': None, 'assets': []}
+
+        lot_rates, rates = fx_service.lot_rates(holdings) if fx_service is not None else (None, {})
+        store.reload()
+        today = date.today()
+        key = (holdings_key(holdings), store.watermark, today, days, confidence, tuple(sorted(rates.items())))
+
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                result = self._compute(holdings, store, today, days, confidence, lot_rates)
+                self._cache[key] = result
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.move_to_end(key)
+
+            response = dict(result.summary)
+            if include_matrix:
+                if result.matrices is None:
+                    result.matrices = self._matrices(result.returns)
+                response['symbols'] = result.symbols
+                response.update(result.matrices)
+        if fx_service is not None:
+            response['fx'] = fx_service.describe(rates)
+        return response
+
+    @staticmethod
+    def _compute(holdings, store, today: date, days: int, confidence: float,
+                 lot_rates: Optional[np.ndarray] = None) -> _RiskResult:
+        symbols, exposure, returns, observations = exposure_and_returns(holdings, store, today, days, lot_rates)
+        value = float(exposure.sum())
+
+        modelled = observations >= 2
+        with warnings.catch_warnings():
+            # Symbols with fewer than two returns give NaN, which is what they should report
+            warnings.simplefilter('ignore', RuntimeWarning)
+            volatility = np.nanstd(returns, axis=0, ddof=1)
+        volatility = np.where(modelled, volatility, np.nan)
+
+        summary = {
+            'as_of': today.isoformat(),
+            'lookback_days': days,
+            'confidence': confidence,
+            'portfolio_value': value,
+            'volatility': None,
+            'var': None,
+            'assets': [
+                {'symbol': symbol, 'value': symbol_value, 'weight': weight,
+                 'volatility': symbol_volatility, 'observations': count}
+                for symbol, symbol_value, weight, symbol_volatility, count in zip(
+                    symbols.tolist(), exposure.tolist(),
+                    _optional(exposure / value) if value else [None] * len(symbols),
+                    _optional(volatility * np.sqrt(PERIODS_PER_YEAR)), observations.tolist())
+            ],
+        }
+
+        if modelled.any() and value:
+            weights = np.where(modelled, exposure, 0.0)
+            covariance, _ = pairwise_covariance(returns)
+            pnl_std = float(np.sqrt(max(weights @ np.nan_to_num(covariance) @ weights, 0.0)))
+            pnl_mean = float(np.nanmean(returns[:, modelled], axis=0) @ exposure[modelled])
+            pnl = portfolio_pnl(returns, exposure, observations)
+            z = NormalDist().inv_cdf(confidence)
+            summary['volatility'] = {
+                'daily': pnl_std / value,
+                'annualized': pnl_std / value * np.sqrt(PERIODS_PER_YEAR),
+            }
+            summary['var'] = {
+                # Losses are reported as positive amounts in portfolio currency
+                'historical': max(0.0, -float(np.quantile(pnl, 1.0 - confidence))) if len(pnl) >= 2 else None,
+                'parametric': max(0.0, z * pnl_std - pnl_mean),
+            }
+
+        logger.debug(f"Computed risk for {len(symbols)} symbols over {days} days")
+        return _RiskResult(summary, symbols.tolist(), returns)
+
+    @staticmethod
+    def _matrices(returns: np.ndarray) -> Dict[str, Any]:
+        """Annualized covariance and correlation matrices of the daily returns (pairwise complete)"""
+        if len(returns) < 2:
+            empty = [[None] * returns.shape[1] for _ in range(returns.shape[1])]
+            return {'covariance': empty, 'correlation': empty}
+
+        covariance, correlation = pairwise_covariance(returns)
+        covariance *= PERIODS_PER_YEAR
+        return {
+            'covariance': [_optional(row) for row in covariance],
+            'correlation': [_optional(row) for row in correlation],
+        }
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Awaitable, Callable, Dict, List, Tuple
+from backend.services.price_fetch_engine import remaining_budget
+from backend.utils.logging import logger
+from backend.config.settings import REQUEST_TIMEOUT
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent upstream lookups for the same keys
+    The first caller for a key runs the fetch; callers that ask for the key while
+    that fetch is in flight wait on the same future instead of issuing their own
+    request. A caller always finishes the keys it owns before waiting on others,
+    so overlapping batches cannot deadlock. Threads and coroutines share the
+    same in-flight table, so sync and async lookups coalesce with each other.
+    """
+    def __init__(self, wait_timeout: float = REQUEST_TIMEOUT * 2):
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._in_flight = {}  # Format: {key: Future}
+
+    def _claim(self, keys: List[str]) -> Tuple[Dict[str, Future], Dict[str, Future]]:
+        """Split keys into ones this caller now owns and ones already in flight"""
+        owned = {}
+        waiting = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                future = self._in_flight.get(key)
+                if future is None:
+                    future = Future()
+                    self._in_flight[key] = future
+                    owned[key] = future
+                else:
+                    waiting[key] = future
+        return owned, waiting
+
+    def _release(self, owned: Dict[str, Future], fetched: Dict[str, float]) -> None:
+        """Publish the owner's results to waiters and clear its keys"""
+        with self._lock:
+            for key in owned:
+                self._in_flight.pop(key, None)
+        for key, future in owned.items():
+            future.set_result(fetched.get(key))
+
+    def fetch(self, keys: List[str], fetch: Callable[[List[str]], Dict[str, float]]) -> Dict[str, float]:
+        """
+        Fetch the given keys, sharing in-flight work with concurrent callers
+        Returns a dictionary with the keys that produced a value
+        """
+        owned, waiting = self._claim(keys)
+
+        results = {}
+        if owned:
+            fetched = {}
+            try:
+                fetched = fetch(list(owned))
+            finally:
+                self._release(owned, fetched)
+            results.update((key, value) for key, value in fetched.items() if key in owned)
+
+        for key, future in waiting.items():
+            try:
+                value = future.result(timeout=remaining_budget(self.wait_timeout))
+            except FutureTimeoutError:
+                logger.warning(f"Timed out waiting for in-flight lookup of {key}")
+                continue
+            if value is not None:
+                results[key] = value
+
+        return results
+
+    async def fetch_async(self, keys: List[str],
+                          fetch: Callable[[List[str]], Awaitable[Dict[str, float]]]) -> Dict[str, float]:
+        """asyncio counterpart of fetch; fetch is a coroutine function"""
+        owned, waiting = self._claim(keys)
+
+        results = {}
+        if owned:
+            fetched = {}
+            try:
+                fetched = await fetch(list(owned))
+            finally:
+                self._release(owned, fetched)
+            results.update((key, value) for key, value in fetched.items() if key in owned)
+
+        for key, future in waiting.items():
+            try:
+                # shield: a timed-out waiter must not cancel the owner's future
+                value = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.wait_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Timed out waiting for in-flight lookup of {key}")
+                continue
+            if value is not None:
+                results[key] = value
+
+        return results
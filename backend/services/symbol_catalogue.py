@@ -0,0 +1,109 @@
+import bisect
+import sys
+from array import array
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple
+
+# Separates fields in the text columns; never part of a symbol, name or ID
+SEPARATOR = '\x00'
+FIELDS = ('symbol', 'name', 'id')
+FIELD_SYMBOL, FIELD_NAME, FIELD_ID = range(len(FIELDS))
+
+
+class SymbolCatalogue:
+    """
+    Immutable list of {symbol, name, id?} records stored as array-backed columns
+    Every field of every record is concatenated into one string, each field
+    preceded and followed by SEPARATOR, with the start of each field kept in an
+    array('I'). A lowercased copy (sharing the offsets when lowercasing keeps
+    the length) serves case-insensitive lookups: str.find over it returns the
+    first matching record in list order without a Python-level loop. Records
+    are materialized as dicts only when read.
+    """
+    __slots__ = ('_text', '_offsets', '_lowered', '_lower_offsets', '_count')
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        """records: dicts with 'symbol', 'name' and optionally 'id'; records without a symbol are skipped"""
+        parts: List[str] = [SEPARATOR]
+        lower_parts: List[str] = [SEPARATOR]
+        offsets = array('I', [1])
+        lower_offsets = array('I', [1])
+        same_length = True
+        count = 0
+        for record in records:
+            symbol = record.get('symbol')
+            if not symbol:
+                continue
+            for field in (symbol, record.get('name') or '', record.get('id') or ''):
+                field = field.replace(SEPARATOR, '')
+                lowered = field.lower()
+                same_length = same_length and len(lowered) == len(field)
+                parts.append(field + SEPARATOR)
+                lower_parts.append(lowered + SEPARATOR)
+                offsets.append(offsets[-1] + len(field) + 1)
+                lower_offsets.append(lower_offsets[-1] + len(lowered) + 1)
+            count += 1
+
+        self._text = ''.join(parts)
+        self._lowered = ''.join(lower_parts)
+        self._offsets = offsets
+        self._lower_offsets = offsets if same_length else lower_offsets
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self[position] for position in range(self._count))
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        record = {'symbol': self.field(position, FIELD_SYMBOL), 'name': self.field(position, FIELD_NAME)}
+        entry_id = self.field(position, FIELD_ID)
+        if entry_id:
+            record['id'] = entry_id
+        return record
+
+    def field(self, position: int, field: int) -> str:
+        """Get one field of a record, e.g. field(0, FIELD_SYMBOL)"""
+        i = position * len(FIELDS) + field
+        return self._text[self._offsets[i]:self._offsets[i + 1] - 1]
+
+    def lowered_span(self, position: int, field: int) -> Tuple[int, int]:
+        """Get the (start, end) of a field in lowered_text"""
+        i = position * len(FIELDS) + field
+        return self._lower_offsets[i], self._lower_offsets[i + 1] - 1
+
+    @property
+    def lowered_text(self) -> str:
+        return self._lowered
+
+    def locate(self, offset: int) -> Tuple[int, int]:
+        """Get the (record position, field) containing an offset of lowered_text"""
+        i = bisect.bisect_right(self._lower_offsets, offset) - 1
+        return divmod(i, len(FIELDS))
+
+    def find_exact(self, key: str) -> Optional[int]:
+        """Position of the first record with a field equal to key (already lowercased), or None"""
+        if not key or SEPARATOR in key:
+            return None
+        offset = self._lowered.find(SEPARATOR + key + SEPARATOR)
+        return None if offset < 0 else self.locate(offset + 1)[0]
+
+    def find(self, key: str) -> Optional[int]:
+        """Position of the first record with a field containing key (already lowercased), or None"""
+        if not key or SEPARATOR in key:
+            return None
+        offset = self._lowered.find(key)
+        return None if offset < 0 else self.locate(offset)[0]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the catalogue's columns"""
+        size = sys.getsizeof(self._text) + sys.getsizeof(self._lowered) + sys.getsizeof(self._offsets)
+        if self._lower_offsets is not self._offsets:
+            size += sys.getsizeof(self._lower_offsets)
+        return size
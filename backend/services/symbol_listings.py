@@ -0,0 +1,38 @@
+import csv
+from typing import Dict, Iterator
+
+# Suffix Yahoo Finance uses for National Stock Exchange of India listings
+NSE_SUFFIX = '.NS'
+# Trailing security descriptions dropped from NASDAQ Trader names, e.g. "Apple Inc. - Common Stock"
+_US_NAME_SEPARATOR = ' - '
+
+
+def read_nse_equity_list(path: str) -> Iterator[Dict[str, str]]:
+    """
+    Read NSE's full equity list (EQUITY_L.csv from nseindia.com)
+    Columns: SYMBOL, NAME OF COMPANY, SERIES, ... Yields {symbol, name} with Yahoo symbols (e.g. TCS.NS)
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f, skipinitialspace=True):
+            row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+            symbol = row.get('SYMBOL')
+            if symbol:
+                yield {'symbol': f"{symbol}{NSE_SUFFIX}", 'name': row.get('NAME OF COMPANY', '')}
+
+
+def read_nasdaq_trader_listing(path: str) -> Iterator[Dict[str, str]]:
+    """
+    Read a NASDAQ Trader symbol directory file (nasdaqlisted.txt or otherlisted.txt)
+    Pipe-delimited with a "File Creation Time" footer. Test issues and symbols Yahoo
+    has no form for (preferreds, rights and warrants with '$' or '^') are skipped;
+    class shares use Yahoo's dash form (BRK.B -> BRK-B). Yields {symbol, name}.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f, delimiter='|'):
+            symbol = (row.get('Symbol') or row.get('ACT Symbol') or '').strip()
+            if not symbol or symbol.startswith('File Creation Time') or row.get('Test Issue') == 'Y':
+                continue
+            if '$' in symbol or '^' in symbol:
+                continue
+            name = (row.get('Security Name') or '').split(_US_NAME_SEPARATOR, 1)[0].strip()
+            yield {'symbol': symbol.replace('.', '-'), 'name': name}
@@ -0,0 +1,130 @@
+import bisect
+import re
+import sys
+from array import array
+from typing import Dict, Any, Optional, Sequence, Tuple
+from backend.services.symbol_catalogue import SymbolCatalogue, FIELD_SYMBOL, FIELD_NAME, FIELD_ID
+
+# Shortest query that also matches in the middle of a symbol or name
+MIN_SUBSTRING = 3
+# Match tiers, best first; results are ordered by tier, then by position in the source lists
+TIER_EXACT_SYMBOL = 0
+TIER_SYMBOL_PREFIX = 1
+TIER_NAME_PREFIX = 2
+TIER_SUBSTRING = 3
+
+_WORD = re.compile(r'\S+')
+
+
+class SymbolSearchIndex:
+    """
+    In-memory autocomplete index over symbol and name for every asset type
+    Prefix matches come from one sorted token list (symbols, the symbol without
+    its exchange suffix, each word of the name and the whole name) searched with
+    bisect. Tokens are (catalogue, start, end) spans of the catalogues' lowercased
+    text, so the index holds no strings of its own. Substring matches scan that
+    text with str.find, which skips straight to the next hit.
+    """
+    def __init__(self, catalogues: Sequence[Tuple[str, SymbolCatalogue]]):
+        """catalogues: (asset_type, catalogue) pairs in ranking order (e.g. crypto by market cap first)"""
+        self._types = [asset_type for asset_type, _ in catalogues]
+        self._catalogues = [catalogue for _, catalogue in catalogues]
+        self._texts = [catalogue.lowered_text for catalogue in self._catalogues]
+        self._bases = array('I', [0])
+        for catalogue in self._catalogues:
+            self._bases.append(self._bases[-1] + len(catalogue))
+
+        tokens = []
+        for number, catalogue in enumerate(self._catalogues):
+            text = self._texts[number]
+            for position in range(len(catalogue)):
+                start, end = catalogue.lowered_span(position, FIELD_SYMBOL)
+                tokens.append((number, start, end, TIER_SYMBOL_PREFIX, position))
+                dot = text.find('.', start, end)
+                if dot > start:
+                    tokens.append((number, start, dot, TIER_SYMBOL_PREFIX, position))
+
+                start, end = catalogue.lowered_span(position, FIELD_NAME)
+                if start == end:
+                    continue
+                tokens.append((number, start, end, TIER_NAME_PREFIX, position))
+                words = set()
+                for word in _WORD.finditer(text, start, end):
+                    if word.end() - word.start() < end - start and word.group() not in words:
+                        words.add(word.group())
+                        tokens.append((number, word.start(), word.end(), TIER_NAME_PREFIX, position))
+
+        tokens.sort(key=lambda token: self._texts[token[0]][token[1]:token[2]])
+        numbers, starts, ends, tiers, positions = zip(*tokens) if tokens else ((),) * 5
+        self._token_catalogues = array('B', numbers)
+        self._token_starts = array('I', starts)
+        self._token_ends = array('I', ends)
+        self._token_tiers = array('B', tiers)
+        self._token_positions = array('I', positions)
+
+    def __len__(self) -> int:
+        return self._bases[-1]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the token arrays (the text belongs to the catalogues)"""
+        columns = (self._bases, self._token_catalogues, self._token_starts, self._token_ends,
+                   self._token_tiers, self._token_positions)
+        return sum(sys.getsizeof(column) for column in columns)
+
+    def _token(self, i: int) -> str:
+        return self._texts[self._token_catalogues[i]][self._token_starts[i]:self._token_ends[i]]
+
+    def _entry(self, number: int, position: int) -> Dict[str, Any]:
+        entry = self._catalogues[number][position]
+        entry['asset_type'] = self._types[number]
+        return entry
+
+    def _substring_matches(self, number: int, query: str, best: Dict[int, int]) -> None:
+        """Add every record of one catalogue whose symbol or name contains the query"""
+        catalogue, text, base = self._catalogues[number], self._texts[number], self._bases[number]
+        offset = text.find(query)
+        while offset >= 0:
+            position, field = catalogue.locate(offset)
+            if field != FIELD_ID:
+                best.setdefault(base + position, TIER_SUBSTRING)
+            # Continue after this record's last field
+            offset = text.find(query, catalogue.lowered_span(position, FIELD_ID)[1])
+
+    def search(self, query: str, asset_type: Optional[str] = None, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        """
+        Find entries whose symbol or name starts with or contains the query
+        Returns {'results': [...], 'total': n, 'offset': offset, 'limit': limit}
+        """
+        query = query.strip().lower()
+        numbers = [number for number, type_ in enumerate(self._types) if asset_type in (None, type_)]
+        best: Dict[int, int] = {}
+        if query and numbers:
+            start = bisect.bisect_left(range(len(self._token_tiers)), query, key=self._token)
+            end = bisect.bisect_left(range(len(self._token_tiers)), query + '\uffff', lo=start, key=self._token)
+            for i in range(start, end):
+                number = self._token_catalogues[i]
+                if number not in numbers:
+                    continue
+                position = self._bases[number] + self._token_positions[i]
+                tier = self._token_tiers[i]
+                if tier == TIER_SYMBOL_PREFIX and self._token_ends[i] - self._token_starts[i] == len(query):
+                    tier = TIER_EXACT_SYMBOL
+                if tier < best.get(position, TIER_SUBSTRING + 1):
+                    best[position] = tier
+
+            if len(query) >= MIN_SUBSTRING:
+                for number in numbers:
+                    self._substring_matches(number, query, best)
+
+        ranked = sorted(best, key=lambda position: (best[position], position))
+        results = []
+        for position in ranked[offset:offset + limit]:
+            number = bisect.bisect_right(self._bases, position) - 1
+            results.append(self._entry(number, position - self._bases[number]))
+        return {
+            'results': results,
+            'total': len(ranked),
+            'offset': offset,
+            'limit': limit,
+        }
@@ -1,124 +1,453 @@
 import requests
+import gzip
+import hashlib
 import json 
 import os 
-from typing import List, Dict, Any
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterable, Callable, Tuple
+from backend.services.rate_limiter import TokenBucketRateLimiter, parse_retry_after
+from backend.services.symbol_catalogue import SymbolCatalogue, FIELD_SYMBOL, FIELD_NAME, FIELD_ID
+from backend.services.symbol_listings import read_nse_equity_list, read_nasdaq_trader_listing
+from backend.services.symbol_search import SymbolSearchIndex
 from backend.utils.logging import logger
-from backend.config.settings import COINGECKO_API_URL, REQUEST_TIMEOUT
+from backend.config.settings import (
+    COINGECKO_API_URL, REQUEST_TIMEOUT, ASSET_TYPE_CRYPTO, ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK,
+    CRYPTO_SYMBOL_CACHE_TTL, CRYPTO_SYMBOL_RETRY_INTERVAL, COINGECKO_MARKETS_PAGE_SIZE, CRYPTO_SYMBOL_MAX_PAGES,
+    CRYPTO_SYMBOL_PAGE_WAIT, CRYPTO_SYMBOL_RATE_LIMIT_PER_MINUTE, CRYPTO_SYMBOL_PUBLISH_INTERVAL, CRYPTO_ID_MEMO_SIZE,
+    SYMBOL_MEMORY_BUDGET
+)
 
 # Base directory for data files
 _DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+# Full exchange listings, merged after the curated JSON lists when present in _DATA_DIR
+_NSE_LISTINGS = ('EQUITY_L.csv',)
+_US_LISTINGS = ('nasdaqlisted.txt', 'otherlisted.txt')
 
-# In-memory symbol storage
-_crypto_symbols = []
-_indian_stock_symbols = []
-_us_stock_symbols = []
+# In-memory symbol storage; the crypto list is held in _crypto, defined below
+_indian_stock_symbols = SymbolCatalogue()
+_us_stock_symbols = SymbolCatalogue()
+# (source catalogues, SymbolSearchIndex) built on demand when _crypto carries no current one
+_search_index = None
+_crypto_refresh_thread = None
+_crypto_refresh_started = None  # time.monotonic() of the last refresh start
+_crypto_refresh_lock = threading.Lock()
+# Cache file background refreshes write to, set at startup; None disables refreshes (e.g. while testing)
+_crypto_cache_path: Optional[str] = None
+# Format: {list name: (catalogue, EncodedSymbolList)}
+_encoded_lists = {}
+# The crypto list's own CoinGecko budget, so paging never takes tokens from live prices; None means unthrottled
+_coingecko_limiter: Optional[TokenBucketRateLimiter] = TokenBucketRateLimiter(
+    'CoinGecko symbol list', CRYPTO_SYMBOL_RATE_LIMIT_PER_MINUTE)
+# The price service's CoinGecko bucket, set at startup; the list refresh yields while it backs off from a 429
+_price_limiter: Optional[TokenBucketRateLimiter] = None
 
+# CoinGecko IDs of major coins, used when the loaded coin list has no exact match
+_CRYPTO_ID_FALLBACKS = {
+    'btc': 'bitcoin',
+    'eth': 'ethereum',
+    'usdt': 'tether',
+    'bnb': 'binancecoin',
+    'xrp': 'ripple',
+    'ada': 'cardano',
+    'sol': 'solana',
+    'dot': 'polkadot',
+    'doge': 'dogecoin',
+    'avax': 'avalanche-2',
+    'matic': 'matic-network',  # Polygon
+    'link': 'chainlink',
+    'uni': 'uniswap',
+    'shib': 'shiba-inu',
+    'ltc': 'litecoin',
+}
+_CRYPTO_SYMBOL_FALLBACKS = {crypto_id: symbol.upper() for symbol, crypto_id in _CRYPTO_ID_FALLBACKS.items()}
 
-def load_crypto_symbols() -> List[Dict[str, Any]]:
+
+class CryptoIdIndex:
     """
-    Load cryptocurrency symbols from CoinGecko API
+    Case-insensitive CoinGecko ID lookup by symbol, ID or name, built once per coin list
+    Resolution order: exact match on any of the three (first coin in list order
+    wins, as the list is sorted by market cap), then the hardcoded major-coin
+    IDs, then the first coin whose symbol, name or ID contains the query.
+    Exact matches come from a dict built with the index; partial matches scan
+    the catalogue's lowercased text and are memoized, hits and misses alike, in
+    an LRU of CRYPTO_ID_MEMO_SIZE queries, as queries arrive from user input.
+    symbol_of maps an ID back to its coin's symbol.
     """
-    global _crypto_symbols
-    if _crypto_symbols:
-        logger.info("Crypto symbols already loaded, returning cached version.")
-        return _crypto_symbols
-
-    params = {
-        'vs_currency': 'usd',
-        'order': 'market_cap_desc',
-        'per_page': 100,  
-        'page': 1,
-        'sparkline': 'false',
-        'price_change_percentage': 'false'  
-    }
-    
+    def __init__(self, coins: Iterable[Dict[str, Any]], memo_size: int = CRYPTO_ID_MEMO_SIZE):
+        self._coins = coins if isinstance(coins, SymbolCatalogue) else SymbolCatalogue(coins)
+        self._exact: Dict[str, int] = {}
+        self._by_id: Dict[str, int] = {}
+        for position in range(len(self._coins)):
+            for field in (FIELD_SYMBOL, FIELD_NAME, FIELD_ID):
+                key = self._coins.field(position, field).lower()
+                if key:
+                    self._exact.setdefault(key, position)
+            self._by_id.setdefault(self._coins.field(position, FIELD_ID), position)
+        self._memo_size = memo_size
+        self._lock = threading.Lock()
+        self._partial: 'OrderedDict[str, Optional[str]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._coins)
+
+    def _id_at(self, position: Optional[int]) -> Optional[str]:
+        return None if position is None else self._coins.field(position, FIELD_ID) or None
+
+    def symbol_of(self, crypto_id: str) -> str:
+        """Get the (uppercase) symbol of the coin with a CoinGecko ID, or the ID uppercased if unknown"""
+        position = self._by_id.get(crypto_id)
+        if position is not None:
+            return self._coins.field(position, FIELD_SYMBOL).upper()
+        return _CRYPTO_SYMBOL_FALLBACKS.get(crypto_id, crypto_id.upper())
+
+    def resolve(self, query: str) -> Optional[str]:
+        """Get the CoinGecko ID for a symbol, ID or name, or None"""
+        key = query.lower()
+        crypto_id = self._id_at(self._exact.get(key)) or _CRYPTO_ID_FALLBACKS.get(key)
+        if crypto_id is not None:
+            return crypto_id
+
+        with self._lock:
+            if key in self._partial:
+                self._partial.move_to_end(key)
+                return self._partial[key]
+        crypto_id = self._id_at(self._coins.find(key))
+        if crypto_id is None:
+            logger.warning(f"Could not find CoinGecko ID for symbol: {query}")
+        with self._lock:
+            self._partial[key] = crypto_id
+            while len(self._partial) > self._memo_size:
+                self._partial.popitem(last=False)
+        return crypto_id
+
+
+class _CryptoSnapshot:
+    """
+    A crypto list with everything derived from it, published by a single assignment to _crypto
+    so readers never pair one list with another list's index. Never modified once built.
+    prepared: also build the search index and encoded response body up front, so the
+    first request after a publish does not pay for them
+    """
+    __slots__ = ('symbols', 'index', 'search', 'encoded')
+
+    def __init__(self, coins: Iterable[Dict[str, Any]], prepared: bool = False):
+        self.symbols = coins if isinstance(coins, SymbolCatalogue) else SymbolCatalogue(coins)
+        self.index = CryptoIdIndex(self.symbols)
+        self.search = None
+        self.encoded = None
+        if prepared:
+            self.search = _build_search_index((self.symbols, get_indian_stock_symbols(), get_us_stock_symbols()))
+            self.encoded = EncodedSymbolList(self.symbols)
+
+
+_crypto = _CryptoSnapshot([])
+
+
+def _acquire_page_slot() -> bool:
+    """
+    Wait for a token of the crypto list's own bucket, then wait out any 429 backoff of
+    the price service (CoinGecko limits the whole host), for at most CRYPTO_SYMBOL_PAGE_WAIT
+    """
+    deadline = time.monotonic() + CRYPTO_SYMBOL_PAGE_WAIT
+    if _coingecko_limiter is not None and not _coingecko_limiter.acquire(timeout=CRYPTO_SYMBOL_PAGE_WAIT):
+        return False
+    while _price_limiter is not None and _price_limiter.is_backing_off:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(_price_limiter.backoff_remaining, remaining))
+    return True
+
+
+def _fetch_crypto_symbols(max_pages: int = CRYPTO_SYMBOL_MAX_PAGES,
+                          on_page: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+                          ) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetch cryptocurrencies from CoinGecko in market-cap order, or None on failure
+    Pages of COINGECKO_MARKETS_PAGE_SIZE coins are requested until a short page or
+    max_pages, each behind _acquire_page_slot. on_page is called with the coins so
+    far after every page that is followed by another.
+    """
+    coins = []
+    seen = set()
+    page = 1
     try:
-        logger.info(f"Fetching crypto symbols from {COINGECKO_API_URL}/coins/markets...")
-        response = requests.get(f"{COINGECKO_API_URL}/coins/markets", params=params, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()  
-        data = response.json()
-        
-        # Store as a list of dicts: { id (for key), symbol, name }
-        _crypto_symbols = [
-            {'id': coin['id'], 'symbol': coin['symbol'].upper(), 'name': coin['name']}
-            for coin in data
-        ]
-        logger.info(f"Successfully loaded {len(_crypto_symbols)} crypto symbols from CoinGecko.")
+        while page <= max_pages:
+            if not _acquire_page_slot():
+                logger.error("Error fetching crypto symbols from CoinGecko: no request slot available")
+                return None
+
+            params = {
+                'vs_currency': 'usd',
+                'order': 'market_cap_desc',
+                'per_page': COINGECKO_MARKETS_PAGE_SIZE,
+                'page': page,
+                'sparkline': 'false',
+                'price_change_percentage': 'false'  
+            }
+            logger.info(f"Fetching crypto symbols page {page} from {COINGECKO_API_URL}/coins/markets...")
+            response = requests.get(f"{COINGECKO_API_URL}/coins/markets", params=params, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 429 and _coingecko_limiter is not None:
+                # Wait out the penalty on the next acquire and retry the same page
+                _coingecko_limiter.penalize(parse_retry_after(response.headers.get('Retry-After')))
+                continue
+            response.raise_for_status()  
+            data = response.json()
+
+            # Store as a list of dicts: { id (for key), symbol, name }
+            for coin in data:
+                if 'id' not in coin or 'symbol' not in coin or 'name' not in coin:
+                    logger.warning(f"Malformed coin data: {coin}")
+                    continue
+                # Rankings can shift between page requests, so a coin may show up twice
+                if coin['id'] not in seen:
+                    seen.add(coin['id'])
+                    coins.append({'id': coin['id'], 'symbol': coin['symbol'].upper(), 'name': coin['name']})
+            if len(data) < COINGECKO_MARKETS_PAGE_SIZE or page == max_pages:
+                break
+            if on_page is not None:
+                on_page(coins)
+            page += 1
+
+        logger.info(f"Successfully loaded {len(coins)} crypto symbols from CoinGecko.")
+        return coins
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching crypto symbols from CoinGecko: {e}")
-        _crypto_symbols = []  
     except Exception as e:
         logger.error(f"An unexpected error occurred while processing crypto symbols: {e}")
-        _crypto_symbols = []
-    
-    return _crypto_symbols
+    return None
+
 
+def _set_crypto_symbols(coins: List[Dict[str, Any]]) -> None:
+    """Swap in a new crypto list together with its ID index"""
+    global _crypto
+    _crypto = _CryptoSnapshot(coins)
 
-def load_indian_stock_symbols() -> List[Dict[str, Any]]:
+
+def load_crypto_symbols() -> SymbolCatalogue:
     """
-    Load Indian stock symbols from a JSON file.
+    Load the top cryptocurrencies from CoinGecko API (one page; the full list
+    comes from the background refresh). Blocks on the network, so request
+    paths use get_crypto_symbols instead.
     """
-    global _indian_stock_symbols
-    if _indian_stock_symbols: 
-        logger.info("Indian stock symbols already loaded, returning cached version.")
-        return _indian_stock_symbols
+    if _crypto.symbols:
+        logger.info("Crypto symbols already loaded, returning cached version.")
+        return _crypto.symbols
+
+    _set_crypto_symbols(_fetch_crypto_symbols(max_pages=1) or [])
+    return _crypto.symbols
+
+
+def load_cached_crypto_symbols(cache_path: str) -> float:
+    """
+    Load cryptocurrency symbols from the local cache file, without any network access
+    Returns the age of the cached list in seconds (infinity when there is no usable cache)
+    """
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+        coins, fetched_at = cache['coins'], float(cache['fetched_at'])
+    except FileNotFoundError:
+        logger.info(f"No crypto symbol cache at {cache_path}")
+        coins, fetched_at = None, None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable crypto symbol cache {cache_path}: {e}")
+        coins, fetched_at = None, None
+
+    if coins is None:
+        return float('inf')
+
+    _set_crypto_symbols(coins)
+    catalogue = _crypto.symbols
+    logger.info(f"Loaded {len(catalogue)} crypto symbols from {cache_path} ({catalogue.nbytes // 1024} KiB)")
+    return max(time.time() - fetched_at, 0.0)
+
+
+def _publish_crypto_symbols(coins: List[Dict[str, Any]]) -> None:
+    """Swap in a crypto list with its search index and response body built here rather than on the next request"""
+    global _crypto
+    _crypto = _CryptoSnapshot(coins, prepared=True)
+
+
+def refresh_crypto_symbols(cache_path: str) -> bool:
+    """
+    Fetch the crypto list from CoinGecko, swap it in and persist it to the cache file
+    The first page, then at most one page per CRYPTO_SYMBOL_PUBLISH_INTERVAL, is published
+    as it arrives: the coins fetched so far, in their new order, followed by the rest of the
+    previous list, which the complete list finally replaces.
+    On failure the cache is kept. Returns whether the refresh succeeded.
+    """
+    previous = _crypto.symbols.to_list()
+    published_at = None
+
+    def publish_partial(coins: List[Dict[str, Any]]) -> None:
+        nonlocal published_at
+        now = time.monotonic()
+        if published_at is not None and now - published_at < CRYPTO_SYMBOL_PUBLISH_INTERVAL:
+            return
+        published_at = now
+        fetched = {coin['id'] for coin in coins}
+        _publish_crypto_symbols(coins + [coin for coin in previous if coin.get('id') not in fetched])
+
+    coins = _fetch_crypto_symbols(on_page=publish_partial)
+    if not coins:
+        return False
+    _publish_crypto_symbols(coins)
+
+    try:
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write atomically so a crash or a concurrent reader never sees a partial file
+        temp_path = f"{cache_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'fetched_at': time.time(), 'coins': coins}, f)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logger.error(f"Error writing crypto symbol cache {cache_path}: {e}")
+    return True
+
+
+def start_crypto_symbol_refresh(cache_path: str) -> threading.Thread:
+    """
+    Refresh the crypto list in a background daemon thread, at most one at a time
+    """
+    global _crypto_refresh_thread, _crypto_refresh_started
+    with _crypto_refresh_lock:
+        if _crypto_refresh_thread is None or not _crypto_refresh_thread.is_alive():
+            _crypto_refresh_thread = threading.Thread(target=refresh_crypto_symbols, args=(cache_path,),
+                                                      name='crypto-symbol-refresh', daemon=True)
+            _crypto_refresh_started = time.monotonic()
+            _crypto_refresh_thread.start()
+        return _crypto_refresh_thread
+
+
+def _refresh_missing_crypto_symbols() -> None:
+    """
+    Start a background refresh when a caller finds no crypto list; the caller never waits for it
+    Skipped when refreshes are disabled or one started within CRYPTO_SYMBOL_RETRY_INTERVAL
+    """
+    if _crypto_cache_path is None or _crypto.symbols:
+        return
+    if _crypto_refresh_started is not None and time.monotonic() - _crypto_refresh_started < CRYPTO_SYMBOL_RETRY_INTERVAL:
+        return
+    start_crypto_symbol_refresh(_crypto_cache_path)
+
+
+def init_crypto_symbols(cache_path: str, refresh: bool = True,
+                        limiter: Optional[TokenBucketRateLimiter] = None) -> Optional[threading.Thread]:
+    """
+    Load crypto symbols at startup from the cache file, refreshing in the background when
+    the cache is missing or older than CRYPTO_SYMBOL_CACHE_TTL
+    limiter: the price service's CoinGecko token bucket, whose 429 backoffs the refresh waits out
+    refresh: False keeps every crypto symbol lookup offline (e.g. while testing)
+    Returns the refresh thread, if one was started
+    """
+    global _price_limiter, _crypto_cache_path
+    if limiter is not None:
+        _price_limiter = limiter
+    _crypto_cache_path = cache_path if refresh else None
+    age = load_cached_crypto_symbols(cache_path)
+    if refresh and age >= CRYPTO_SYMBOL_CACHE_TTL:
+        return start_crypto_symbol_refresh(cache_path)
+    return None
 
-    file_path = os.path.join(_DATA_DIR, 'indian_stocks.json')
+
+def _load_stock_symbols(label: str, file_name: str, listings: Iterable[str],
+                        read_listing: Callable[[str], Iterable[Dict[str, str]]]) -> SymbolCatalogue:
+    """
+    Load a curated JSON list followed by any full exchange listings present in the data directory
+    The first occurrence of a symbol wins, so curated names and ordering take precedence.
+    """
+    file_path = os.path.join(_DATA_DIR, file_name)
+    records = []
     try:
-        logger.info(f"Loading Indian stock symbols from {file_path}...")
+        logger.info(f"Loading {label} symbols from {file_path}...")
         with open(file_path, 'r') as f:
-            _indian_stock_symbols = json.load(f)
-        logger.info(f"Successfully loaded {len(_indian_stock_symbols)} Indian stock symbols from {file_path}.")
+            records = json.load(f)
     except FileNotFoundError:
-        logger.error(f"Indian stock symbols file not found: {file_path}")
-        _indian_stock_symbols = []
+        logger.error(f"{label} symbols file not found: {file_path}")
     except json.JSONDecodeError:
         logger.error(f"Error decoding JSON from {file_path}")
     except Exception as e:
-        logger.error(f"An unexpected error occurred while loading Indian stock symbols: {e}")
-        _indian_stock_symbols = []
+        logger.error(f"An unexpected error occurred while loading {label} symbols: {e}")
+
+    for listing in listings:
+        listing_path = os.path.join(_DATA_DIR, listing)
+        if not os.path.exists(listing_path):
+            continue
+        try:
+            records.extend(read_listing(listing_path))
+        except Exception as e:
+            logger.error(f"Error reading {label} listing {listing_path}: {e}")
+
+    seen = set()
+    unique = []
+    for record in records:
+        symbol = record.get('symbol')
+        if symbol and symbol not in seen:
+            seen.add(symbol)
+            unique.append(record)
+    catalogue = SymbolCatalogue(unique)
+    logger.info(f"Successfully loaded {len(catalogue)} {label} symbols ({catalogue.nbytes // 1024} KiB).")
+    return catalogue
+
+
+def load_indian_stock_symbols() -> SymbolCatalogue:
+    """
+    Load Indian stock symbols from a JSON file and the NSE equity list, if present.
+    """
+    global _indian_stock_symbols
+    if _indian_stock_symbols: 
+        logger.info("Indian stock symbols already loaded, returning cached version.")
+        return _indian_stock_symbols
+
+    _indian_stock_symbols = _load_stock_symbols('Indian stock', 'indian_stocks.json', _NSE_LISTINGS,
+                                                read_nse_equity_list)
     return _indian_stock_symbols
 
 
-def load_us_stock_symbols() -> List[Dict[str, Any]]:
+def load_us_stock_symbols() -> SymbolCatalogue:
     """
-    Load US stock symbols from a JSON file.
+    Load US stock symbols from a JSON file and the NASDAQ Trader symbol directories, if present.
     """
     global _us_stock_symbols
     if _us_stock_symbols: 
         logger.info("US stock symbols already loaded, returning cached version.")
         return _us_stock_symbols
-        
-    file_path = os.path.join(_DATA_DIR, 'us_stocks.json')
-    try:
-        logger.info(f"Loading US stock symbols from {file_path}...")
-        with open(file_path, 'r') as f:
-            _us_stock_symbols = json.load(f)
-        logger.info(f"Successfully loaded {len(_us_stock_symbols)} US stock symbols from {file_path}.")
-    except FileNotFoundError:
-        logger.error(f"US stock symbols file not found: {file_path}")
-        _us_stock_symbols = []
-    except json.JSONDecodeError:
-        logger.error(f"Error decoding JSON from {file_path}")
-    except Exception as e:
-        logger.error(f"An unexpected error occurred while loading US stock symbols: {e}")
-        _us_stock_symbols = []
+
+    _us_stock_symbols = _load_stock_symbols('US stock', 'us_stocks.json', _US_LISTINGS,
+                                            read_nasdaq_trader_listing)
     return _us_stock_symbols
 
 
 # --- Getter functions ---
 
-def get_crypto_symbols() -> List[Dict[str, Any]]:
+def get_crypto_symbols() -> SymbolCatalogue:
     """
-    Get the list of cryptocurrency symbols. Loads if not already present.
+    Get the list of cryptocurrency symbols. Never touches the network: an empty list
+    is returned as is, with a background refresh started to fill it.
     """
-    if not _crypto_symbols:
-        logger.info("Crypto symbols not found in memory, attempting to load.")
-        load_crypto_symbols()
-    return _crypto_symbols
+    catalogue = _crypto.symbols
+    if not catalogue:
+        _refresh_missing_crypto_symbols()
+    return catalogue
 
 
-def get_indian_stock_symbols() -> List[Dict[str, Any]]:
+def get_crypto_id_index() -> CryptoIdIndex:
+    """
+    Get the CoinGecko ID index of the loaded crypto list. Never touches the network:
+    until a list loads, lookups use the major-coin fallbacks.
+    """
+    snapshot = _crypto
+    if not snapshot.symbols:
+        _refresh_missing_crypto_symbols()
+    return snapshot.index
+
+
+def get_indian_stock_symbols() -> SymbolCatalogue:
     """
     Get the list of Indian stock symbols. Loads if not already present.
     """
@@ -128,7 +457,7 @@ def get_indian_stock_symbols() -> List[Dict[str, Any]]:
     return _indian_stock_symbols
 
 
-def get_us_stock_symbols() -> List[Dict[str, Any]]:
+def get_us_stock_symbols() -> SymbolCatalogue:
     """
     Get the list of US stock symbols. Loads if not already present.
     """
@@ -137,6 +466,94 @@ def get_us_stock_symbols() -> List[Dict[str, Any]]:
         load_us_stock_symbols()
     return _us_stock_symbols
 
+class EncodedSymbolList:
+    """
+    A symbol list serialized once as gzip-compressed JSON, with a strong ETag
+    The JSON matches what jsonify would produce (sorted keys, compact separators).
+    """
+    __slots__ = ('gzipped', 'etag', 'size')
+
+    def __init__(self, catalogue: SymbolCatalogue):
+        body = json.dumps(catalogue.to_list(), sort_keys=True, separators=(',', ':')).encode('utf-8')
+        self.size = len(body)
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+    def body(self) -> bytes:
+        """Uncompressed JSON, for clients that do not accept gzip"""
+        return gzip.decompress(self.gzipped)
+
+
+_LIST_GETTERS = {
+    'crypto': get_crypto_symbols,
+    'indian_stocks': get_indian_stock_symbols,
+    'us_stocks': get_us_stock_symbols,
+}
+
+
+def get_encoded_symbols(name: str) -> EncodedSymbolList:
+    """
+    Get a symbol list ('crypto', 'indian_stocks' or 'us_stocks') as an encoded response body
+    It is encoded once per loaded list and re-encoded only after the list is replaced.
+    """
+    encoded = _crypto.encoded if name == 'crypto' else None
+    if encoded is not None:
+        return encoded
+    catalogue = _LIST_GETTERS[name]()
+    cached = _encoded_lists.get(name)
+    if cached is None or cached[0] is not catalogue:
+        cached = (catalogue, EncodedSymbolList(catalogue))
+        _encoded_lists[name] = cached
+        logger.info(f"Encoded {len(catalogue)} {name} symbols: {cached[1].size} bytes of JSON, "
+                    f"{len(cached[1].gzipped)} gzipped")
+    return cached[1]
+
+
+def _build_search_index(sources: Tuple[SymbolCatalogue, SymbolCatalogue, SymbolCatalogue]
+                        ) -> Tuple[Tuple[SymbolCatalogue, ...], SymbolSearchIndex]:
+    """Build the search index over (crypto, Indian stock, US stock) catalogues, returned with them"""
+    crypto, indian, us = sources
+    index = SymbolSearchIndex([
+        (ASSET_TYPE_CRYPTO, crypto), (ASSET_TYPE_INDIAN_STOCK, indian), (ASSET_TYPE_US_STOCK, us)
+    ])
+    total_bytes = sum(catalogue.nbytes for catalogue in sources) + index.nbytes
+    logger.info(f"Built symbol search index over {len(index)} symbols "
+                f"({total_bytes // 1024} KiB including the symbol lists)")
+    if total_bytes > SYMBOL_MEMORY_BUDGET:
+        logger.warning(f"Symbol lists and search index use {total_bytes // 1024} KiB, "
+                       f"over the {SYMBOL_MEMORY_BUDGET // 1024} KiB budget")
+    return sources, index
+
+
+def get_search_index() -> SymbolSearchIndex:
+    """
+    Get the autocomplete index over all symbol lists, rebuilt when any list is (re)loaded
+    Crypto comes first in market-cap order, then Indian and US stocks in file order
+    """
+    global _search_index
+    snapshot = _crypto
+    sources = (snapshot.symbols, get_indian_stock_symbols(), get_us_stock_symbols())
+    for cached in (snapshot.search, _search_index):
+        if cached is not None and all(a is b for a, b in zip(sources, cached[0])):
+            return cached[1]
+    _search_index = _build_search_index(sources)
+    return _search_index[1]
+
+
+def get_catalogue_stats() -> Dict[str, Any]:
+    """
+    Get the number of symbols and bytes held by each loaded symbol list and the search index
+    """
+    snapshot = _crypto
+    lists = {'crypto': snapshot.symbols, 'indian_stocks': _indian_stock_symbols, 'us_stocks': _us_stock_symbols}
+    stats = {name: {'count': len(catalogue), 'bytes': catalogue.nbytes} for name, catalogue in lists.items()}
+    search = snapshot.search or _search_index
+    if search is not None:
+        stats['search_index'] = {'count': len(search[1]), 'bytes': search[1].nbytes}
+    stats['total_bytes'] = sum(entry['bytes'] for entry in stats.values())
+    return stats
+
+
 # --- Service Class (recommended structure for Flask app integration) ---
 
 class SymbolService:
@@ -158,16 +575,16 @@ class SymbolService:
         self.us_stock_symbols = get_us_stock_symbols()
         logger.info("SymbolService: All symbols loaded and cached.")
 
-    def get_all_crypto_symbols(self) -> List[Dict[str, Any]]:
+    def get_all_crypto_symbols(self) -> SymbolCatalogue:
         return self.crypto_symbols
 
-    def get_all_indian_stock_symbols(self) -> List[Dict[str, Any]]:
+    def get_all_indian_stock_symbols(self) -> SymbolCatalogue:
         return self.indian_stock_symbols
 
-    def get_all_us_stock_symbols(self) -> List[Dict[str, Any]]:
+    def get_all_us_stock_symbols(self) -> SymbolCatalogue:
         return self.us_stock_symbols
 
-    def get_all_symbols(self) -> Dict[str, List[Dict[str, Any]]]:
+    def get_all_symbols(self) -> Dict[str, SymbolCatalogue]:
         """
         Returns all loaded symbols, categorized by type.
         """
@@ -0,0 +1,152 @@
+from typing import Dict, Any, List, Optional
+import numpy as np
+from sqlalchemy import select
+from backend.models import db, Asset
+from backend.config.settings import ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO
+
+# Asset types in type-code order; anything else is grouped under OTHER_ASSET_TYPE
+ASSET_TYPES = (ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO)
+OTHER_ASSET_TYPE = 'Other'
+_TYPE_LABELS = ASSET_TYPES + (OTHER_ASSET_TYPE,)
+_TYPE_CODES = {asset_type: code for code, asset_type in enumerate(ASSET_TYPES)}
+
+
+class Holdings:
+    """Column arrays for every asset lot, one element per Asset row"""
+    __slots__ = ('ids', 'symbols', 'asset_types', 'type_codes', 'quantity',
+                 'purchase_price', 'purchase_date', 'last_price')
+
+    def __init__(self, rows):
+        ids, symbols, asset_types, quantity, purchase_price, purchase_date, last_price = (
+            zip(*rows) if rows else ((),) * 7
+        )
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.asset_types = np.asarray(asset_types, dtype=object)
+        self.type_codes = np.asarray(
+            [_TYPE_CODES.get(asset_type, len(ASSET_TYPES)) for asset_type in asset_types], dtype=np.int8)
+        self.quantity = np.asarray(quantity, dtype=np.float64)
+        self.purchase_price = np.asarray(purchase_price, dtype=np.float64)
+        self.purchase_date = np.asarray(purchase_date, dtype='datetime64[s]')
+        self.last_price = np.asarray([np.nan if price is None else price for price in last_price], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def unique_holdings(self) -> List[Dict[str, str]]:
+        """Distinct (symbol, asset_type) pairs in the format PriceService expects"""
+        pairs = dict.fromkeys(zip(self.symbols.tolist(), self.asset_types.tolist()))
+        return [{'symbol': symbol, 'asset_type': asset_type} for symbol, asset_type in pairs]
+
+
+def load_holdings() -> Holdings:
+    """Load all asset lots as column arrays without building ORM objects"""
+    rows = db.session.execute(
+        select(Asset.id, Asset.symbol, Asset.asset_type, Asset.quantity,
+               Asset.purchase_price, Asset.purchase_date, Asset.last_price)
+        .order_by(Asset.id)
+    ).all()
+    return Holdings(rows)
+
+
+def current_prices(holdings: Holdings, prices: Dict[str, float], lot_rates: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Price each lot: the given price for its symbol, else its stored last_price,
+    else its purchase price (so unpriced lots show no gain or loss)
+    Given prices are multiplied by lot_rates (see FxService.lot_rates) to
+    convert them into the purchase price currency, and a NaN rate (no exchange
+    rate available) falls through to the stored price. last_price is stored
+    already converted (see PriceRefresher), so it is used as is.
+    """
+    symbols, inverse = np.unique(holdings.symbols.astype(str), return_inverse=True)
+    symbol_prices = np.array([prices.get(symbol, np.nan) for symbol in symbols.tolist()], dtype=np.float64)
+    lot_prices = symbol_prices[inverse]
+    if lot_rates is not None:
+        lot_prices = lot_prices * lot_rates
+    lot_prices = np.where(np.isnan(lot_prices), holdings.last_price, lot_prices)
+    return np.where(np.isnan(lot_prices), holdings.purchase_price, lot_prices)
+
+
+def _figures(purchase_value: float, current_value: float) -> Dict[str, float]:
+    profit_loss = current_value - purchase_value
+    return {
+        'purchase_value': purchase_value,
+        'current_value': current_value,
+        'profit_loss': profit_loss,
+        'profit_loss_percent': profit_loss / purchase_value * 100 if purchase_value > 0 else 0.0,
+    }
+
+
+def value_holdings(holdings: Holdings, prices: Dict[str, float], include_assets: bool = True,
+                   lot_rates: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Value every lot and aggregate per asset type and in total
+    Returns {'assets': [...], 'by_type': {asset_type: {...}}, 'total': {...}}
+    """
+    price = current_prices(holdings, prices, lot_rates)
+    purchase_value = holdings.quantity * holdings.purchase_price
+    current_value = holdings.quantity * price
+
+    type_count = len(_TYPE_LABELS)
+    purchase_by_type = np.bincount(holdings.type_codes, weights=purchase_value, minlength=type_count)
+    current_by_type = np.bincount(holdings.type_codes, weights=current_value, minlength=type_count)
+    lots_by_type = np.bincount(holdings.type_codes, minlength=type_count)
+
+    by_type = {}
+    for code, asset_type in enumerate(_TYPE_LABELS):
+        if asset_type == OTHER_ASSET_TYPE and not lots_by_type[code]:
+            continue
+        by_type[asset_type] = dict(_figures(float(purchase_by_type[code]), float(current_by_type[code])),
+                                   count=int(lots_by_type[code]))
+
+    summary = {
+        'by_type': by_type,
+        'total': dict(_figures(float(purchase_value.sum()), float(current_value.sum())), count=len(holdings)),
+    }
+
+    if include_assets:
+        profit_loss = current_value - purchase_value
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent = np.where(purchase_value > 0, profit_loss / purchase_value * 100, 0.0)
+        summary['assets'] = [
+            {
+                'id': asset_id,
+                'symbol': symbol,
+                'asset_type': asset_type,
+                'quantity': quantity,
+                'purchase_price': purchase_price,
+                'current_price': lot_price,
+                'purchase_value': lot_purchase,
+                'current_value': lot_current,
+                'profit_loss': lot_profit,
+                'profit_loss_percent': lot_percent,
+            }
+            for asset_id, symbol, asset_type, quantity, purchase_price, lot_price,
+                lot_purchase, lot_current, lot_profit, lot_percent in zip(
+                holdings.ids.tolist(), holdings.symbols.tolist(), holdings.asset_types.tolist(),
+                holdings.quantity.tolist(), holdings.purchase_price.tolist(), price.tolist(),
+                purchase_value.tolist(), current_value.tolist(), profit_loss.tolist(), percent.tolist())
+        ]
+
+    return summary
+
+
+def portfolio_summary(price_service=None, include_assets: bool = True, fx_service=None) -> Dict[str, Any]:
+    """
+    Value the whole portfolio in one pass
+    Live prices come from price_service (one batched lookup for the distinct
+    symbols); without a price service the stored last_price is used. With an
+    fx_service, quotes are converted into its base currency and the rates used
+    (and currencies without a rate) are returned under 'fx'
+    """
+    holdings = load_holdings()
+    prices = {}
+    if price_service is not None and len(holdings):
+        prices = price_service.get_prices_for_assets(holdings.unique_holdings())
+    if fx_service is None or not len(holdings):
+        return value_holdings(holdings, prices, include_assets=include_assets)
+
+    lot_rates, rates = fx_service.lot_rates(holdings)
+    summary = value_holdings(holdings, prices, include_assets=include_assets, lot_rates=lot_rates)
+    summary['fx'] = fx_service.describe(rates)
+    return summary
@@ -0,0 +1,178 @@
+import hashlib
+import threading
+from datetime import date
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from sqlalchemy import select, func
+from backend.models import db, PriceHistory
+from backend.services.valuation_service import Holdings, load_holdings
+from backend.utils.logging import logger
+
+
+def holdings_key(holdings: Holdings) -> str:
+    """Fingerprint of every lot's symbol, quantity, cost and purchase date"""
+    digest = hashlib.sha1()
+    for column in (holdings.ids, holdings.quantity, holdings.purchase_price, holdings.purchase_date.astype(np.int64)):
+        digest.update(np.ascontiguousarray(column).tobytes())
+    digest.update('\0'.join(holdings.symbols.tolist()).encode())
+    return digest.hexdigest()
+
+
+def forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """Carry the last non-NaN value in each column down the rows"""
+    rows = np.arange(matrix.shape[0])[:, None]
+    last_seen = np.where(np.isnan(matrix), 0, rows)
+    np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+    return matrix[last_seen, np.arange(matrix.shape[1])]
+
+
+def daily_price_matrix(store, symbols, days: np.ndarray, rates: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Build a (days x symbols) matrix of each day's last price, forward-filled
+    The first row is seeded with the last price before the range so gaps at the
+    start are filled too; symbols never priced stay NaN until their first price.
+    rates holds one conversion factor per symbol for the stored quotes (current
+    rates, see FxService.lot_rates); a symbol with a NaN rate stays unpriced.
+    """
+    matrix = np.full((len(days), len(symbols)), np.nan)
+    start = days[0].astype('datetime64[s]')
+    end = (days[-1] + 1).astype('datetime64[s]')
+
+    for column, symbol in enumerate(symbols):
+        _, earlier = store.get_range(symbol, None, start)
+        if len(earlier):
+            matrix[0, column] = earlier[-1]
+        timestamps, prices = store.get_range(symbol, start, end)
+        if not len(timestamps):
+            continue
+        rows = (timestamps.astype('datetime64[D]') - days[0]).astype(np.int64)
+        # Timestamps are sorted, so the last tick of each day closes it
+        last_of_day = np.append(rows[1:] != rows[:-1], True)
+        matrix[rows[last_of_day], column] = prices[last_of_day]
+
+    if rates is not None:
+        matrix *= rates
+    return forward_fill(matrix)
+
+
+class _Curve:
+    __slots__ = ('key', 'watermark', 'days', 'values', 'invested')
+
+    def __init__(self, key, watermark, days, values, invested):
+        self.key = key
+        self.watermark = watermark
+        self.days = days
+        self.values = values
+        self.invested = invested
+
+
+class ValueCurveEngine:
+    """
+    Daily portfolio value since the first purchase
+    value[day] = sum over symbols of quantity held[day, symbol] * price[day, symbol],
+    computed as one product of a holdings matrix (cumulative lot quantities from
+    each purchase date) and a forward-filled price matrix from the price store.
+    Lots without any recorded price are valued at their symbol's average cost.
+
+    The last curve is cached. While holdings are unchanged only the days from
+    the last cached day onward are recomputed, or from the oldest price added
+    to price_history since the cached watermark if that is earlier.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._curve: Optional[_Curve] = None
+
+    def value_curve(self, store, start: Optional[date] = None, end: Optional[date] = None,
+                    fx_service=None) -> Dict[str, Any]:
+        """
+        Get the daily value curve, optionally restricted to start <= day <= end
+        With an fx_service, stored quotes are converted at the current rates
+        Returns {'dates': [...], 'value': [...], 'invested': [...]} plus 'fx' with an fx_service
+        """
+        holdings = load_holdings()
+        lot_rates, rates = fx_service.lot_rates(holdings) if fx_service is not None and len(holdings) else (None, {})
+        curve = self._refresh(store, holdings, lot_rates, rates)
+        response = {'dates': [], 'value': [], 'invested': []}
+        if curve is not None:
+            lo = 0 if start is None else int(np.searchsorted(curve.days, np.datetime64(start, 'D'), side='left'))
+            hi = len(curve.days) if end is None else int(np.searchsorted(curve.days, np.datetime64(end, 'D'), side='right'))
+            response = {
+                'dates': [str(day) for day in curve.days[lo:hi]],
+                'value': curve.values[lo:hi].tolist(),
+                'invested': curve.invested[lo:hi].tolist(),
+            }
+        if fx_service is not None:
+            response['fx'] = fx_service.describe(rates)
+        return response
+
+    def _refresh(self, store, holdings: Holdings, lot_rates: Optional[np.ndarray],
+                 rates: Dict[str, Optional[float]]) -> Optional[_Curve]:
+        """Bring the cached curve up to today; must run inside an application context"""
+        if not len(holdings):
+            return None
+
+        store.reload()
+        # New exchange rates change every day's value
+        key = (holdings_key(holdings), tuple(sorted(rates.items())))
+        today = np.datetime64(date.today(), 'D')
+        first_day = holdings.purchase_date.astype('datetime64[D]').min()
+
+        with self._lock:
+            cached = self._curve
+            recompute_from = first_day
+            if cached is not None and cached.key == key:
+                # The last cached day may only have had part of its prices
+                recompute_from = max(cached.days[-1], first_day)
+                changed_from = self._oldest_change(cached.watermark, store.watermark)
+                if changed_from is not None:
+                    recompute_from = max(min(recompute_from, changed_from), first_day)
+            else:
+                cached = None
+
+            days = np.arange(recompute_from, max(today, first_day) + 1)
+            values, invested = self._compute(holdings, store, days, lot_rates)
+            if cached is not None:
+                keep = cached.days < recompute_from
+                days = np.concatenate([cached.days[keep], days])
+                values = np.concatenate([cached.values[keep], values])
+                invested = np.concatenate([cached.invested[keep], invested])
+            logger.debug(f"Value curve recomputed from {recompute_from} ({len(days)} days cached)")
+
+            self._curve = _Curve(key, store.watermark, days, values, invested)
+            return self._curve
+
+    @staticmethod
+    def _oldest_change(cached_watermark: int, watermark: int) -> Optional[np.datetime64]:
+        """Day of the oldest price_history row added after the cached watermark"""
+        if watermark <= cached_watermark:
+            return None
+        oldest = db.session.execute(
+            select(func.min(PriceHistory.timestamp))
+            .where(PriceHistory.id > cached_watermark, PriceHistory.id <= watermark)
+        ).scalar()
+        return None if oldest is None else np.datetime64(oldest, 'D')
+
+    @staticmethod
+    def _compute(holdings: Holdings, store, days: np.ndarray,
+                 lot_rates: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Value and invested capital for each of the given consecutive days"""
+        symbols, first_lot, symbol_index = np.unique(holdings.symbols.astype(str), return_index=True, return_inverse=True)
+        cost = holdings.quantity * holdings.purchase_price
+
+        # Lots bought before the window count from its first row; later ones are ignored
+        lot_rows = (holdings.purchase_date.astype('datetime64[D]') - days[0]).astype(np.int64)
+        in_window = lot_rows < len(days)
+        lot_rows = np.clip(lot_rows[in_window], 0, None)
+
+        bought = np.zeros((len(days), len(symbols)))
+        np.add.at(bought, (lot_rows, symbol_index[in_window]), holdings.quantity[in_window])
+        held = np.cumsum(bought, axis=0)
+        invested = np.cumsum(np.bincount(lot_rows, weights=cost[in_window], minlength=len(days)))
+
+        prices = daily_price_matrix(store, symbols, days, None if lot_rates is None else lot_rates[first_lot])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            average_cost = np.bincount(symbol_index, weights=cost) / np.bincount(symbol_index, weights=holdings.quantity)
+        prices = np.where(np.isnan(prices), average_cost, prices)
+
+        values = np.einsum('ds,ds->d', held, prices)
+        return values, invested
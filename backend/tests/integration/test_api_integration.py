@@ -8,8 +8,8 @@ from backend.config.settings import ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK
 class TestAPIIntegration(unittest.TestCase):
     def setUp(self):
         """Set up test client and initialize test data"""
-        self.app = create_app()
-        self.app.config['TESTING'] = True
+        # Created in testing mode so startup starts no background CoinGecko or price fetches
+        self.app = create_app(config_override={'TESTING': True})
         self.client = self.app.test_client()
         
         # Save original portfolio
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest.mock import patch
+from urllib.parse import urlparse, parse_qs
+from backend import create_app
+from backend.routes import async_prices
+from backend.services.async_price_service import AsyncPriceService
+from backend.services.price_service import PriceService
+from backend.services.rate_limiter import TokenBucketRateLimiter
+from backend.config.settings import ASSET_TYPE_CRYPTO, ASSET_TYPE_US_STOCK, ASSET_TYPE_INDIAN_STOCK, YHOO_FINANCE_API_URL
+
+CRYPTO_PRICES = {'bitcoin': 60000.0, 'ethereum': 3000.0}
+STOCK_PRICES = {'AAPL': 190.5, 'TCS.NS': 3900.0}
+CRYPTO_IDS = {'BTC': 'bitcoin', 'ETH': 'ethereum'}
+
+
+class _StubProviderHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for CoinGecko (/coingecko/simple/price) and Yahoo's chart endpoint (/yahoo/chart/<symbol>)
+    Like Yahoo, it rejects clients without a browser user agent
+    """
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.paths.append(url.path)
+        self.server.requests.append((url.path, query, dict(self.headers)))
+        time.sleep(self.server.delay)
+
+        if url.path.startswith('/yahoo/') and not self.headers.get('User-Agent', '').startswith('Mozilla/'):
+            self._send(429, {})
+        elif url.path == '/coingecko/simple/price':
+            ids = query['ids'][0].split(',')
+            self._send(200, {i: {'usd': CRYPTO_PRICES[i]} for i in ids if i in CRYPTO_PRICES})
+        elif url.path.startswith('/yahoo/chart/'):
+            symbol = url.path[len('/yahoo/chart/'):]
+            price = STOCK_PRICES.get(symbol, 100.0 if symbol.startswith('SYM') else None)
+            if price is None:
+                self._send(404, {'chart': {'result': None, 'error': {'code': 'Not Found'}}})
+            else:
+                self._send(200, {'chart': {'result': [{'meta': {'symbol': symbol, 'regularMarketPrice': price}}],
+                                           'error': None}})
+        else:
+            self._send(404, {})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_stub_server():
+    """Start the stub provider server on a free local port"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubProviderHandler)
+    server.daemon_threads = True
+    server.paths = []
+    server.requests = []  # (path, query, headers)
+    server.delay = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class TestAsyncPriceService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = _start_stub_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.paths.clear()
+        self.server.requests.clear()
+        self.server.delay = 0
+        self.price_service = PriceService(yahoo_limiter=TokenBucketRateLimiter('Yahoo Finance', 60000, burst=500))
+        patcher = patch.object(self.price_service, '_find_crypto_id_by_symbol', side_effect=lambda s: CRYPTO_IDS.get(s.upper()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = AsyncPriceService(
+            self.price_service,
+            coingecko_url=f"{self.base_url}/coingecko",
+            yahoo_url=f"{self.base_url}/yahoo/chart",
+        )
+
+    def test_mixed_portfolio(self):
+        """Crypto is batched into one request; stocks take one chart request each"""
+        assets = [
+            {'symbol': 'BTC', 'asset_type': ASSET_TYPE_CRYPTO},
+            {'symbol': 'ETH', 'asset_type': ASSET_TYPE_CRYPTO},
+            {'symbol': 'AAPL', 'asset_type': ASSET_TYPE_US_STOCK},
+            {'symbol': 'TCS.NS', 'asset_type': ASSET_TYPE_INDIAN_STOCK},
+            {'symbol': 'MISSING', 'asset_type': ASSET_TYPE_US_STOCK},
+        ]
+
+        prices = asyncio.run(self.service.get_prices_for_assets(assets))
+
+        self.assertEqual(prices, {'BTC': 60000.0, 'ETH': 3000.0, 'AAPL': 190.5, 'TCS.NS': 3900.0})
+        self.assertEqual(self.server.paths.count('/coingecko/simple/price'), 1)
+        self.assertEqual(sorted(path for path in self.server.paths if path.startswith('/yahoo/')),
+                         ['/yahoo/chart/AAPL', '/yahoo/chart/MISSING', '/yahoo/chart/TCS.NS'])
+
+    def test_results_fill_shared_cache(self):
+        """Fetched prices land in the synchronous service's cache"""
+        asyncio.run(self.service.get_stock_prices(['AAPL']))
+        asyncio.run(self.service.get_stock_prices(['AAPL']))
+
+        self.assertEqual(self.server.paths, ['/yahoo/chart/AAPL'])
+        self.assertEqual(self.price_service.price_cache['AAPL']['price'], 190.5)
+
+    def test_stock_requests_match_the_chart_endpoint(self):
+        """Requests carry what Yahoo's chart endpoint needs: the ticker in the path and a browser user agent"""
+        self.assertEqual(asyncio.run(self.service.get_stock_prices(['TCS.NS'])), {'TCS.NS': 3900.0})
+
+        [(path, query, headers)] = self.server.requests
+        self.assertEqual(path, '/yahoo/chart/TCS.NS')
+        self.assertEqual(query, {'range': ['1d'], 'interval': ['1d']})
+        self.assertTrue(headers['User-Agent'].startswith('Mozilla/'))
+        self.assertEqual(self.service.yahoo_url, self.base_url + '/yahoo/chart')
+        self.assertTrue(YHOO_FINANCE_API_URL.endswith('/v8/finance/chart'))
+
+    def test_many_symbols_are_fetched_concurrently(self):
+        """Hundreds of tickers are fetched with overlapping chart requests, one Yahoo token each"""
+        self.server.delay = 0.05
+        symbols = [f"SYM{i}" for i in range(200)]
+
+        start = time.monotonic()
+        prices = asyncio.run(self.service.get_stock_prices(symbols))
+
+        self.assertEqual(len(prices), 200)
+        self.assertEqual(sorted(self.server.paths), sorted(f"/yahoo/chart/{symbol}" for symbol in symbols))
+        # One at a time would take 10 seconds
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_concurrent_lookups_coalesce(self):
+        """Overlapping async lookups for the same tickers share one upstream request"""
+        self.server.delay = 0.2
+
+        async def lookups():
+            return await asyncio.gather(
+                self.service.get_stock_prices(['AAPL', 'TCS.NS']),
+                self.service.get_stock_prices(['AAPL']),
+            )
+
+        results = asyncio.run(lookups())
+
+        self.assertEqual(results, [{'AAPL': 190.5, 'TCS.NS': 3900.0}, {'AAPL': 190.5}])
+        self.assertEqual(sorted(self.server.paths), ['/yahoo/chart/AAPL', '/yahoo/chart/TCS.NS'])
+
+    def test_waits_on_threaded_lookup_in_flight(self):
+        """An async lookup waits for a synchronous fetch of the same ticker instead of requesting it again"""
+        claimed, release = threading.Event(), threading.Event()
+
+        def slow_fetch(symbols):
+            claimed.set()
+            release.wait(5)
+            return {'AAPL': 191.0}
+
+        thread = threading.Thread(target=self.price_service._stock_flight.fetch, args=(['AAPL'], slow_fetch))
+        thread.start()
+        claimed.wait(5)
+        threading.Timer(0.1, release.set).start()
+
+        prices = asyncio.run(self.service.get_stock_prices(['AAPL']))
+        thread.join()
+
+        self.assertEqual(prices, {'AAPL': 191.0})
+        self.assertEqual(self.server.paths, [])
+
+
+class TestAsyncPriceRoutes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = _start_stub_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        self.client = self.app.test_client()
+
+        service = async_prices.async_price_service
+        service.price_service.clear_cache()
+        for attribute, value in (('coingecko_url', f"{self.base_url}/coingecko"), ('yahoo_url', f"{self.base_url}/yahoo/chart")):
+            patcher = patch.object(service, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(service.price_service, '_find_crypto_id_by_symbol', side_effect=lambda s: CRYPTO_IDS.get(s.upper()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(service.price_service.clear_cache)
+
+    def test_post_prices(self):
+        """POST /api/async/prices returns a symbol to price mapping"""
+        response = self.client.post('/api/async/prices', json={'assets': [
+            {'symbol': 'BTC', 'asset_type': ASSET_TYPE_CRYPTO},
+            {'symbol': 'AAPL', 'asset_type': ASSET_TYPE_US_STOCK},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'BTC': 60000.0, 'AAPL': 190.5})
+
+    def test_post_prices_requires_assets(self):
+        """An empty asset list is rejected"""
+        response = self.client.post('/api/async/prices', json={'assets': []})
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_single_price(self):
+        """GET /api/async/prices/<symbol> returns the price or 404"""
+        response = self.client.get('/api/async/prices/TCS.NS?type=Indian Stock')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'symbol': 'TCS.NS', 'price': 3900.0})
+
+        response = self.client.get('/api/async/prices/MISSING')
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from backend import create_app
+from backend.models import db, Asset, PortfolioAggregate, PortfolioSymbolAggregate
+from backend.services import aggregate_service
+from backend.config.settings import ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO
+
+
+class TestPortfolioAggregates(unittest.TestCase):
+    def setUp(self):
+        """Set up test client and in-memory database"""
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _add(self, symbol, asset_type, purchase_price, quantity):
+        response = self.client.post('/assets/', json={
+            'symbol': symbol, 'asset_type': asset_type, 'purchase_price': purchase_price,
+            'quantity': quantity, 'purchase_date': '2023-01-01'
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.json['id']
+
+    def _aggregates(self):
+        return self.client.get('/api/portfolio/aggregates').json
+
+    def _assert_matches_rebuild(self):
+        """Incremental totals equal a full recomputation from the asset table"""
+        incremental = self._aggregates()
+        with self.app.app_context():
+            aggregate_service.rebuild()
+        self.assertEqual(incremental, self._aggregates())
+
+    def test_create_update_delete(self):
+        first = self._add('AAPL', ASSET_TYPE_US_STOCK, 150.0, 2)
+        self._add('AAPL', ASSET_TYPE_US_STOCK, 170.0, 1)
+        self._add('MSFT', ASSET_TYPE_US_STOCK, 400.0, 1)
+        btc = self._add('BTC', ASSET_TYPE_CRYPTO, 40000.0, 0.5)
+
+        us = self._aggregates()['by_type'][ASSET_TYPE_US_STOCK]
+        self.assertEqual((us['lot_count'], us['symbol_count'], us['total_cost']), (3, 2, 870.0))
+
+        # Moving a lot to another symbol and type updates both sides
+        self.client.put(f'/assets/{first}', json={
+            'symbol': 'TCS.NS', 'asset_type': ASSET_TYPE_INDIAN_STOCK, 'purchase_price': 3500.0,
+            'quantity': 1, 'purchase_date': '2023-01-01'
+        })
+        aggregates = self._aggregates()
+        self.assertEqual(aggregates['by_type'][ASSET_TYPE_US_STOCK]['total_cost'], 570.0)
+        self.assertEqual(aggregates['by_type'][ASSET_TYPE_INDIAN_STOCK]['total_cost'], 3500.0)
+
+        self.client.delete(f'/assets/{btc}')
+        aggregates = self._aggregates()
+        self.assertNotIn(ASSET_TYPE_CRYPTO, aggregates['by_type'])
+        self.assertEqual(aggregates['total']['lot_count'], 3)
+        self._assert_matches_rebuild()
+
+    def test_bulk_delete(self):
+        ids = [self._add('AAPL', ASSET_TYPE_US_STOCK, 100.0, 1) for _ in range(3)]
+        self._add('MSFT', ASSET_TYPE_US_STOCK, 400.0, 1)
+
+        self.client.delete('/assets/', json={'ids': ids[:2] + [9999]})
+
+        us = self._aggregates()['by_type'][ASSET_TYPE_US_STOCK]
+        self.assertEqual((us['lot_count'], us['symbol_count'], us['total_cost']), (2, 2, 500.0))
+
+        self.client.delete('/assets/', json={'ids': [ids[2]]})
+        self.assertEqual(self._aggregates()['by_type'][ASSET_TYPE_US_STOCK]['symbol_count'], 1)
+        self._assert_matches_rebuild()
+
+    def test_ensure_built_fills_empty_tables(self):
+        """Assets written without going through the routes are picked up on startup"""
+        with self.app.app_context():
+            db.session.add(Asset(symbol='BTC', asset_type=ASSET_TYPE_CRYPTO, purchase_price=40000.0,
+                                 quantity=0.5, purchase_date=datetime(2023, 1, 1)))
+            db.session.commit()
+            aggregate_service.ensure_built()
+
+            self.assertEqual(PortfolioAggregate.query.one().total_cost, 20000.0)
+            self.assertEqual(PortfolioSymbolAggregate.query.one().symbol, 'BTC')
+
+    def test_failed_request_leaves_aggregates_untouched(self):
+        self._add('AAPL', ASSET_TYPE_US_STOCK, 100.0, 1)
+        response = self.client.post('/assets/', json={'symbol': 'AAPL', 'asset_type': ASSET_TYPE_US_STOCK})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._aggregates()['total']['lot_count'], 1)
+
+    def test_first_lot_upserts_existing_row(self):
+        """A first lot whose row another transaction just created adds to it instead of failing"""
+        created = datetime(2024, 1, 1)
+        with self.app.app_context():
+            db.session.add(PortfolioSymbolAggregate(asset_type=ASSET_TYPE_US_STOCK, symbol='AAPL', lot_count=1,
+                                                    total_quantity=1, total_cost=100.0, updated_at=created))
+            db.session.add(PortfolioAggregate(asset_type=ASSET_TYPE_US_STOCK, lot_count=1, symbol_count=1,
+                                              total_quantity=1, total_cost=100.0, updated_at=created))
+            db.session.commit()
+
+            aggregate_service._apply(ASSET_TYPE_US_STOCK, 'AAPL', 1, 2, 300.0)
+            db.session.commit()
+
+            row = PortfolioSymbolAggregate.query.one()
+            self.assertEqual((row.lot_count, row.total_quantity, row.total_cost), (2, 3, 400.0))
+            self.assertEqual(PortfolioAggregate.query.one().symbol_count, 1)
+            # The upsert's update path stamps the rows too
+            self.assertGreater(row.updated_at, created)
+            self.assertGreater(PortfolioAggregate.query.one().updated_at, created)
+
+    def test_dialects_without_upsert(self):
+        """Databases without ON CONFLICT fall back to update-then-insert with the same totals"""
+        with patch.dict(aggregate_service._UPSERT_INSERTS, clear=True):
+            first = self._add('AAPL', ASSET_TYPE_US_STOCK, 150.0, 2)
+            self._add('AAPL', ASSET_TYPE_US_STOCK, 170.0, 1)
+            self._add('BTC', ASSET_TYPE_CRYPTO, 40000.0, 0.5)
+            self.client.delete(f'/assets/{first}')
+
+            us = self._aggregates()['by_type'][ASSET_TYPE_US_STOCK]
+            self.assertEqual((us['lot_count'], us['symbol_count'], us['total_cost']), (1, 1, 170.0))
+            self._assert_matches_rebuild()
+
+
+if __name__ == '__main__':
+    unittest.main()
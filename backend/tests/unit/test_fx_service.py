@@ -0,0 +1,151 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, date, timedelta
+from unittest.mock import patch
+import pandas as pd
+from backend import create_app
+from backend.models import db, Asset, PriceHistory
+from backend.services.fx_service import FxService
+from backend.services.rate_limiter import TokenBucketRateLimiter
+from backend.services.price_store import get_price_store
+from backend.services.valuation_service import load_holdings
+from backend.config.settings import ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO
+
+
+def _download(closes):
+    """yf.download-shaped frame grouped by ticker"""
+    return pd.concat({ticker: pd.DataFrame({'Close': [None, close]}) for ticker, close in closes.items()}, axis=1)
+
+
+class TestFxService(unittest.TestCase):
+    def setUp(self):
+        self.fx = FxService(base_currency='INR', limiter=TokenBucketRateLimiter('test', 6000, burst=100))
+
+    @patch('backend.services.fx_service.yf.download')
+    def test_rates_are_fetched_in_one_batch_and_cached(self, mock_download):
+        mock_download.return_value = _download({'USDINR=X': 83.0, 'EURINR=X': 90.0})
+
+        self.assertEqual(self.fx.get_rates(['USD', 'EUR', 'INR']), {'USD': 83.0, 'EUR': 90.0, 'INR': 1.0})
+        self.assertEqual(self.fx.get_rates(['USD']), {'USD': 83.0})
+
+        mock_download.assert_called_once()
+        self.assertEqual(mock_download.call_args.kwargs['tickers'], ['EURINR=X', 'USDINR=X'])
+
+    @patch('backend.services.fx_service.yf.download')
+    def test_failed_refresh_serves_expired_rate(self, mock_download):
+        mock_download.return_value = _download({'USDINR=X': 83.0})
+        self.fx.get_rates(['USD'])
+
+        self.fx.cache_duration = 0
+        mock_download.side_effect = Exception("network down")
+        self.assertEqual(self.fx.get_rates(['USD']), {'USD': 83.0})
+
+        # A currency that was never fetched has no rate and is not retried right away
+        self.assertEqual(self.fx.get_rates(['EUR']), {'EUR': None})
+        calls = mock_download.call_count
+        self.fx.get_rates(['EUR'])
+        self.assertEqual(mock_download.call_count, calls)
+
+
+class TestCurrencyNormalization(unittest.TestCase):
+    def setUp(self):
+        """Set up an app with FX conversion enabled and lots in INR, USD and USD-quoted crypto"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'FX_CONVERSION_ENABLED': True,
+            'PRICE_STORE_DIR': self.tmpdir,
+        })
+        self.client = self.app.test_client()
+        purchase_date = datetime(2023, 1, 1)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([
+                Asset(symbol='TCS.NS', asset_type=ASSET_TYPE_INDIAN_STOCK, purchase_price=3500.0, quantity=1,
+                      purchase_date=purchase_date, last_price=4000.0),
+                # Stored last prices are already in the base currency
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=12000.0, quantity=2,
+                      purchase_date=purchase_date, last_price=11000.0),
+                Asset(symbol='BTC', asset_type=ASSET_TYPE_CRYPTO, purchase_price=2000000.0, quantity=0.5,
+                      purchase_date=purchase_date),
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_lot_rates(self):
+        fx = FxService(base_currency='INR')
+        with patch.object(fx, 'get_rates', return_value={'INR': 1.0, 'USD': 80.0}) as mock_rates, \
+                self.app.app_context():
+            rates, _ = fx.lot_rates(load_holdings())
+
+        self.assertEqual(rates.tolist(), [1.0, 80.0, 80.0])
+        self.assertEqual(sorted(mock_rates.call_args.args[0]), ['INR', 'USD', 'USD'])
+
+    def _summary(self, rates, live_prices):
+        with patch('backend.routes.portfolio.fx_service.get_rates', return_value=rates), \
+                patch('backend.routes.portfolio.price_service.get_prices_for_assets', return_value=live_prices):
+            return self.client.get('/api/portfolio/summary').json
+
+    def test_summary_converts_quotes_but_not_purchase_or_stored_prices(self):
+        summary = self._summary({'INR': 1.0, 'USD': 80.0}, {'AAPL': 150.0})
+
+        by_symbol = {asset['symbol']: asset for asset in summary['assets']}
+        self.assertEqual(by_symbol['AAPL']['current_price'], 150.0 * 80.0)
+        self.assertEqual(by_symbol['TCS.NS']['current_price'], 4000.0)
+        # Unpriced lots fall back to the purchase price, already in the base currency
+        self.assertEqual(by_symbol['BTC']['current_price'], 2000000.0)
+        self.assertEqual(summary['fx'], {'base': 'INR', 'rates': {'INR': 1.0, 'USD': 80.0}, 'unconverted': []})
+
+    def test_missing_rate_falls_back_to_stored_price_and_is_flagged(self):
+        summary = self._summary({'INR': 1.0, 'USD': None}, {'AAPL': 150.0, 'BTC': 30000.0})
+
+        by_symbol = {asset['symbol']: asset for asset in summary['assets']}
+        # A USD quote is never counted as INR: the stored INR price, else the cost, is used
+        self.assertEqual(by_symbol['AAPL']['current_price'], 11000.0)
+        self.assertEqual(by_symbol['BTC']['current_price'], 2000000.0)
+        self.assertEqual(by_symbol['TCS.NS']['current_price'], 4000.0)
+        self.assertEqual(summary['fx']['unconverted'], ['USD'])
+
+    def test_convert_prices(self):
+        fx = FxService(base_currency='INR')
+        with patch.object(fx, 'get_rates', return_value={'INR': 1.0, 'USD': None}):
+            self.assertEqual(fx.convert_prices({'TCS.NS': 4000.0, 'AAPL': 150.0},
+                                               {'TCS.NS': ASSET_TYPE_INDIAN_STOCK, 'AAPL': ASSET_TYPE_US_STOCK}),
+                             {'TCS.NS': 4000.0})
+
+    def test_history_based_analytics_convert_stored_quotes(self):
+        today = datetime.combine(date.today(), datetime.min.time())
+        with self.app.app_context():
+            db.session.add_all([
+                PriceHistory(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, price=price, timestamp=today - timedelta(days=back))
+                for back, price in ((2, 140.0), (1, 145.0), (0, 150.0))
+            ])
+            db.session.commit()
+            get_price_store(self.app).sync()
+
+        with patch('backend.routes.portfolio.fx_service.get_rates', return_value={'INR': 1.0, 'USD': 80.0}):
+            curve = self.client.get('/api/portfolio/value-history').json
+            risk = self.client.get('/api/portfolio/risk?days=2').json
+
+        # TCS.NS and BTC have no history and count at cost
+        self.assertEqual(curve['value'][-1], 3500.0 + 2 * 150.0 * 80.0 + 0.5 * 2000000.0)
+        self.assertEqual(curve['fx']['rates'], {'INR': 1.0, 'USD': 80.0})
+        aapl = next(asset for asset in risk['assets'] if asset['symbol'] == 'AAPL')
+        self.assertEqual(aapl['value'], 2 * 150.0 * 80.0)
+        self.assertEqual(risk['fx']['unconverted'], [])
+
+    def test_conversion_is_off_by_default_in_tests(self):
+        app = create_app(config_override={'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.assertFalse(app.config['FX_CONVERSION_ENABLED'])
+
+
+if __name__ == '__main__':
+    unittest.main()
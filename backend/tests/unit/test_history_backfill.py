@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, date
+from backend import create_app
+from backend.models import db, Asset, PriceHistory
+from backend.services.history_backfill import HistoryBackfill, FixtureHistorySource, provider_ticker
+from backend.config.settings import ASSET_TYPE_CRYPTO, ASSET_TYPE_US_STOCK, ASSET_TYPE_INDIAN_STOCK
+
+FIXTURE = {
+    'AAPL': {'2024-01-01': 180.0, '2024-01-02': 181.0, '2024-01-03': 182.0, '2024-01-04': 183.0},
+    'TCS.NS': {'2024-01-02': 3700.0, '2024-01-03': 3710.0, '2024-01-04': 3720.0},
+    'BTC-USD': {'2024-01-02': 45000.0, '2024-01-03': 46000.0, '2024-01-04': 47000.0},
+}
+
+
+class _FailingSource(FixtureHistorySource):
+    """Fixture source that fails after a number of downloads"""
+    def __init__(self, path, fail_after):
+        super().__init__(path)
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def daily_closes(self, tickers, start, end):
+        self.calls += 1
+        if self.calls > self.fail_after:
+            raise ConnectionError('connection reset')
+        return super().daily_closes(tickers, start, end)
+
+
+class TestHistoryBackfill(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database with holdings and a recorded fixture"""
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.fixture_path = os.path.join(self.tmpdir, 'prices.json')
+        self.checkpoint_path = os.path.join(self.tmpdir, 'checkpoint.json')
+        with open(self.fixture_path, 'w') as f:
+            json.dump(FIXTURE, f)
+
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=170.0, quantity=1, purchase_date=datetime(2024, 1, 2)),
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=160.0, quantity=1, purchase_date=datetime(2024, 1, 1)),
+                Asset(symbol='TCS.NS', asset_type=ASSET_TYPE_INDIAN_STOCK, purchase_price=3500.0, quantity=1, purchase_date=datetime(2024, 1, 3)),
+                Asset(symbol='BTC', asset_type=ASSET_TYPE_CRYPTO, purchase_price=40000.0, quantity=1, purchase_date=datetime(2024, 1, 2)),
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _backfill(self, source=None, chunk_size=10):
+        return HistoryBackfill(self.app, source or FixtureHistorySource(self.fixture_path),
+                               checkpoint_path=self.checkpoint_path, chunk_size=chunk_size)
+
+    def _history(self):
+        with self.app.app_context():
+            return sorted((row.symbol, row.timestamp.date().isoformat(), row.price) for row in PriceHistory.query)
+
+    def test_provider_ticker(self):
+        self.assertEqual(provider_ticker('BTC', ASSET_TYPE_CRYPTO), 'BTC-USD')
+        self.assertEqual(provider_ticker('TCS.NS', ASSET_TYPE_INDIAN_STOCK), 'TCS.NS')
+
+    def test_backfills_from_earliest_purchase_date(self):
+        """Each symbol starts at its first purchase; crypto is stored under the held symbol"""
+        inserted = self._backfill().run(until=date(2024, 1, 3))
+
+        self.assertEqual(inserted, 6)
+        history = self._history()
+        self.assertIn(('AAPL', '2024-01-01', 180.0), history)
+        self.assertIn(('BTC', '2024-01-02', 45000.0), history)
+        self.assertEqual([row for row in history if row[0] == 'TCS.NS'], [('TCS.NS', '2024-01-03', 3710.0)])
+
+    def test_rerun_is_incremental_and_skips_existing_rows(self):
+        self._backfill().run(until=date(2024, 1, 3))
+        self.assertEqual(self._backfill().run(until=date(2024, 1, 3)), 0)
+
+        # Checkpoint lost: existing rows are still not duplicated
+        os.remove(self.checkpoint_path)
+        self.assertEqual(self._backfill().run(until=date(2024, 1, 4)), 3)
+        self.assertEqual(len(self._history()), 9)
+
+    def test_interrupted_run_resumes(self):
+        """Chunks committed before a failure are not downloaded again"""
+        with self.assertRaises(ConnectionError):
+            self._backfill(_FailingSource(self.fixture_path, fail_after=1), chunk_size=1).run(until=date(2024, 1, 3))
+        with open(self.checkpoint_path) as f:
+            self.assertEqual(len(json.load(f)), 1)
+
+        source = _FailingSource(self.fixture_path, fail_after=10)
+        self._backfill(source, chunk_size=1).run(until=date(2024, 1, 3))
+
+        self.assertEqual(source.calls, 2)
+        self.assertEqual(len(self._history()), 6)
+
+    def test_earlier_lot_is_backfilled_before_covered_range(self):
+        """A lot bought before the backfilled range fills the missing days in front of it"""
+        self._backfill().run(until=date(2024, 1, 3))
+        with self.app.app_context():
+            db.session.add(Asset(symbol='TCS.NS', asset_type=ASSET_TYPE_INDIAN_STOCK, purchase_price=3400.0,
+                                 quantity=1, purchase_date=datetime(2024, 1, 2)))
+            db.session.commit()
+
+        self.assertEqual(self._backfill().run(until=date(2024, 1, 3)), 1)
+        self.assertIn(('TCS.NS', '2024-01-02', 3700.0), self._history())
+        with open(self.checkpoint_path) as f:
+            self.assertEqual(json.load(f)['TCS.NS'], {'first': '2024-01-02', 'last': '2024-01-03'})
+
+    def test_reads_last_date_checkpoint(self):
+        """Checkpoints that only recorded the last date are rechecked from the first purchase"""
+        with open(self.checkpoint_path, 'w') as f:
+            json.dump({'AAPL': '2024-01-03', 'TCS.NS': '2024-01-03', 'BTC': '2024-01-03'}, f)
+
+        # Every day except the checkpointed 2024-01-03
+        self.assertEqual(self._backfill().run(until=date(2024, 1, 4)), 6)
+        self.assertNotIn('2024-01-03', {day for _, day, _ in self._history()})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from statistics import NormalDist
+from unittest.mock import patch
+import numpy as np
+from backend import create_app
+from backend.models import db, Asset, PriceHistory
+from backend.services.price_store import get_price_store
+from backend.services.monte_carlo_service import MonteCarloEngine, simulate_chunk, histogram_percentiles
+from backend.config.settings import ASSET_TYPE_US_STOCK
+
+
+class TestSimulationKernel(unittest.TestCase):
+    def test_gbm_percentiles_match_lognormal(self):
+        drift, volatility, bins = 0.001, 0.02, 4000
+        checkpoints = np.array([1, 10, 30])
+        spread = 10 * volatility * np.sqrt(checkpoints)
+        low, width = drift * checkpoints - spread, 2 * spread / bins
+
+        counts, sums = simulate_chunk('gbm', drift, volatility, np.empty(0), checkpoints, low, width,
+                                      bins, 200000, np.random.SeedSequence(1))
+        bands = histogram_percentiles(counts, low, width, (5, 50, 95))
+
+        self.assertTrue((counts.sum(axis=1) == 200000).all())
+        for percentile, band in bands.items():
+            expected = drift * checkpoints + NormalDist().inv_cdf(percentile / 100) * volatility * np.sqrt(checkpoints)
+            np.testing.assert_allclose(band, expected, atol=0.01 * volatility * np.sqrt(checkpoints).max())
+        np.testing.assert_allclose(sums / 200000, np.exp((drift + volatility ** 2 / 2) * checkpoints), rtol=0.01)
+
+    def test_bootstrap_only_draws_observed_returns(self):
+        history = np.log1p(np.array([-0.01, 0.02]))
+        checkpoints = np.array([1])
+        counts, _ = simulate_chunk('bootstrap', 0.0, 0.01, history, checkpoints, np.array([-0.05]),
+                                   np.array([0.001]), 100, 1000, np.random.SeedSequence(2))
+        self.assertEqual(np.count_nonzero(counts[0]), 2)
+
+
+class TestMonteCarloEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = MonteCarloEngine(max_workers=1, chunk_paths=5000, bins=1000)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.shutdown()
+
+    def setUp(self):
+        """Set up an in-memory database with one holding and sixty days of prices"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'PRICE_STORE_DIR': self.tmpdir,
+        })
+        self.client = self.app.test_client()
+        prices = 100.0 * np.cumprod(1 + np.random.default_rng(0).normal(0.0005, 0.01, 60))
+        start = datetime.combine(datetime.now().date(), datetime.min.time()) - timedelta(days=59)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=100.0,
+                                 quantity=10, purchase_date=datetime(2023, 1, 1)))
+            db.session.add_all([
+                PriceHistory(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, price=float(price),
+                             timestamp=start + timedelta(days=offset, hours=12))
+                for offset, price in enumerate(prices)
+            ])
+            db.session.commit()
+        self.prices = prices
+        self.start = start
+        self.last_price = float(prices[-1])
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _submit(self, **kwargs):
+        with self.app.app_context():
+            # Stands in for the background sync after each history flush
+            get_price_store(self.app).sync()
+            return self.engine.submit(get_price_store(self.app), lookback_days=59, **kwargs)
+
+    def test_job_completes_with_percentile_bands(self):
+        job = self.engine.wait(self._submit(horizon_days=30, paths=12000, seed=7)['id'], timeout=60)
+
+        self.assertEqual((job['status'], job['progress']), ('completed', 1.0))
+        result = job['result']
+        self.assertAlmostEqual(result['start_value'], 10 * self.last_price)
+        self.assertEqual(result['days'], list(range(1, 31)))
+        bands = [result['percentiles'][key] for key in ('5', '25', '50', '75', '95')]
+        for lower, upper in zip(bands, bands[1:]):
+            self.assertTrue(all(a <= b for a, b in zip(lower, upper)))
+
+        # Chunks are seeded from one SeedSequence, so a seeded run is reproducible
+        again = self.engine.wait(self._submit(horizon_days=30, paths=12000, seed=7)['id'], timeout=60)
+        self.assertEqual(again['result'], result)
+
+    def test_cancel_drops_queued_chunks(self):
+        job = self._submit(horizon_days=365, paths=500000, model='bootstrap')
+        cancelled = self.engine.cancel(job['id'])
+
+        self.assertEqual(cancelled['status'], 'cancelled')
+        self.assertLess(cancelled['progress'], 1.0)
+        self.assertNotIn('result', self.engine.wait(job['id'], timeout=5))
+
+    def test_unseeded_run_reports_a_json_safe_seed(self):
+        job = self._submit(horizon_days=5, paths=1000)
+        self.engine.cancel(job['id'])
+
+        self.assertIsInstance(job['seed'], int)
+        self.assertLessEqual(job['seed'], 2 ** 53 - 1)
+
+    def test_calibrates_on_days_every_symbol_has_a_return(self):
+        """A symbol first priced mid-window shortens the history instead of adding flat days"""
+        msft = [300.0, 310.0, 305.0]
+        with self.app.app_context():
+            db.session.add(Asset(symbol='MSFT', asset_type=ASSET_TYPE_US_STOCK, purchase_price=300.0,
+                                 quantity=1, purchase_date=datetime(2023, 1, 1)))
+            db.session.add_all([
+                PriceHistory(symbol='MSFT', asset_type=ASSET_TYPE_US_STOCK, price=price,
+                             timestamp=self.start + timedelta(days=57 + offset, hours=12))
+                for offset, price in enumerate(msft)
+            ])
+            db.session.commit()
+
+        job = self.engine.wait(self._submit(horizon_days=5, paths=1000)['id'], timeout=60)
+
+        exposure = np.array([10 * self.prices[-1], msft[-1]])
+        returns = np.column_stack([self.prices[-3:], msft])
+        history = np.log1p((returns[1:] / returns[:-1] - 1) @ exposure / exposure.sum())
+        self.assertAlmostEqual(job['result']['daily_drift'], history.mean())
+        self.assertAlmostEqual(job['result']['daily_volatility'], history.std(ddof=1))
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            self._submit(seed=2 ** 64)
+        with self.assertRaises(ValueError):
+            self._submit(model='garch')
+        with self.assertRaises(ValueError):
+            self._submit(paths=0)
+
+    def test_routes(self):
+        with patch('backend.routes.portfolio.monte_carlo_engine', self.engine):
+            response = self.client.post('/api/portfolio/monte-carlo', json={'horizon_days': 5, 'paths': 1000, 'lookback_days': 59})
+            self.assertEqual(response.status_code, 202)
+            self.engine.wait(response.json['id'], timeout=60)
+
+            job = self.client.get(f"/api/portfolio/monte-carlo/{response.json['id']}").json
+            self.assertEqual(job['status'], 'completed')
+            self.assertEqual(self.client.delete(f"/api/portfolio/monte-carlo/{job['id']}").json['status'], 'completed')
+
+            self.assertEqual(self.client.post('/api/portfolio/monte-carlo', json={'paths': 'many'}).status_code, 400)
+            self.assertEqual(self.client.get('/api/portfolio/monte-carlo/unknown').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
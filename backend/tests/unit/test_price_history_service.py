@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime
+from backend import create_app
+from backend.models import db, PriceHistory
+from backend.services import price_history_service
+from backend.config.settings import ASSET_TYPE_CRYPTO, ASSET_TYPE_US_STOCK
+
+
+class TestPriceHistoryService(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database with ticks across two days"""
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        self.client = self.app.test_client()
+        ticks = [
+            ('AAPL', ASSET_TYPE_US_STOCK, 100.0, datetime(2024, 1, 1, 9, 30)),
+            ('AAPL', ASSET_TYPE_US_STOCK, 104.0, datetime(2024, 1, 1, 10, 15)),
+            ('AAPL', ASSET_TYPE_US_STOCK, 98.0, datetime(2024, 1, 1, 10, 45)),
+            ('AAPL', ASSET_TYPE_US_STOCK, 101.0, datetime(2024, 1, 1, 15, 0)),
+            ('AAPL', ASSET_TYPE_US_STOCK, 110.0, datetime(2024, 1, 2, 9, 30)),
+            ('BTC', ASSET_TYPE_CRYPTO, 42000.0, datetime(2024, 1, 1, 0, 5)),
+        ]
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([
+                PriceHistory(symbol=symbol, asset_type=asset_type, price=price, timestamp=timestamp)
+                for symbol, asset_type, price, timestamp in ticks
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _candles(self, symbols, interval):
+        with self.app.app_context():
+            return price_history_service.get_ohlc(symbols, interval, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    def test_daily_candles(self):
+        """Open/close are the first/last tick of the day, high/low the extremes"""
+        candles = self._candles(['AAPL'], '1d')['AAPL']
+
+        self.assertEqual(candles, [
+            {'time': '2024-01-01T00:00:00', 'open': 100.0, 'high': 104.0, 'low': 98.0, 'close': 101.0, 'count': 4},
+            {'time': '2024-01-02T00:00:00', 'open': 110.0, 'high': 110.0, 'low': 110.0, 'close': 110.0, 'count': 1},
+        ])
+
+    def test_hourly_candles(self):
+        candles = self._candles(['AAPL'], '1h')['AAPL']
+
+        self.assertEqual([c['time'] for c in candles],
+                         ['2024-01-01T09:00:00', '2024-01-01T10:00:00', '2024-01-01T15:00:00', '2024-01-02T09:00:00'])
+        self.assertEqual((candles[1]['open'], candles[1]['close']), (104.0, 98.0))
+
+    def test_weekly_candles_start_on_monday(self):
+        """2024-01-01 is a Monday, so both days share one weekly candle"""
+        candles = self._candles(['AAPL'], '1w')['AAPL']
+
+        self.assertEqual(len(candles), 1)
+        self.assertEqual(candles[0]['time'], '2024-01-01T00:00:00')
+        self.assertEqual((candles[0]['open'], candles[0]['close'], candles[0]['count']), (100.0, 110.0, 5))
+
+    def test_multiple_symbols(self):
+        series = self._candles(['AAPL', 'BTC', 'ETH'], '1d')
+
+        self.assertEqual(len(series['AAPL']), 2)
+        self.assertEqual(series['BTC'][0]['close'], 42000.0)
+        self.assertEqual(series['ETH'], [])
+
+    def test_range_validation(self):
+        with self.app.app_context():
+            with self.assertRaises(ValueError):
+                price_history_service.get_ohlc(['AAPL'], '5m')
+            with self.assertRaises(ValueError):
+                price_history_service.get_ohlc(['AAPL'], '1m', datetime(2020, 1, 1), datetime(2024, 1, 1))
+
+    def test_history_routes(self):
+        response = self.client.get('/api/prices/AAPL/history?interval=1d&from=2024-01-01&to=2024-01-03')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['candles']), 2)
+
+        response = self.client.get('/api/prices/history?symbols=AAPL,BTC&interval=1d&from=2024-01-01&to=2024-01-03')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.json['series']), ['AAPL', 'BTC'])
+
+        response = self.client.get('/api/prices/AAPL/history?from=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
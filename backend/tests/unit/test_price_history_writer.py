@@ -0,0 +1,119 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from backend import create_app
+from backend.models import db, PriceHistory
+from backend.services import symbol_service
+from backend.services.price_history_writer import PriceHistoryWriter
+from backend.services.price_service import PriceService, FETCH_MODE_SERIAL
+from backend.config.settings import ASSET_TYPE_CRYPTO, ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK
+from backend.tests.unit.test_price_service import _coingecko_response, _yahoo_frame
+
+
+class TestPriceHistoryWriter(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database and a writer whose loop is not started"""
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        with self.app.app_context():
+            db.create_all()
+        self.writer = PriceHistoryWriter(self.app, flush_size=3)
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _history(self):
+        with self.app.app_context():
+            return [(row.symbol, row.asset_type, row.price) for row in PriceHistory.query.order_by(PriceHistory.id)]
+
+    def test_record_does_not_touch_the_database(self):
+        """Quotes stay buffered until a flush"""
+        self.writer.record('AAPL', ASSET_TYPE_US_STOCK, 190.0)
+
+        self.assertEqual(self.writer.pending(), 1)
+        self.assertEqual(self._history(), [])
+
+    def test_flush_writes_buffer_in_one_insert(self):
+        now = datetime.now()
+        self.writer.record('AAPL', ASSET_TYPE_US_STOCK, 190.0, now)
+        self.writer.record('BTC', ASSET_TYPE_CRYPTO, 60000.0, now)
+
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(self.writer.pending(), 0)
+        self.assertEqual(self._history(), [('AAPL', ASSET_TYPE_US_STOCK, 190.0), ('BTC', ASSET_TYPE_CRYPTO, 60000.0)])
+
+    def test_size_trigger_wakes_the_flush_loop(self):
+        """Reaching flush_size flushes without waiting for the interval"""
+        self.writer.flush_interval = 60
+        self.writer.start()
+        self.addCleanup(self.writer.stop, 2)
+
+        for price in (1.0, 2.0, 3.0):
+            self.writer.record('AAPL', ASSET_TYPE_US_STOCK, price)
+        for _ in range(100):
+            if len(self._history()) == 3:
+                break
+            self.writer._stop_event.wait(0.02)
+
+        self.assertEqual(len(self._history()), 3)
+
+    def test_failed_flush_keeps_rows(self):
+        """Rows are put back in the buffer when the insert fails"""
+        self.writer.record('AAPL', ASSET_TYPE_US_STOCK, 190.0)
+        with patch.object(db.session, 'execute', side_effect=RuntimeError('database is locked')):
+            self.assertEqual(self.writer.flush(), 0)
+
+        self.assertEqual(self.writer.pending(), 1)
+        self.assertEqual(self.writer.flush(), 1)
+
+    @patch('backend.services.price_service.requests.get')
+    @patch('backend.services.price_service.yf.download')
+    def test_price_service_records_fresh_quotes_only(self, mock_download, mock_get):
+        """Fetched quotes are recorded under the held symbol; cache hits are not"""
+        mock_download.return_value = _yahoo_frame({'AAPL': [190.0], 'TCS.NS': [3900.0]})
+        mock_get.return_value = _coingecko_response({'bitcoin': {'usd': 60000.0}})
+        service = PriceService(fetch_mode=FETCH_MODE_SERIAL, history_writer=self.writer)
+        service._find_crypto_id_by_symbol = lambda symbol: 'bitcoin'
+        assets = [
+            {'symbol': 'AAPL', 'asset_type': ASSET_TYPE_US_STOCK},
+            {'symbol': 'TCS.NS', 'asset_type': ASSET_TYPE_INDIAN_STOCK},
+            {'symbol': 'BTC', 'asset_type': ASSET_TYPE_CRYPTO},
+        ]
+
+        service.get_prices_for_assets(assets)
+        service.get_prices_for_assets(assets)
+        self.writer.flush()
+
+        self.assertEqual(sorted(self._history()), [
+            ('AAPL', ASSET_TYPE_US_STOCK, 190.0),
+            ('BTC', ASSET_TYPE_CRYPTO, 60000.0),
+            ('TCS.NS', ASSET_TYPE_INDIAN_STOCK, 3900.0),
+        ])
+
+    @patch('backend.services.price_service.requests.get')
+    def test_crypto_quotes_are_recorded_under_the_coin_symbol(self, mock_get):
+        """Quotes fetched by CoinGecko ID, not through held assets, still get the coin's symbol"""
+        mock_get.return_value = _coingecko_response({
+            'pepe': {'usd': 0.00001}, 'solana': {'usd': 150.0}, 'unlisted-coin': {'usd': 1.0}
+        })
+        service = PriceService(fetch_mode=FETCH_MODE_SERIAL, history_writer=self.writer)
+
+        with patch.object(symbol_service, '_crypto',
+                          symbol_service._CryptoSnapshot([{'id': 'pepe', 'symbol': 'pepe', 'name': 'Pepe'}])):
+            service.get_crypto_prices(['pepe', 'solana', 'unlisted-coin'])
+        self.writer.flush()
+
+        self.assertEqual(sorted(self._history()), [
+            ('PEPE', ASSET_TYPE_CRYPTO, 0.00001),
+            ('SOL', ASSET_TYPE_CRYPTO, 150.0),
+            ('UNLISTED-COIN', ASSET_TYPE_CRYPTO, 1.0),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime
+from backend import create_app
+from backend.models import db, Asset
+from backend.services.fx_service import FxService
+from backend.services.price_refresher import PriceRefresher
+from backend.config.settings import ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO
+
+
+class _FakePriceService:
+    """Records the batches it is asked to price"""
+    def __init__(self, prices):
+        self.prices = prices
+        self.batches = []
+
+    def get_prices_for_assets(self, assets):
+        self.batches.append([asset['symbol'] for asset in assets])
+        return {asset['symbol']: self.prices[asset['symbol']] for asset in assets if asset['symbol'] in self.prices}
+
+
+class TestPriceRefresher(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database with a few holdings"""
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        with self.app.app_context():
+            db.create_all()
+            purchase_date = datetime.strptime('2023-01-01', '%Y-%m-%d')
+            db.session.add_all([
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=150.0, quantity=2, purchase_date=purchase_date),
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=160.0, quantity=1, purchase_date=purchase_date),
+                Asset(symbol='TCS.NS', asset_type=ASSET_TYPE_INDIAN_STOCK, purchase_price=3500.0, quantity=5, purchase_date=purchase_date),
+                Asset(symbol='BTC', asset_type=ASSET_TYPE_CRYPTO, purchase_price=40000.0, quantity=0.5, purchase_date=purchase_date),
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_refresh_updates_last_price_columns(self):
+        """Every lot of a refreshed symbol gets the new price and timestamp"""
+        service = _FakePriceService({'AAPL': 190.0, 'TCS.NS': 3900.0, 'BTC': 60000.0})
+        refresher = PriceRefresher(self.app, service, batch_pause=0)
+
+        updated = refresher.refresh_once()
+
+        self.assertEqual(updated, 4)
+        with self.app.app_context():
+            for asset in Asset.query.all():
+                self.assertIsNotNone(asset.last_price_updated)
+            self.assertEqual({a.last_price for a in Asset.query.filter_by(symbol='AAPL')}, {190.0})
+            self.assertEqual(Asset.query.filter_by(symbol='BTC').one().last_price, 60000.0)
+
+    def test_distinct_symbols_are_priced_in_batches(self):
+        """Duplicate holdings are priced once and symbols are split into batches"""
+        service = _FakePriceService({'AAPL': 190.0})
+        refresher = PriceRefresher(self.app, service, batch_size=2, batch_pause=0)
+
+        refresher.refresh_once()
+
+        self.assertEqual([len(batch) for batch in service.batches], [2, 1])
+        self.assertEqual(sorted(sum(service.batches, [])), ['AAPL', 'BTC', 'TCS.NS'])
+
+    def test_quotes_are_stored_in_the_base_currency(self):
+        """With an FX service, USD quotes are converted and quotes without a rate are not stored"""
+        fx_service = FxService(base_currency='INR')
+        service = _FakePriceService({'AAPL': 190.0, 'TCS.NS': 3900.0, 'BTC': 60000.0})
+        refresher = PriceRefresher(self.app, service, fx_service=fx_service, batch_pause=0)
+
+        with patch.object(fx_service, 'get_rates', return_value={'INR': 1.0, 'USD': 80.0}):
+            self.assertEqual(refresher.refresh_once(), 4)
+        with patch.object(fx_service, 'get_rates', return_value={'INR': 1.0, 'USD': None}):
+            service.prices = {'AAPL': 200.0, 'TCS.NS': 4000.0}
+            self.assertEqual(refresher.refresh_once(), 1)
+
+        with self.app.app_context():
+            self.assertEqual({a.last_price for a in Asset.query.filter_by(symbol='AAPL')}, {190.0 * 80.0})
+            self.assertEqual(Asset.query.filter_by(symbol='BTC').one().last_price, 60000.0 * 80.0)
+            self.assertEqual(Asset.query.filter_by(symbol='TCS.NS').one().last_price, 4000.0)
+
+    def test_missing_prices_leave_rows_untouched(self):
+        """Symbols without a price keep their previous values"""
+        refresher = PriceRefresher(self.app, _FakePriceService({}), batch_pause=0)
+
+        self.assertEqual(refresher.refresh_once(), 0)
+        with self.app.app_context():
+            self.assertTrue(all(asset.last_price is None for asset in Asset.query.all()))
+
+    def test_not_started_while_testing(self):
+        """create_app does not start the background thread in testing mode"""
+        self.assertNotIn('price_refresher', self.app.extensions)
+
+
+if __name__ == '__main__':
+    unittest.main()
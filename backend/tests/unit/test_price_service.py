@@ -0,0 +1,480 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+import pandas as pd
+from backend.services.price_service import PriceService, FETCH_MODE_SERIAL
+from backend.services.price_fetch_engine import PriceFetchEngine, remaining_budget
+from backend.services.rate_limiter import TokenBucketRateLimiter
+from backend.services.price_cache import SQLitePriceCache, InMemoryPriceCache, create_price_cache
+from backend.services.single_flight import SingleFlight
+from backend.config.settings import ASSET_TYPE_CRYPTO, ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, RATE_LIMIT_MAX_WAIT
+
+
+def _coingecko_response(payload, status_code=200, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.headers = headers or {}
+    return response
+
+
+def _yahoo_frame(closes):
+    """Build a yf.download(group_by='ticker') style frame from {ticker: [close, ...]}"""
+    index = pd.date_range('2024-01-01', periods=max(len(v) for v in closes.values()))
+    columns = pd.MultiIndex.from_product([list(closes), ['Open', 'Close']])
+    frame = pd.DataFrame(index=index, columns=columns, dtype=float)
+    for ticker, values in closes.items():
+        frame.loc[index[:len(values)], (ticker, 'Close')] = values
+    return frame
+
+
+class TestPriceServiceCryptoBatching(unittest.TestCase):
+    def setUp(self):
+        """Create a fresh service with a known crypto id mapping"""
+        self.service = PriceService()
+        id_map = {'BTC': 'bitcoin', 'ETH': 'ethereum', 'SOL': 'solana'}
+        patcher = patch.object(self.service, '_find_crypto_id_by_symbol', side_effect=lambda s: id_map.get(s.upper()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('backend.services.price_service.requests.get')
+    def test_single_request_for_all_coins(self, mock_get):
+        """All uncached coins are priced with one comma-separated ids= request"""
+        mock_get.return_value = _coingecko_response({
+            'bitcoin': {'usd': 60000.0},
+            'ethereum': {'usd': 3000.0},
+            'solana': {'usd': 150.0},
+        })
+        assets = [
+            {'symbol': 'BTC', 'asset_type': ASSET_TYPE_CRYPTO},
+            {'symbol': 'ETH', 'asset_type': ASSET_TYPE_CRYPTO},
+            {'symbol': 'SOL', 'asset_type': ASSET_TYPE_CRYPTO},
+        ]
+
+        prices = self.service.get_prices_for_assets(assets)
+
+        self.assertEqual(prices, {'BTC': 60000.0, 'ETH': 3000.0, 'SOL': 150.0})
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args.kwargs['params']['ids'], 'bitcoin,ethereum,solana')
+
+    @patch('backend.services.price_service.requests.get')
+    def test_cached_coins_are_not_requested(self, mock_get):
+        """Only cache misses are sent upstream"""
+        self.service.price_cache['bitcoin'] = {'price': 59000.0, 'timestamp': datetime.now()}
+        mock_get.return_value = _coingecko_response({'ethereum': {'usd': 3000.0}})
+
+        prices = self.service.get_crypto_prices(['bitcoin', 'ethereum'])
+
+        self.assertEqual(prices, {'bitcoin': 59000.0, 'ethereum': 3000.0})
+        self.assertEqual(mock_get.call_args.kwargs['params']['ids'], 'ethereum')
+
+    @patch('backend.services.price_service.COINGECKO_BATCH_SIZE', 2)
+    @patch('backend.services.price_service.requests.get')
+    def test_requests_are_chunked(self, mock_get):
+        """IDs beyond the batch size are split across requests"""
+        mock_get.side_effect = [
+            _coingecko_response({'bitcoin': {'usd': 1.0}, 'ethereum': {'usd': 2.0}}),
+            _coingecko_response({'solana': {'usd': 3.0}}),
+        ]
+        prices = self.service.get_crypto_prices(['bitcoin', 'ethereum', 'solana'])
+
+        self.assertEqual(prices, {'bitcoin': 1.0, 'ethereum': 2.0, 'solana': 3.0})
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('backend.services.price_service.requests.get')
+    def test_rate_limited_batch_falls_back_to_expired_cache(self, mock_get):
+        """A 429 marks the service rate limited and serves stale prices"""
+        self.service.price_cache['bitcoin'] = {'price': 50000.0, 'timestamp': datetime.now() - timedelta(hours=2)}
+        mock_get.return_value = _coingecko_response({}, status_code=429)
+
+        prices = self.service.get_crypto_prices(['bitcoin', 'ethereum'])
+
+        self.assertEqual(prices, {'bitcoin': 50000.0})
+        self.assertTrue(self.service.coingecko_rate_limited)
+
+    @patch('backend.services.price_service.requests.get')
+    def test_get_crypto_price_uses_batch_path(self, mock_get):
+        """The single-coin lookup goes through the same cache and request path"""
+        mock_get.return_value = _coingecko_response({'bitcoin': {'usd': 61000.0}})
+
+        self.assertEqual(self.service.get_crypto_price('bitcoin'), 61000.0)
+        self.assertEqual(self.service.get_crypto_price('bitcoin'), 61000.0)
+        self.assertEqual(mock_get.call_count, 1)
+
+
+class TestPriceServiceStockBatching(unittest.TestCase):
+    def setUp(self):
+        self.service = PriceService()
+
+    @patch('backend.services.price_service.yf.download')
+    def test_single_download_for_all_stocks(self, mock_download):
+        """US and Indian tickers are fetched together in one download"""
+        mock_download.return_value = _yahoo_frame({'AAPL': [189.5, 190.25], 'TCS.NS': [3900.0]})
+        assets = [
+            {'symbol': 'AAPL', 'asset_type': ASSET_TYPE_US_STOCK},
+            {'symbol': 'TCS.NS', 'asset_type': ASSET_TYPE_INDIAN_STOCK},
+        ]
+
+        prices = self.service.get_prices_for_assets(assets)
+
+        self.assertEqual(prices, {'AAPL': 190.25, 'TCS.NS': 3900.0})
+        self.assertEqual(mock_download.call_count, 1)
+        self.assertEqual(mock_download.call_args.kwargs['tickers'], ['AAPL', 'TCS.NS'])
+
+    @patch('backend.services.price_service.yf.download')
+    def test_cached_and_missing_stocks(self, mock_download):
+        """Cached tickers are skipped and tickers without data are left out"""
+        self.service.price_cache['MSFT'] = {'price': 410.0, 'timestamp': datetime.now()}
+        mock_download.return_value = _yahoo_frame({'AAPL': [190.0], 'NOPE': [float('nan')]})
+
+        prices = self.service.get_stock_prices(['MSFT', 'AAPL', 'NOPE'])
+
+        self.assertEqual(prices, {'MSFT': 410.0, 'AAPL': 190.0})
+        self.assertEqual(mock_download.call_args.kwargs['tickers'], ['AAPL', 'NOPE'])
+        self.assertIn('AAPL', self.service.price_cache)
+
+    @patch('backend.services.price_service.yf.download')
+    def test_download_error_returns_no_prices(self, mock_download):
+        """Upstream failures are logged and yield no prices"""
+        mock_download.side_effect = RuntimeError('boom')
+
+        self.assertIsNone(self.service.get_stock_price('AAPL'))
+
+
+class TestPriceFetchEngine(unittest.TestCase):
+    def test_providers_run_concurrently(self):
+        """Jobs for different providers overlap instead of running back to back"""
+        engine = PriceFetchEngine({'a': (1, 5), 'b': (1, 5)})
+        self.addCleanup(engine.shutdown)
+
+        def slow(key):
+            time.sleep(0.2)
+            return {key: 1.0}
+
+        started = time.monotonic()
+        results = engine.run({'a': [lambda: slow('x')], 'b': [lambda: slow('y')]})
+
+        self.assertEqual(results, {'a': {'x': 1.0}, 'b': {'y': 1.0}})
+        self.assertLess(time.monotonic() - started, 0.35)
+
+    def test_deadline_returns_partial_results(self):
+        """A provider that misses its budget is left out instead of blocking"""
+        engine = PriceFetchEngine({'fast': (2, 5), 'slow': (1, 0.1)})
+        self.addCleanup(engine.shutdown)
+
+        def slow():
+            time.sleep(0.5)
+            return {'late': 1.0}
+
+        started = time.monotonic()
+        results = engine.run({'fast': [lambda: {'early': 2.0}], 'slow': [slow]})
+
+        self.assertEqual(results, {'fast': {'early': 2.0}, 'slow': {}})
+        self.assertLess(time.monotonic() - started, 0.4)
+
+    def test_failing_job_does_not_break_others(self):
+        """Exceptions in one job are logged and the other results are kept"""
+        engine = PriceFetchEngine({'a': (2, 5)})
+        self.addCleanup(engine.shutdown)
+
+        def broken():
+            raise RuntimeError('boom')
+
+        results = engine.run({'a': [broken, lambda: {'ok': 1.0}]})
+
+        self.assertEqual(results, {'a': {'ok': 1.0}})
+
+    def test_rate_limit_waits_and_queued_jobs_respect_the_budget(self):
+        """A job waiting for a token gives up at its deadline, and jobs still queued never run"""
+        engine = PriceFetchEngine({'a': (1, 0.2)})
+        self.addCleanup(engine.shutdown)
+        limiter = TokenBucketRateLimiter('test', 1, burst=1)
+        limiter.acquire()
+        ran = []
+
+        def rate_limited():
+            return {'x': 1.0} if limiter.acquire(timeout=remaining_budget(RATE_LIMIT_MAX_WAIT)) else {}
+
+        started = time.monotonic()
+        results = engine.run({'a': [rate_limited, lambda: ran.append(True) or {'y': 1.0}]})
+        elapsed = time.monotonic() - started
+        time.sleep(0.1)
+
+        self.assertEqual(results, {'a': {}})
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(ran, [])
+        self.assertEqual(remaining_budget(5.0), 5.0)
+
+
+class TestPriceServiceFetchModes(unittest.TestCase):
+    @patch('backend.services.price_service.yf.download')
+    @patch('backend.services.price_service.requests.get')
+    def test_serial_and_concurrent_modes_agree(self, mock_get, mock_download):
+        """Both fetch modes return the same prices for a mixed portfolio"""
+        mock_get.return_value = _coingecko_response({'bitcoin': {'usd': 60000.0}})
+        mock_download.return_value = _yahoo_frame({'AAPL': [190.0]})
+        assets = [
+            {'symbol': 'BTC', 'asset_type': ASSET_TYPE_CRYPTO},
+            {'symbol': 'AAPL', 'asset_type': ASSET_TYPE_US_STOCK},
+        ]
+
+        for service in (PriceService(), PriceService(fetch_mode=FETCH_MODE_SERIAL)):
+            with patch.object(service, '_find_crypto_id_by_symbol', return_value='bitcoin'):
+                self.assertEqual(service.get_prices_for_assets(assets), {'BTC': 60000.0, 'AAPL': 190.0})
+
+    def test_unknown_mode_falls_back_to_serial(self):
+        """An invalid mode setting does not break the service"""
+        service = PriceService(fetch_mode='bogus')
+        self.assertEqual(service.fetch_mode, FETCH_MODE_SERIAL)
+        self.assertIsNone(service.fetch_engine)
+
+
+class TestSharedPriceCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'price_cache.sqlite3')
+
+    def test_entries_visible_across_cache_instances(self):
+        """Two handles on the same file (e.g. two workers) see the same entries"""
+        writer = SQLitePriceCache(self.path)
+        reader = SQLitePriceCache(self.path)
+        now = datetime.now().replace(microsecond=0)
+
+        writer['AAPL'] = {'price': 190.0, 'timestamp': now}
+
+        self.assertIn('AAPL', reader)
+        self.assertEqual(reader['AAPL'], {'price': 190.0, 'timestamp': now})
+        self.assertEqual(len(reader), 1)
+        reader.clear()
+        self.assertNotIn('AAPL', writer)
+        with self.assertRaises(KeyError):
+            writer['AAPL']
+
+    @patch('backend.services.price_service.yf.download')
+    def test_services_share_one_upstream_fetch(self, mock_download):
+        """A second service on the shared cache reuses the first service's fetch"""
+        mock_download.return_value = _yahoo_frame({'AAPL': [190.0]})
+        first = PriceService(fetch_mode=FETCH_MODE_SERIAL, price_cache=SQLitePriceCache(self.path))
+        second = PriceService(fetch_mode=FETCH_MODE_SERIAL, price_cache=SQLitePriceCache(self.path))
+
+        self.assertEqual(first.get_stock_price('AAPL'), 190.0)
+        self.assertEqual(second.get_stock_price('AAPL'), 190.0)
+        self.assertEqual(mock_download.call_count, 1)
+
+    @patch('backend.services.price_service.yf.download')
+    def test_concurrent_misses_fetched_once_per_host(self, mock_download):
+        """Workers missing the same symbol at once wait on one worker's fetch instead of each fetching"""
+        def slow_download(**kwargs):
+            time.sleep(0.3)
+            return _yahoo_frame({'AAPL': [190.0]})
+        mock_download.side_effect = slow_download
+        workers = [PriceService(fetch_mode=FETCH_MODE_SERIAL, price_cache=SQLitePriceCache(self.path)) for _ in range(3)]
+
+        results = []
+        threads = [threading.Thread(target=lambda w=w: results.append(w.get_stock_price('AAPL'))) for w in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [190.0] * 3)
+        self.assertEqual(mock_download.call_count, 1)
+
+    def test_fill_lease_released_after_failed_fetch(self):
+        """A worker whose fetch fails gives up its lease so another worker fetches the symbol itself"""
+        first = SQLitePriceCache(self.path)
+        second = SQLitePriceCache(self.path)
+
+        self.assertEqual(first.claim_fills(['AAPL', 'MSFT'], 30), ['AAPL', 'MSFT'])
+        self.assertEqual(second.claim_fills(['AAPL', 'TSLA'], 30), ['TSLA'])
+        self.assertEqual(second.pending_fills(['AAPL', 'NVDA']), {'AAPL'})
+
+        first.release_fills(['AAPL', 'MSFT'])
+        service = PriceService(fetch_mode=FETCH_MODE_SERIAL, price_cache=second)
+        self.assertEqual(service._wait_for_host_fills(['AAPL']), ({}, ['AAPL']))
+        self.assertEqual(second.claim_fills(['AAPL'], 30), ['AAPL'])
+
+    def test_expired_fill_lease_can_be_reclaimed(self):
+        """A lease left behind by a crashed worker expires"""
+        first = SQLitePriceCache(self.path)
+        second = SQLitePriceCache(self.path)
+
+        first.claim_fills(['AAPL'], 0)
+
+        self.assertEqual(second.pending_fills(['AAPL']), set())
+        self.assertEqual(second.claim_fills(['AAPL'], 30), ['AAPL'])
+
+    def test_expired_shared_entry_is_refetched(self):
+        """The shared cache follows the same TTL rules as the in-memory one"""
+        service = PriceService(fetch_mode=FETCH_MODE_SERIAL, price_cache=SQLitePriceCache(self.path))
+        service.price_cache['AAPL'] = {'price': 150.0, 'timestamp': datetime.now() - timedelta(minutes=10)}
+
+        self.assertFalse(service._is_cache_valid('AAPL'))
+
+    def test_backend_selection(self):
+        """Unknown backends fall back to the in-memory cache"""
+        self.assertIsInstance(create_price_cache('sqlite', self.path), SQLitePriceCache)
+        self.assertIsInstance(create_price_cache('memory', self.path), InMemoryPriceCache)
+        self.assertIsInstance(create_price_cache('redis', self.path), InMemoryPriceCache)
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+    def setUp(self):
+        self.service = PriceService(fetch_mode=FETCH_MODE_SERIAL, stale_grace=600)
+
+    def _wait_for_revalidation(self):
+        self.service._revalidate_executor.shutdown(wait=True)
+
+    @patch('backend.services.price_service.yf.download')
+    def test_expired_entry_in_grace_window_is_served_and_refreshed(self, mock_download):
+        """A stale price comes back immediately and the cache is refreshed in the background"""
+        self.service.price_cache['AAPL'] = {'price': 150.0, 'timestamp': datetime.now() - timedelta(minutes=7)}
+        mock_download.return_value = _yahoo_frame({'AAPL': [190.0]})
+
+        self.assertEqual(self.service.get_stock_price('AAPL'), 150.0)
+        self._wait_for_revalidation()
+
+        self.assertEqual(mock_download.call_count, 1)
+        self.assertEqual(self.service.price_cache['AAPL']['price'], 190.0)
+
+    @patch('backend.services.price_service.requests.get')
+    def test_crypto_revalidation_uses_batch_request(self, mock_get):
+        """Stale coins are refreshed together in one background request"""
+        stale_time = datetime.now() - timedelta(minutes=20)
+        self.service.price_cache['bitcoin'] = {'price': 50000.0, 'timestamp': stale_time}
+        self.service.price_cache['ethereum'] = {'price': 2500.0, 'timestamp': stale_time}
+        mock_get.return_value = _coingecko_response({'bitcoin': {'usd': 60000.0}, 'ethereum': {'usd': 3000.0}})
+
+        prices = self.service.get_crypto_prices(['bitcoin', 'ethereum'])
+        self._wait_for_revalidation()
+
+        self.assertEqual(prices, {'bitcoin': 50000.0, 'ethereum': 2500.0})
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(self.service.price_cache['ethereum']['price'], 3000.0)
+
+    @patch('backend.services.price_service.yf.download')
+    def test_entry_past_grace_window_is_fetched_synchronously(self, mock_download):
+        """Prices older than TTL plus grace are treated as misses"""
+        self.service.price_cache['AAPL'] = {'price': 150.0, 'timestamp': datetime.now() - timedelta(hours=1)}
+        mock_download.return_value = _yahoo_frame({'AAPL': [190.0]})
+
+        self.assertEqual(self.service.get_stock_price('AAPL'), 190.0)
+
+    @patch('backend.services.price_service.yf.download')
+    def test_zero_grace_disables_stale_serving(self, mock_download):
+        """With no grace window expired entries are refetched inline"""
+        service = PriceService(fetch_mode=FETCH_MODE_SERIAL, stale_grace=0)
+        service.price_cache['AAPL'] = {'price': 150.0, 'timestamp': datetime.now() - timedelta(minutes=7)}
+        mock_download.return_value = _yahoo_frame({'AAPL': [190.0]})
+
+        self.assertEqual(service.get_stock_price('AAPL'), 190.0)
+
+
+def _run_in_threads(count, target):
+    """Start count threads on target(index) at the same moment and collect their results"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        results[index] = target(index)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestRequestCoalescing(unittest.TestCase):
+    @patch('backend.services.price_service.yf.download')
+    def test_concurrent_misses_share_one_stock_download(self, mock_download):
+        """Ten threads asking for the same expired ticker cause one upstream call"""
+        def slow_download(**kwargs):
+            time.sleep(0.2)
+            return _yahoo_frame({'AAPL': [190.0]})
+        mock_download.side_effect = slow_download
+        service = PriceService(fetch_mode=FETCH_MODE_SERIAL)
+
+        results = _run_in_threads(10, lambda _: service.get_stock_price('AAPL'))
+
+        self.assertEqual(results, [190.0] * 10)
+        self.assertEqual(mock_download.call_count, 1)
+
+    @patch('backend.services.price_service.requests.get')
+    def test_concurrent_misses_share_one_coingecko_call(self, mock_get):
+        """Concurrent BTC lookups at expiry do not stampede CoinGecko"""
+        def slow_get(*args, **kwargs):
+            time.sleep(0.2)
+            return _coingecko_response({'bitcoin': {'usd': 60000.0}})
+        mock_get.side_effect = slow_get
+        service = PriceService(fetch_mode=FETCH_MODE_SERIAL)
+
+        results = _run_in_threads(10, lambda _: service.get_crypto_price('bitcoin'))
+
+        self.assertEqual(results, [60000.0] * 10)
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_overlapping_batches_only_fetch_each_key_once(self):
+        """Keys already in flight are waited on while the rest are fetched"""
+        flight = SingleFlight()
+        fetched = []
+        lock = threading.Lock()
+
+        def fetch(keys):
+            with lock:
+                fetched.extend(keys)
+            time.sleep(0.1)
+            return {key: 1.0 for key in keys}
+
+        batches = [['a', 'b'], ['b', 'c'], ['a', 'c']]
+        results = _run_in_threads(3, lambda index: flight.fetch(batches[index], fetch))
+
+        self.assertEqual(sorted(fetched), ['a', 'b', 'c'])
+        for result in results:
+            self.assertTrue(all(value == 1.0 for value in result.values()))
+            self.assertEqual(len(result), 2)
+
+    def test_failed_fetch_releases_waiters(self):
+        """Waiters get no value rather than hanging when the leader fails"""
+        flight = SingleFlight(wait_timeout=1)
+
+        def broken(keys):
+            time.sleep(0.1)
+            raise RuntimeError('boom')
+
+        def call(_):
+            try:
+                return flight.fetch(['a'], broken)
+            except RuntimeError:
+                return 'raised'
+
+        results = _run_in_threads(3, call)
+
+        self.assertEqual(results.count('raised'), 1)
+        self.assertEqual(results.count({}), 2)
+
+    def test_in_memory_cache_under_concurrent_writes(self):
+        """Striped locking keeps the in-memory cache consistent under threads"""
+        cache = InMemoryPriceCache()
+        now = datetime.now()
+
+        def writer(_):
+            for i in range(500):
+                cache[f"SYM{i}"] = {'price': float(i), 'timestamp': now}
+            return len(list(cache))
+
+        _run_in_threads(8, writer)
+
+        self.assertEqual(len(cache), 500)
+        self.assertEqual(cache['SYM42']['price'], 42.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+import numpy as np
+from backend import create_app
+from backend.models import db, PriceHistory
+from backend.services.price_store import ColumnarPriceStore, get_price_store
+from backend.config.settings import ASSET_TYPE_CRYPTO, ASSET_TYPE_US_STOCK
+
+
+class TestColumnarPriceStore(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database and an empty store directory"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'PRICE_STORE_DIR': self.tmpdir,
+        })
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _add_history(self, *ticks):
+        with self.app.app_context():
+            db.session.add_all([
+                PriceHistory(symbol=symbol, asset_type=asset_type, price=price, timestamp=timestamp)
+                for symbol, asset_type, price, timestamp in ticks
+            ])
+            db.session.commit()
+
+    def _sync(self, store):
+        with self.app.app_context():
+            return store.sync()
+
+    def test_sync_and_range_reads(self):
+        self._add_history(
+            ('AAPL', ASSET_TYPE_US_STOCK, 101.0, datetime(2024, 1, 2)),
+            ('BTC', ASSET_TYPE_CRYPTO, 42000.0, datetime(2024, 1, 1)),
+            ('AAPL', ASSET_TYPE_US_STOCK, 100.0, datetime(2024, 1, 1)),
+            ('AAPL', ASSET_TYPE_US_STOCK, 102.0, datetime(2024, 1, 3)),
+        )
+        store = get_price_store(self.app)
+
+        self.assertEqual(self._sync(store), 4)
+        self.assertEqual(sorted(store.symbols()), ['AAPL', 'BTC'])
+
+        timestamps, prices = store.get_range('AAPL', datetime(2024, 1, 2), datetime(2024, 1, 4))
+        self.assertEqual(prices.tolist(), [101.0, 102.0])
+        self.assertEqual(timestamps[0], np.datetime64('2024-01-02T00:00:00'))
+        self.assertIsInstance(prices, np.memmap)
+        self.assertEqual(store.get_range('AAPL')[1].tolist(), [100.0, 101.0, 102.0])
+        self.assertEqual(store.latest('BTC'), (datetime(2024, 1, 1), 42000.0))
+        self.assertEqual(len(store.get_range('ETH')[0]), 0)
+
+    def test_incremental_sync_merges_out_of_order_rows(self):
+        """Rows with newer ids but older timestamps (e.g. a backfill) land in order"""
+        self._add_history(('AAPL', ASSET_TYPE_US_STOCK, 102.0, datetime(2024, 1, 3)))
+        store = ColumnarPriceStore(self.tmpdir)
+        self._sync(store)
+        first_watermark = store.watermark
+        unrelated = os.path.join(self.tmpdir, 'export.npy')
+        np.save(unrelated, np.zeros(1))
+
+        self._add_history(
+            ('AAPL', ASSET_TYPE_US_STOCK, 100.0, datetime(2024, 1, 1)),
+            ('MSFT', ASSET_TYPE_US_STOCK, 400.0, datetime(2024, 1, 1)),
+        )
+        self.assertEqual(self._sync(store), 2)
+        self.assertEqual(self._sync(store), 0)
+
+        self.assertGreater(store.watermark, first_watermark)
+        self.assertEqual(store.get_range('AAPL')[1].tolist(), [100.0, 102.0])
+        self.assertEqual(store.get_range('MSFT')[1].tolist(), [400.0])
+        # AAPL was rewritten as a new version; only that version is kept on disk
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmpdir, 'series'))),
+                         ['0.1.prices', '0.1.timestamps', '1.0.prices', '1.0.timestamps'])
+        self.assertTrue(os.path.exists(unrelated))
+
+    def test_sync_appends_without_rewriting(self):
+        """Rows newer than a symbol's last one are appended to its files; other symbols are untouched"""
+        self._add_history(
+            ('AAPL', ASSET_TYPE_US_STOCK, 100.0, datetime(2024, 1, 1)),
+            ('BTC', ASSET_TYPE_CRYPTO, 42000.0, datetime(2024, 1, 1)),
+        )
+        store = ColumnarPriceStore(self.tmpdir)
+        self._sync(store)
+        series_dir = os.path.join(self.tmpdir, 'series')
+        before = {name: os.stat(os.path.join(series_dir, name)).st_mtime_ns for name in os.listdir(series_dir)}
+        old_prices = store.get_range('AAPL')[1]
+
+        self._add_history(('AAPL', ASSET_TYPE_US_STOCK, 101.0, datetime(2024, 1, 2)))
+        self.assertEqual(self._sync(store), 1)
+
+        after = {name: os.stat(os.path.join(series_dir, name)).st_mtime_ns for name in os.listdir(series_dir)}
+        self.assertEqual(sorted(after), sorted(before))
+        self.assertEqual(after['1.0.prices'], before['1.0.prices'])
+        self.assertEqual(store.get_range('AAPL')[1].tolist(), [100.0, 101.0])
+        # Arrays handed out earlier keep the length they were read with
+        self.assertEqual(old_prices.tolist(), [100.0])
+
+    def test_other_instances_see_published_revisions(self):
+        """A second process opening the directory maps the same data"""
+        self._add_history(('BTC', ASSET_TYPE_CRYPTO, 42000.0, datetime(2024, 1, 1)))
+        writer = ColumnarPriceStore(self.tmpdir)
+        reader = ColumnarPriceStore(self.tmpdir)
+        self._sync(writer)
+
+        self.assertTrue(reader.reload())
+        self.assertEqual(reader.get_range('BTC')[1].tolist(), [42000.0])
+        self.assertEqual(reader.watermark, writer.watermark)
+
+
+if __name__ == '__main__':
+    unittest.main()
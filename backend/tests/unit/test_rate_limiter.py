@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import patch, MagicMock
+from backend.services.price_service import PriceService
+from backend.services.rate_limiter import TokenBucketRateLimiter, parse_retry_after
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_delta_seconds(self):
+        self.assertEqual(parse_retry_after('120'), 120.0)
+
+    def test_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(parse_retry_after(format_datetime(retry_at, usegmt=True)), 30, delta=2)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+class TestTokenBucketRateLimiter(unittest.TestCase):
+    def test_burst_then_refusal(self):
+        """A full bucket allows burst requests, then refuses without waiting"""
+        limiter = TokenBucketRateLimiter('test', rate_per_minute=60, burst=3)
+
+        self.assertEqual([limiter.try_acquire() for _ in range(4)], [True, True, True, False])
+
+    def test_deadline_expires(self):
+        """acquire gives up once its timeout passes"""
+        limiter = TokenBucketRateLimiter('test', rate_per_minute=1, burst=1)
+        limiter.acquire()
+
+        start = time.monotonic()
+        self.assertFalse(limiter.acquire(timeout=0.1))
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_refill_rate(self):
+        """Queued callers are released at the configured rate"""
+        limiter = TokenBucketRateLimiter('test', rate_per_minute=1200, burst=1)  # one token per 50ms
+
+        start = time.monotonic()
+        for _ in range(5):
+            self.assertTrue(limiter.acquire(timeout=1))
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+    def test_waiters_are_served_in_arrival_order(self):
+        """Threads queued for a token get it first come, first served"""
+        limiter = TokenBucketRateLimiter('test', rate_per_minute=1200, burst=1)
+        limiter.acquire()
+        order = []
+
+        def worker(index):
+            limiter.acquire(timeout=2)
+            order.append(index)
+
+        threads = []
+        for index in range(5):
+            thread = threading.Thread(target=worker, args=(index,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.01)  # Make the arrival order deterministic
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+
+    def test_penalize_blocks_until_retry_after(self):
+        """A 429 empties the bucket for the Retry-After period"""
+        limiter = TokenBucketRateLimiter('test', rate_per_minute=6000, burst=5)
+
+        limiter.penalize(0.2)
+
+        self.assertTrue(limiter.is_backing_off)
+        self.assertFalse(limiter.try_acquire())
+        self.assertTrue(limiter.acquire(timeout=1))
+        self.assertFalse(limiter.is_backing_off)
+
+    def test_acquire_async(self):
+        limiter = TokenBucketRateLimiter('test', rate_per_minute=1200, burst=1)
+
+        async def take_two():
+            return [await limiter.acquire_async(1), await limiter.acquire_async(1)]
+
+        self.assertEqual(asyncio.run(take_two()), [True, True])
+
+    def test_many_coroutines_wait_without_threads(self):
+        """Queued coroutines sleep on the event loop, in arrival order, instead of each holding a thread"""
+        limiter = TokenBucketRateLimiter('test', rate_per_minute=6000, burst=1)  # one token per 10ms
+        order = []
+
+        async def worker(index):
+            if await limiter.acquire_async(2):
+                order.append(index)
+
+        async def run_all():
+            await asyncio.gather(*(worker(index) for index in range(100)))
+
+        with patch('asyncio.to_thread', side_effect=AssertionError("waited on a thread")):
+            start = time.monotonic()
+            asyncio.run(run_all())
+
+        self.assertEqual(order, list(range(100)))
+        self.assertGreaterEqual(time.monotonic() - start, 0.9)
+
+    def test_async_waiters_time_out_and_leave_the_line(self):
+        limiter = TokenBucketRateLimiter('test', rate_per_minute=1, burst=1)
+        limiter.acquire()
+
+        self.assertFalse(asyncio.run(limiter.acquire_async(0.05)))
+        # The abandoned ticket must not hold up the callers behind it
+        self.assertEqual(len(limiter._waiting), 0)
+
+
+class TestPriceServiceRateLimits(unittest.TestCase):
+    @patch('backend.services.price_service.requests.get')
+    def test_coingecko_retry_after_is_honoured(self, mock_get):
+        """The Retry-After header of a 429 sets the CoinGecko backoff"""
+        limiter = TokenBucketRateLimiter('CoinGecko', rate_per_minute=600, burst=1)
+        service = PriceService(coingecko_limiter=limiter)
+        mock_get.return_value = MagicMock(status_code=429, headers={'Retry-After': '1'})
+
+        self.assertEqual(service.get_crypto_prices(['bitcoin']), {})
+        self.assertTrue(service.coingecko_rate_limited)
+        self.assertFalse(limiter.try_acquire())
+
+    @patch('backend.services.price_service.yf.download')
+    def test_yahoo_requests_are_throttled(self, mock_download):
+        """Without a Yahoo token the download is skipped and expired prices are served"""
+        service = PriceService(yahoo_limiter=TokenBucketRateLimiter('Yahoo Finance', rate_per_minute=1, burst=1))
+        service.yahoo_limiter.acquire()
+        service.price_cache['AAPL'] = {'price': 180.0, 'timestamp': datetime.now() - timedelta(days=1)}
+
+        with patch('backend.services.price_service.RATE_LIMIT_MAX_WAIT', 0):
+            prices = service.get_stock_prices(['AAPL', 'MSFT'])
+
+        self.assertEqual(prices, {'AAPL': 180.0})
+        mock_download.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+import numpy as np
+from backend import create_app
+from backend.models import db, Asset, PriceHistory
+from backend.services.price_store import get_price_store
+from backend.services.valuation_service import load_holdings
+from backend.services.returns_service import xirr, holding_returns
+from backend.config.settings import ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO
+
+TODAY = date(2024, 1, 1)
+
+
+class TestXirr(unittest.TestCase):
+    def test_batch_matches_known_rates(self):
+        """Flows grown at a known rate per group solve back to that rate"""
+        rng = np.random.default_rng(0)
+        rates = rng.uniform(-0.5, 2.0, 50)
+        invested = -rng.uniform(10, 100, 2000)
+        years = rng.uniform(0.1, 5, 2000)
+        groups = rng.integers(0, 50, 2000)
+        values = np.bincount(groups, weights=-invested * (1 + rates[groups]) ** years, minlength=50)
+
+        solved = xirr(np.concatenate([invested, values]), np.concatenate([years, np.zeros(50)]),
+                      np.concatenate([groups, np.arange(50)]), 50)
+        np.testing.assert_allclose(solved, rates, atol=1e-9)
+
+    def test_groups_without_sign_change_are_nan(self):
+        solved = xirr(np.array([-100.0, 121.0, -50.0, 50.0]), np.array([2.0, 0.0, 0.0, 0.0]),
+                      np.array([0, 0, 1, 1]), 2)
+        self.assertAlmostEqual(solved[0], 0.1)
+        self.assertTrue(np.isnan(solved[1]))
+
+
+class TestHoldingReturns(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database with two AAPL lots and one BTC lot"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'PRICE_STORE_DIR': self.tmpdir,
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=100.0, quantity=10, purchase_date=datetime(2022, 1, 1)),
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=150.0, quantity=10, purchase_date=datetime(2023, 1, 1)),
+                Asset(symbol='BTC', asset_type=ASSET_TYPE_CRYPTO, purchase_price=20000.0, quantity=1, purchase_date=datetime(2023, 6, 1),
+                      last_price=30000.0),
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _returns(self, store=None):
+        with self.app.app_context():
+            if store is not None:
+                store.sync()
+            return holding_returns(load_holdings(), {'AAPL': 200.0}, store, today=TODAY)
+
+    def test_per_asset_returns(self):
+        assets = self._returns()['assets']
+
+        self.assertAlmostEqual(assets[0]['xirr'], np.sqrt(2) - 1)  # doubled over two years
+        self.assertAlmostEqual(assets[0]['twr'], 1.0)
+        self.assertAlmostEqual(assets[1]['twr'], 200.0 / 150.0 - 1)
+        self.assertAlmostEqual(assets[2]['twr'], 0.5)  # stored last price
+
+    def test_group_returns(self):
+        returns = self._returns()
+
+        us = returns['by_type'][ASSET_TYPE_US_STOCK]
+        # 100 -> 150 before the second purchase, 150 -> 200 after: the price return of AAPL
+        self.assertAlmostEqual(us['twr'], 1.0)
+        self.assertAlmostEqual(us['twr_annualized'], np.sqrt(2) - 1)
+        # The money-weighted return solves the combined cash flows
+        rate = us['xirr']
+        self.assertAlmostEqual(-1000 * (1 + rate) ** 2 - 1500 * (1 + rate) + 4000, 0.0, places=6)
+
+        # Without price history the total values AAPL at the last price paid on the BTC purchase date
+        total = returns['total']
+        self.assertAlmostEqual(total['twr'], 1.5 * 1.0 * (4000 + 30000) / (3000 + 20000) - 1)
+
+    def test_time_weighted_return_uses_price_history(self):
+        with self.app.app_context():
+            db.session.add(PriceHistory(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, price=180.0,
+                                        timestamp=datetime(2023, 6, 1, 16)))
+            db.session.commit()
+            get_price_store(self.app).sync()
+        total = self._returns(get_price_store(self.app))['total']
+
+        periods = [1.5, 3600.0 / 3000.0, (4000 + 30000) / (3600 + 20000)]
+        self.assertAlmostEqual(total['twr'], np.prod(periods) - 1)
+
+    def test_returns_route(self):
+        response = self.client.get('/api/portfolio/returns?live=false')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['assets']), 3)
+        self.assertIn(ASSET_TYPE_CRYPTO, response.json['by_type'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from statistics import NormalDist
+from unittest.mock import patch
+import numpy as np
+from backend import create_app
+from backend.models import db, Asset, PriceHistory
+from backend.services.price_store import get_price_store
+from backend.services.risk_service import RiskEngine, daily_returns
+from backend.config.settings import ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO
+
+AAPL = [100.0, 102.0, 101.0, 104.0, 103.0, 105.0]
+BTC = [40000.0, 39000.0, 41000.0, 42000.0, 40000.0, 43000.0]
+
+
+class _FixedDate(date):
+    @classmethod
+    def today(cls):
+        return date(2024, 1, 6)
+
+
+class TestRiskEngine(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database with two holdings and six days of prices"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'PRICE_STORE_DIR': self.tmpdir,
+        })
+        self.client = self.app.test_client()
+        patcher = patch('backend.services.risk_service.date', _FixedDate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=100.0, quantity=10, purchase_date=datetime(2023, 6, 1)),
+                Asset(symbol='BTC', asset_type=ASSET_TYPE_CRYPTO, purchase_price=30000.0, quantity=0.1, purchase_date=datetime(2023, 6, 1)),
+            ])
+            for offset, (aapl, btc) in enumerate(zip(AAPL, BTC)):
+                timestamp = datetime(2024, 1, 1, 16) + timedelta(days=offset)
+                db.session.add(PriceHistory(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, price=aapl, timestamp=timestamp))
+                db.session.add(PriceHistory(symbol='BTC', asset_type=ASSET_TYPE_CRYPTO, price=btc, timestamp=timestamp))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _risk(self, engine, **kwargs):
+        with self.app.app_context():
+            # Stands in for the background sync after each history flush
+            get_price_store(self.app).sync()
+            return engine.risk(get_price_store(self.app), days=5, **kwargs)
+
+    def test_daily_returns_leave_days_before_the_first_price_unobserved(self):
+        prices = np.array([[np.nan, 100.0], [10.0, 110.0], [12.0, 99.0]])
+        np.testing.assert_allclose(daily_returns(prices), [[np.nan, 0.1], [0.2, -0.1]])
+
+    def test_symbol_first_priced_mid_window(self):
+        """A short history uses its own days: no zero returns pulling volatility, VaR or correlation down"""
+        eth = [2000.0, 2100.0, 2050.0, 2200.0]
+        with self.app.app_context():
+            db.session.add(Asset(symbol='ETH', asset_type=ASSET_TYPE_CRYPTO, purchase_price=1500.0, quantity=1,
+                                 purchase_date=datetime(2023, 6, 1)))
+            for offset, price in enumerate(eth, start=len(AAPL) - len(eth)):
+                db.session.add(PriceHistory(symbol='ETH', asset_type=ASSET_TYPE_CRYPTO, price=price,
+                                            timestamp=datetime(2024, 1, 1, 16) + timedelta(days=offset)))
+            db.session.commit()
+
+        risk = self._risk(RiskEngine(), include_matrix=True)
+
+        full = daily_returns(np.column_stack([AAPL, BTC]))
+        eth_returns = daily_returns(np.array(eth))
+        assets = {asset['symbol']: asset for asset in risk['assets']}
+        self.assertEqual(assets['ETH']['observations'], 3)
+        self.assertAlmostEqual(assets['ETH']['volatility'], eth_returns.std(ddof=1) * np.sqrt(365))
+        self.assertAlmostEqual(assets['AAPL']['volatility'], full[:, 0].std(ddof=1) * np.sqrt(365))
+
+        # Pairs with ETH use the three days both have; AAPL/BTC keep all five
+        overlap = np.column_stack([full[-3:, 0], eth_returns])
+        self.assertEqual(risk['symbols'], ['AAPL', 'BTC', 'ETH'])
+        self.assertAlmostEqual(risk['correlation'][0][2], np.corrcoef(overlap, rowvar=False)[0, 1])
+        self.assertAlmostEqual(risk['covariance'][0][2], np.cov(overlap, rowvar=False)[0, 1] * 365)
+        self.assertAlmostEqual(risk['correlation'][0][1], np.corrcoef(full, rowvar=False)[0, 1])
+
+        # Portfolio volatility is w' * covariance * w; historical VaR uses the days all three have returns
+        weights = np.array([asset['weight'] for asset in risk['assets']])
+        self.assertAlmostEqual(risk['volatility']['annualized'] ** 2,
+                               weights @ np.array(risk['covariance']) @ weights)
+        exposure = np.array([assets[symbol]['value'] for symbol in ('AAPL', 'BTC', 'ETH')])
+        pnl = np.column_stack([full[-3:], eth_returns]) @ exposure
+        self.assertAlmostEqual(risk['var']['historical'], max(0.0, -np.quantile(pnl, 0.05)))
+
+    def test_volatility_and_var(self):
+        risk = self._risk(RiskEngine())
+
+        returns = daily_returns(np.column_stack([AAPL, BTC]))
+        exposure = np.array([10 * AAPL[-1], 0.1 * BTC[-1]])
+        pnl = returns @ exposure
+        self.assertAlmostEqual(risk['portfolio_value'], exposure.sum())
+
+        aapl = risk['assets'][0]
+        self.assertEqual((aapl['symbol'], aapl['observations']), ('AAPL', 5))
+        self.assertAlmostEqual(aapl['volatility'], returns[:, 0].std(ddof=1) * np.sqrt(365))
+        self.assertAlmostEqual(aapl['weight'], exposure[0] / exposure.sum())
+
+        self.assertAlmostEqual(risk['volatility']['daily'], pnl.std(ddof=1) / exposure.sum())
+        self.assertAlmostEqual(risk['var']['historical'], -np.quantile(pnl, 0.05))
+        self.assertAlmostEqual(risk['var']['parametric'],
+                               NormalDist().inv_cdf(0.95) * pnl.std(ddof=1) - pnl.mean())
+        self.assertNotIn('covariance', risk)
+
+    def test_matrices(self):
+        risk = self._risk(RiskEngine(), include_matrix=True)
+
+        returns = daily_returns(np.column_stack([AAPL, BTC]))
+        self.assertEqual(risk['symbols'], ['AAPL', 'BTC'])
+        np.testing.assert_allclose(risk['covariance'], np.cov(returns, rowvar=False) * 365)
+        np.testing.assert_allclose(risk['correlation'], np.corrcoef(returns, rowvar=False))
+        # Portfolio variance from the P&L series matches w' * covariance * w
+        weights = np.array([asset['weight'] for asset in risk['assets']])
+        self.assertAlmostEqual(risk['volatility']['annualized'] ** 2,
+                               weights @ np.array(risk['covariance']) @ weights)
+
+    def test_results_are_memoized_until_prices_change(self):
+        engine = RiskEngine()
+        with patch.object(RiskEngine, '_compute', wraps=RiskEngine._compute) as compute:
+            first = self._risk(engine)
+            self.assertEqual(self._risk(engine), first)
+            self.assertEqual(compute.call_count, 1)
+
+            with self.app.app_context():
+                db.session.add(PriceHistory(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, price=90.0,
+                                            timestamp=datetime(2024, 1, 6, 18)))
+                db.session.commit()
+            self.assertNotEqual(self._risk(engine), first)
+            self.assertEqual(compute.call_count, 2)
+
+    def test_risk_route(self):
+        response = self.client.get('/api/portfolio/risk?days=5&matrix=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['correlation']), 2)
+
+        self.assertEqual(self.client.get('/api/portfolio/risk?days=1').status_code, 400)
+        self.assertEqual(self.client.get('/api/portfolio/risk?confidence=high').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
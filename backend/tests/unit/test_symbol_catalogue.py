@@ -0,0 +1,86 @@
+import gc
+import random
+import string
+import tracemalloc
+import unittest
+from backend.services.symbol_catalogue import SymbolCatalogue, FIELD_SYMBOL, FIELD_NAME
+from backend.services.symbol_search import SymbolSearchIndex
+from backend.config.settings import (
+    ASSET_TYPE_CRYPTO, ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, SYMBOL_MEMORY_BUDGET
+)
+
+RECORDS = [
+    {'id': 'bitcoin', 'symbol': 'BTC', 'name': 'Bitcoin'},
+    {'symbol': 'TCS.NS', 'name': 'Tata Consultancy Services'},
+    {'id': 'broken'},
+    {'id': 'istanbul-token', 'symbol': 'IST', 'name': 'İstanbul Token'},
+    {'id': 'btc-clone', 'symbol': 'BTCC', 'name': 'BTC'},
+]
+
+
+def _universe(count, with_ids, rng):
+    """Records shaped like the real lists: short symbols, one to five word names"""
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))).title() for _ in range(5000)]
+    records = []
+    for _ in range(count):
+        name = ' '.join(rng.choices(words, k=rng.randint(1, 5)))
+        record = {'symbol': ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 10))), 'name': name}
+        if with_ids:
+            record['id'] = name.lower().replace(' ', '-')
+        records.append(record)
+    return records
+
+
+class TestSymbolCatalogue(unittest.TestCase):
+    def test_records_round_trip(self):
+        catalogue = SymbolCatalogue(RECORDS)
+
+        self.assertEqual(len(catalogue), 4)
+        self.assertEqual(catalogue.to_list(), [record for record in RECORDS if 'symbol' in record])
+        self.assertEqual(catalogue.field(1, FIELD_SYMBOL), 'TCS.NS')
+        self.assertEqual(catalogue[2]['name'], 'İstanbul Token')
+        with self.assertRaises(IndexError):
+            catalogue[4]
+
+    def test_lookups_return_first_record_in_list_order(self):
+        catalogue = SymbolCatalogue(RECORDS)
+
+        self.assertEqual(catalogue.find_exact('btc'), 0)
+        self.assertEqual(catalogue.find_exact('bitcoin'), 0)
+        self.assertIsNone(catalogue.find_exact('bit'))
+        self.assertEqual(catalogue.find('consult'), 1)
+        # Lowercasing İ adds a character, so the lowered text keeps its own offsets
+        self.assertEqual(catalogue.find('token'), 2)
+        self.assertEqual(catalogue.find_exact('i̇stanbul token'), 2)
+        self.assertEqual(catalogue.find('clone'), 3)
+        self.assertIsNone(catalogue.find(''))
+
+        start, end = catalogue.lowered_span(3, FIELD_NAME)
+        self.assertEqual(catalogue.lowered_text[start:end], 'btc')
+
+
+class TestSymbolMemoryBudget(unittest.TestCase):
+    def test_twenty_thousand_symbols_fit_the_budget(self):
+        rng = random.Random(0)
+        lists = [_universe(15000, True, rng), _universe(2500, False, rng), _universe(2500, False, rng)]
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            catalogues = [SymbolCatalogue(records) for records in lists]
+            gc.collect()
+            allocated = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        # The index holds only arrays, whose reported size is exact
+        index = SymbolSearchIndex(list(zip((ASSET_TYPE_CRYPTO, ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK),
+                                           catalogues)))
+
+        catalogue_bytes = sum(catalogue.nbytes for catalogue in catalogues)
+        self.assertEqual(len(index), 20000)
+        # The reported size accounts for what was actually allocated
+        self.assertGreater(catalogue_bytes, allocated * 0.9)
+        self.assertLess(catalogue_bytes + index.nbytes, SYMBOL_MEMORY_BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
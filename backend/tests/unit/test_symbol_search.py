@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import patch
+from backend import create_app
+from backend.services import symbol_service
+from backend.services.symbol_catalogue import SymbolCatalogue
+from backend.services.symbol_search import SymbolSearchIndex
+from backend.config.settings import ASSET_TYPE_CRYPTO, ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK
+
+CATALOGUES = [
+    (ASSET_TYPE_CRYPTO, SymbolCatalogue([
+        {'symbol': 'BTC', 'name': 'Bitcoin', 'id': 'bitcoin'},
+        {'symbol': 'BANK', 'name': 'Float Protocol', 'id': 'float-protocol'},
+    ])),
+    (ASSET_TYPE_INDIAN_STOCK, SymbolCatalogue([
+        {'symbol': 'HDFCBANK.NS', 'name': 'HDFC Bank'},
+        {'symbol': 'BANKBARODA.NS', 'name': 'Bank of Baroda'},
+        {'symbol': 'TCS.NS', 'name': 'Tata Consultancy Services'},
+    ])),
+    (ASSET_TYPE_US_STOCK, SymbolCatalogue([
+        {'symbol': 'BAC', 'name': 'Bank of America'},
+        {'symbol': 'AAPL', 'name': 'Apple'},
+    ])),
+]
+
+
+def _symbols(result):
+    return [entry['symbol'] for entry in result['results']]
+
+
+class TestSymbolSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SymbolSearchIndex(CATALOGUES)
+
+    def test_ranking_tiers(self):
+        # Exact symbol, symbol prefix, name prefixes in list order, then substring
+        self.assertEqual(_symbols(self.index.search('bank')),
+                         ['BANK', 'BANKBARODA.NS', 'HDFCBANK.NS', 'BAC'])
+        self.assertEqual(self.index.search('bank')['results'][0],
+                         {'symbol': 'BANK', 'name': 'Float Protocol', 'asset_type': ASSET_TYPE_CRYPTO,
+                          'id': 'float-protocol'})
+
+    def test_symbol_without_exchange_suffix_and_substrings(self):
+        self.assertEqual(_symbols(self.index.search('TCS')), ['TCS.NS'])
+        self.assertEqual(_symbols(self.index.search('consult')), ['TCS.NS'])
+        self.assertEqual(_symbols(self.index.search('itco')), ['BTC'])
+        self.assertEqual(self.index.search('zz')['total'], 0)
+        self.assertEqual(self.index.search('  ')['total'], 0)
+
+    def test_type_filter_and_pagination(self):
+        result = self.index.search('bank', asset_type=ASSET_TYPE_INDIAN_STOCK, limit=1, offset=1)
+
+        self.assertEqual(_symbols(result), ['HDFCBANK.NS'])
+        self.assertEqual((result['total'], result['offset'], result['limit']), (2, 1, 1))
+
+
+class TestSymbolSearchRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config_override={'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.client = self.app.test_client()
+        lists = {
+            '_crypto': symbol_service._CryptoSnapshot([{'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin'}]),
+            '_indian_stock_symbols': SymbolCatalogue([{'symbol': 'HDFCBANK.NS', 'name': 'HDFC Bank'}]),
+            '_us_stock_symbols': SymbolCatalogue([{'symbol': 'BAC', 'name': 'Bank of America'}]),
+            '_search_index': None,
+        }
+        for name, value in lists.items():
+            patcher = patch.object(symbol_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_search(self):
+        response = self.client.get('/api/symbols/search?q=bank&limit=1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['total'], 2)
+        self.assertEqual(_symbols(response.json), ['HDFCBANK.NS'])
+
+        response = self.client.get('/api/symbols/search?q=btc&type=Crypto')
+        self.assertEqual(response.json['results'], [
+            {'symbol': 'btc', 'name': 'Bitcoin', 'asset_type': ASSET_TYPE_CRYPTO, 'id': 'bitcoin'}
+        ])
+
+    def test_index_is_rebuilt_when_a_list_reloads(self):
+        self.client.get('/api/symbols/search?q=bank')
+        symbol_service._us_stock_symbols = SymbolCatalogue([{'symbol': 'BK', 'name': 'Bank of New York Mellon'}])
+
+        response = self.client.get('/api/symbols/search?q=bank&type=US Stock')
+        self.assertEqual(_symbols(response.json), ['BK'])
+
+    def test_invalid_parameters(self):
+        for query in ('type=Bonds', 'limit=abc', 'limit=0', 'limit=1000', 'offset=-1'):
+            response = self.client.get(f'/api/symbols/search?q=bank&{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,362 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import requests
+from backend import create_app
+from backend.services import symbol_service
+from backend.services.symbol_catalogue import SymbolCatalogue
+from backend.services.symbol_service import CryptoIdIndex
+from backend.services.price_service import PriceService
+from backend.services.rate_limiter import TokenBucketRateLimiter
+
+COINS = [
+    {'id': 'bitcoin', 'symbol': 'BTC', 'name': 'Bitcoin'},
+    {'id': 'ethereum', 'symbol': 'ETH', 'name': 'Ethereum'},
+    {'id': 'wrapped-bitcoin', 'symbol': 'WBTC', 'name': 'Wrapped Bitcoin'},
+    {'id': 'eth', 'symbol': 'ETHX', 'name': 'Eth Clone'},
+]
+
+
+class TestCryptoIdIndex(unittest.TestCase):
+    def test_exact_matches_on_symbol_id_and_name(self):
+        index = CryptoIdIndex(COINS)
+
+        self.assertEqual(index.resolve('btc'), 'bitcoin')
+        self.assertEqual(index.resolve('Wrapped Bitcoin'), 'wrapped-bitcoin')
+        self.assertEqual(index.resolve('WRAPPED-BITCOIN'), 'wrapped-bitcoin')
+        # A higher-ranked coin's symbol wins over a later coin's id, as in list order
+        self.assertEqual(index.resolve('eth'), 'ethereum')
+
+    def test_fallback_mappings_then_partial_matches(self):
+        index = CryptoIdIndex(COINS)
+
+        self.assertEqual(index.resolve('SOL'), 'solana')
+        self.assertEqual(index.resolve('wrapped'), 'wrapped-bitcoin')
+        self.assertIsNone(index.resolve('nope'))
+
+    def test_misses_are_memoized_and_logged_once(self):
+        index = CryptoIdIndex(COINS)
+        with patch('backend.services.symbol_service.logger') as mock_logger:
+            for _ in range(3):
+                self.assertIsNone(index.resolve('NOPE'))
+                self.assertEqual(index.resolve('btc'), 'bitcoin')
+
+        self.assertEqual(mock_logger.warning.call_count, 1)
+        mock_logger.info.assert_not_called()
+
+    def test_exact_matches_do_not_scan_the_list(self):
+        index = CryptoIdIndex(COINS)
+        with patch.object(SymbolCatalogue, 'find') as find, patch.object(SymbolCatalogue, 'find_exact') as find_exact:
+            self.assertEqual(index.resolve('Ethereum'), 'ethereum')
+            self.assertEqual(index.resolve('wbtc'), 'wrapped-bitcoin')
+        find.assert_not_called()
+        find_exact.assert_not_called()
+
+    def test_partial_match_memo_is_bounded(self):
+        index = CryptoIdIndex(COINS, memo_size=2)
+        with patch('backend.services.symbol_service.logger') as mock_logger:
+            for query in ('nope1', 'nope2', 'nope3', 'nope3', 'nope1'):
+                self.assertIsNone(index.resolve(query))
+
+        # nope1 was evicted by nope3, so it is looked up and logged again
+        self.assertEqual(mock_logger.warning.call_count, 4)
+        self.assertEqual(list(index._partial), ['nope3', 'nope1'])
+
+    def test_malformed_coins_are_skipped(self):
+        index = CryptoIdIndex([{'id': 'broken'}] + COINS)
+        self.assertEqual(len(index), len(COINS))
+
+
+class TestCryptoIdIndexLoading(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.cache_path = os.path.join(self.tmpdir, 'crypto_symbols.json')
+        for name, value in (('_crypto', symbol_service._CryptoSnapshot([])), ('_coingecko_limiter', None),
+                            ('_price_limiter', None), ('_crypto_refresh_thread', None), ('_crypto_refresh_started', None),
+                            ('_crypto_cache_path', self.cache_path)):
+            patcher = patch.object(symbol_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch('backend.services.symbol_service.requests.get')
+    def test_lookup_without_a_list_refreshes_in_background(self, mock_get):
+        mock_get.return_value.json.return_value = [
+            {'id': coin['id'], 'symbol': coin['symbol'].lower(), 'name': coin['name']} for coin in COINS
+        ]
+        service = PriceService()
+
+        # Served from the major-coin fallbacks while the list loads
+        self.assertEqual(service._find_crypto_id_by_symbol('BTC'), 'bitcoin')
+        symbol_service._crypto_refresh_thread.join(timeout=5)
+
+        self.assertEqual(service._find_crypto_id_by_symbol('WBTC'), 'wrapped-bitcoin')
+        self.assertEqual(len(symbol_service.get_crypto_id_index()), len(COINS))
+        mock_get.assert_called_once()
+
+    @patch('backend.services.symbol_service.requests.get',
+           side_effect=requests.exceptions.ConnectionError("offline"))
+    def test_failed_refresh_is_not_retried_per_lookup(self, mock_get):
+        service = PriceService()
+
+        self.assertEqual(service._find_crypto_id_by_symbol('BTC'), 'bitcoin')
+        symbol_service._crypto_refresh_thread.join(timeout=5)
+        self.assertIsNone(service._find_crypto_id_by_symbol('PEPE'))
+        self.assertEqual(len(symbol_service.get_crypto_symbols()), 0)
+        self.assertFalse(symbol_service._crypto_refresh_thread.is_alive())
+        mock_get.assert_called_once()
+
+    @patch('backend.services.symbol_service.requests.get')
+    def test_lookups_stay_offline_when_refresh_is_disabled(self, mock_get):
+        symbol_service._crypto_cache_path = None
+
+        self.assertEqual(len(symbol_service.get_crypto_symbols()), 0)
+        self.assertEqual(symbol_service.get_crypto_id_index().resolve('ETH'), 'ethereum')
+        self.assertIsNone(symbol_service._crypto_refresh_thread)
+        mock_get.assert_not_called()
+
+
+class TestCryptoSymbolCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.cache_path = os.path.join(self.tmpdir, 'crypto_symbols.json')
+        for name, value in (('_crypto', symbol_service._CryptoSnapshot([])), ('_crypto_refresh_thread', None),
+                            ('_crypto_refresh_started', None), ('_crypto_cache_path', None), ('_coingecko_limiter', None),
+                            ('_price_limiter', None)):
+            patcher = patch.object(symbol_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _write_cache(self, coins, age):
+        with open(self.cache_path, 'w') as f:
+            json.dump({'fetched_at': time.time() - age, 'coins': coins}, f)
+
+    def _cached_coins(self):
+        with open(self.cache_path) as f:
+            return json.load(f)['coins']
+
+    @patch('backend.services.symbol_service.requests.get')
+    def test_startup_reads_fresh_cache_without_network(self, mock_get):
+        self._write_cache(COINS, age=60)
+
+        self.assertIsNone(symbol_service.init_crypto_symbols(self.cache_path))
+        self.assertEqual(symbol_service.get_crypto_symbols().to_list(), COINS)
+        self.assertEqual(symbol_service.get_crypto_id_index().resolve('WBTC'), 'wrapped-bitcoin')
+        mock_get.assert_not_called()
+
+    @patch('backend.services.symbol_service.requests.get')
+    def test_stale_cache_is_served_then_refreshed_in_background(self, mock_get):
+        self._write_cache(COINS[:1], age=symbol_service.CRYPTO_SYMBOL_CACHE_TTL + 1)
+        mock_get.return_value.json.return_value = [
+            {'id': coin['id'], 'symbol': coin['symbol'].lower(), 'name': coin['name']} for coin in COINS
+        ]
+
+        with patch.object(symbol_service, 'start_crypto_symbol_refresh') as mock_start:
+            symbol_service.init_crypto_symbols(self.cache_path)
+        self.assertEqual(symbol_service.get_crypto_symbols().to_list(), COINS[:1])
+        mock_start.assert_called_once_with(self.cache_path)
+
+        symbol_service.start_crypto_symbol_refresh(self.cache_path).join(timeout=5)
+        self.assertEqual(symbol_service.get_crypto_symbols().to_list(), COINS)
+        self.assertEqual(self._cached_coins(), COINS)
+
+    @patch('backend.services.symbol_service.requests.get',
+           side_effect=requests.exceptions.ConnectionError("offline"))
+    def test_failed_refresh_keeps_list_and_cache(self, mock_get):
+        self._write_cache(COINS, age=symbol_service.CRYPTO_SYMBOL_CACHE_TTL + 1)
+        symbol_service.load_cached_crypto_symbols(self.cache_path)
+
+        self.assertFalse(symbol_service.refresh_crypto_symbols(self.cache_path))
+        self.assertEqual(symbol_service.get_crypto_symbols().to_list(), COINS)
+        self.assertEqual(self._cached_coins(), COINS)
+
+    @patch('backend.services.symbol_service.requests.get')
+    def test_missing_or_corrupt_cache_starts_empty(self, mock_get):
+        self.assertEqual(symbol_service.load_cached_crypto_symbols(self.cache_path), float('inf'))
+        with open(self.cache_path, 'w') as f:
+            f.write('{not json')
+        self.assertEqual(symbol_service.load_cached_crypto_symbols(self.cache_path), float('inf'))
+
+        self.assertEqual(len(symbol_service.get_crypto_id_index()), 0)
+        mock_get.assert_not_called()
+
+    @patch('backend.services.symbol_service.requests.get')
+    def test_create_app_does_not_touch_the_network(self, mock_get):
+        self._write_cache(COINS, age=symbol_service.CRYPTO_SYMBOL_CACHE_TTL + 1)
+        create_app(config_override={'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                                    'CRYPTO_SYMBOL_CACHE_PATH': self.cache_path})
+
+        self.assertEqual(symbol_service.get_crypto_symbols().to_list(), COINS)
+        self.assertIsNone(symbol_service._crypto_refresh_thread)
+        mock_get.assert_not_called()
+
+
+class TestSymbolUniverse(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        for name, value in (('_crypto', symbol_service._CryptoSnapshot([])),
+                            ('_indian_stock_symbols', SymbolCatalogue()), ('_us_stock_symbols', SymbolCatalogue()),
+                            ('_coingecko_limiter', None), ('_price_limiter', None), ('_DATA_DIR', self.tmpdir),
+                            ('_search_index', None), ('_encoded_lists', {})):
+            patcher = patch.object(symbol_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _write(self, name, content):
+        with open(os.path.join(self.tmpdir, name), 'w') as f:
+            f.write(content)
+
+    @patch('backend.services.symbol_service.COINGECKO_MARKETS_PAGE_SIZE', 2)
+    @patch('backend.services.symbol_service.requests.get')
+    def test_crypto_pages_are_fetched_until_a_short_page(self, mock_get):
+        pages = [COINS[:2], [COINS[1], COINS[2]], COINS[3:]]
+        mock_get.return_value.json.side_effect = pages
+
+        coins = symbol_service._fetch_crypto_symbols()
+
+        self.assertEqual([coin['id'] for coin in coins], ['bitcoin', 'ethereum', 'wrapped-bitcoin', 'eth'])
+        self.assertEqual([call.kwargs['params']['page'] for call in mock_get.call_args_list], [1, 2, 3])
+
+    @patch('backend.services.symbol_service.CRYPTO_SYMBOL_PUBLISH_INTERVAL', 0)
+    @patch('backend.services.symbol_service.COINGECKO_MARKETS_PAGE_SIZE', 2)
+    @patch('backend.services.symbol_service.requests.get')
+    def test_refresh_publishes_each_page_before_the_next(self, mock_get):
+        symbol_service._set_crypto_symbols([{'id': 'dogecoin', 'symbol': 'DOGE', 'name': 'Dogecoin'}, COINS[2]])
+        published = []
+
+        def get(url, params, timeout):
+            published.append([coin['symbol'] for coin in symbol_service.get_crypto_symbols()])
+            mock_get.return_value.json.return_value = [COINS[:2], COINS[2:], []][params['page'] - 1]
+            return mock_get.return_value
+        mock_get.side_effect = get
+
+        self.assertTrue(symbol_service.refresh_crypto_symbols(os.path.join(self.tmpdir, 'crypto_symbols.json')))
+
+        # Page 2 is requested with page 1 merged ahead of the previous list
+        self.assertEqual(published, [
+            ['DOGE', 'WBTC'], ['BTC', 'ETH', 'DOGE', 'WBTC'], ['BTC', 'ETH', 'WBTC', 'ETHX', 'DOGE'],
+        ])
+        self.assertEqual(symbol_service.get_crypto_symbols().to_list(), COINS)
+        self.assertEqual(symbol_service.get_search_index().search('doge')['total'], 0)
+
+    @patch('backend.services.symbol_service.COINGECKO_MARKETS_PAGE_SIZE', 1)
+    @patch('backend.services.symbol_service.requests.get')
+    def test_partial_lists_are_published_on_a_time_budget(self, mock_get):
+        published = []
+        mock_get.return_value.json.side_effect = [[coin] for coin in COINS] + [[]]
+
+        with patch.object(symbol_service, '_publish_crypto_symbols',
+                          side_effect=lambda coins: published.append(len(coins))):
+            self.assertTrue(symbol_service.refresh_crypto_symbols(os.path.join(self.tmpdir, 'crypto_symbols.json')))
+
+        # Only the first page is published within the interval, then the complete list
+        self.assertEqual(published, [1, len(COINS)])
+
+    def test_published_snapshot_carries_its_search_index_and_body(self):
+        self._write('indian_stocks.json', json.dumps([{'symbol': 'TCS.NS', 'name': 'TCS'}]))
+        self._write('us_stocks.json', json.dumps([{'symbol': 'AAPL', 'name': 'Apple'}]))
+        symbol_service._publish_crypto_symbols(COINS[:2])
+        snapshot = symbol_service._crypto
+
+        with patch.object(symbol_service, 'SymbolSearchIndex') as build_index, \
+                patch.object(symbol_service, 'EncodedSymbolList') as encode:
+            self.assertIs(symbol_service.get_search_index(), snapshot.search[1])
+            self.assertIs(symbol_service.get_encoded_symbols('crypto'), snapshot.encoded)
+            self.assertIs(symbol_service.get_crypto_id_index(), snapshot.index)
+            build_index.assert_not_called()
+            encode.assert_not_called()
+        self.assertEqual(symbol_service.get_crypto_id_index().resolve('ETH'), 'ethereum')
+
+    @patch('backend.services.symbol_service.requests.get')
+    def test_refresh_uses_its_own_budget_and_waits_out_price_backoff(self, mock_get):
+        mock_get.return_value.json.return_value = COINS
+        symbol_service._coingecko_limiter = TokenBucketRateLimiter('symbol list', rate_per_minute=60)
+        symbol_service._price_limiter = TokenBucketRateLimiter('prices', rate_per_minute=60, burst=3)
+
+        self.assertEqual(len(symbol_service._fetch_crypto_symbols()), len(COINS))
+        # Live prices keep their whole burst
+        self.assertEqual([symbol_service._price_limiter.try_acquire() for _ in range(4)], [True, True, True, False])
+
+        symbol_service._price_limiter.penalize(0.2)
+        started = time.monotonic()
+        self.assertEqual(len(symbol_service._fetch_crypto_symbols()), len(COINS))
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertFalse(symbol_service._coingecko_limiter.try_acquire())
+
+    def test_stock_lists_merge_curated_file_and_exchange_listings(self):
+        self._write('indian_stocks.json', json.dumps([{'symbol': 'TCS.NS', 'name': 'TCS'}]))
+        self._write('EQUITY_L.csv', 'SYMBOL,NAME OF COMPANY, SERIES, DATE OF LISTING\n'
+                                    'TCS,Tata Consultancy Services Limited,EQ,25-AUG-2004\n'
+                                    'INFY,Infosys Limited,EQ,08-FEB-1995\n')
+        self._write('us_stocks.json', json.dumps([{'symbol': 'AAPL', 'name': 'Apple'}]))
+        self._write('nasdaqlisted.txt', 'Symbol|Security Name|Market Category|Test Issue|Financial Status\n'
+                                        'AAPL|Apple Inc. - Common Stock|Q|N|N\n'
+                                        'ZAZZT|Tick Pilot Test Stock - Class A Common Stock|G|Y|N\n'
+                                        'File Creation Time: 0101202500:00|||||\n')
+        self._write('otherlisted.txt', 'ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue\n'
+                                       'BRK.B|Berkshire Hathaway Inc. Class B|N|BRK.B|N|100|N\n'
+                                       'BAC$K|Bank of America Corporation Preferred|N|BACpK|N|100|N\n')
+
+        self.assertEqual(symbol_service.load_indian_stock_symbols().to_list(), [
+            {'symbol': 'TCS.NS', 'name': 'TCS'},
+            {'symbol': 'INFY.NS', 'name': 'Infosys Limited'},
+        ])
+        self.assertEqual(symbol_service.load_us_stock_symbols().to_list(), [
+            {'symbol': 'AAPL', 'name': 'Apple'},
+            {'symbol': 'BRK-B', 'name': 'Berkshire Hathaway Inc. Class B'},
+        ])
+        stats = symbol_service.get_catalogue_stats()
+        self.assertEqual(stats['us_stocks']['count'], 2)
+        self.assertGreater(stats['total_bytes'], 0)
+
+
+class TestSymbolListRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(config_override={'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.client = self.app.test_client()
+        for name, value in (('_crypto', symbol_service._CryptoSnapshot(COINS)),
+                            ('_crypto_refresh_thread', None), ('_crypto_cache_path', None), ('_encoded_lists', {})):
+            patcher = patch.object(symbol_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_gzip_body_and_cache_headers(self):
+        response = self.client.get('/api/symbols/crypto', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.data)), COINS)
+        self.assertFalse(response.headers['ETag'].startswith('W/'))
+        self.assertIn('max-age=', response.headers['Cache-Control'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+        plain = self.client.get('/api/symbols/crypto')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(plain.json, COINS)
+        self.assertNotEqual(plain.headers['ETag'], response.headers['ETag'])
+
+    def test_if_none_match_returns_304_until_the_list_changes(self):
+        etag = self.client.get('/api/symbols/crypto').headers['ETag']
+
+        with patch.object(symbol_service, 'EncodedSymbolList', wraps=symbol_service.EncodedSymbolList) as encode:
+            response = self.client.get('/api/symbols/crypto', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.data, b'')
+            encode.assert_not_called()
+
+            symbol_service._set_crypto_symbols(COINS[:2])
+            response = self.client.get('/api/symbols/crypto', headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json, COINS[:2])
+            encode.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
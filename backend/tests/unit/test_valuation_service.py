@@ -0,0 +1,91 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from backend import create_app
+from backend.models import db, Asset
+from backend.services import valuation_service
+from backend.config.settings import ASSET_TYPE_INDIAN_STOCK, ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO
+
+
+class TestValuationService(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database with lots of every asset type"""
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        self.client = self.app.test_client()
+        purchase_date = datetime(2023, 1, 1)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([
+                Asset(symbol='TCS.NS', asset_type=ASSET_TYPE_INDIAN_STOCK, purchase_price=3500.0, quantity=10, purchase_date=purchase_date),
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=150.0, quantity=2, purchase_date=purchase_date),
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=200.0, quantity=1, purchase_date=purchase_date,
+                      last_price=170.0),
+                Asset(symbol='BTC', asset_type=ASSET_TYPE_CRYPTO, purchase_price=40000.0, quantity=0.5, purchase_date=purchase_date,
+                      last_price=50000.0),
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _summary(self, prices):
+        with self.app.app_context():
+            return valuation_service.value_holdings(valuation_service.load_holdings(), prices)
+
+    def test_per_type_and_total_figures(self):
+        summary = self._summary({'TCS.NS': 4000.0, 'AAPL': 180.0, 'BTC': 60000.0})
+
+        self.assertEqual(summary['by_type'][ASSET_TYPE_INDIAN_STOCK]['current_value'], 40000.0)
+        us = summary['by_type'][ASSET_TYPE_US_STOCK]
+        self.assertEqual((us['purchase_value'], us['current_value'], us['count']), (500.0, 540.0, 2))
+        self.assertAlmostEqual(us['profit_loss_percent'], 8.0)
+        total = summary['total']
+        self.assertEqual(total['purchase_value'], 35000.0 + 500.0 + 20000.0)
+        self.assertEqual(total['current_value'], 40000.0 + 540.0 + 30000.0)
+        self.assertNotIn('Other', summary['by_type'])
+
+    def test_missing_prices_fall_back_to_last_then_purchase_price(self):
+        """Like the dashboard, an unpriced lot is worth what was paid for it"""
+        summary = self._summary({})
+
+        by_symbol = {(a['symbol'], a['purchase_price']): a for a in summary['assets']}
+        self.assertEqual(by_symbol[('AAPL', 150.0)]['current_price'], 150.0)
+        self.assertEqual(by_symbol[('AAPL', 200.0)]['current_price'], 170.0)
+        self.assertEqual(by_symbol[('BTC', 40000.0)]['profit_loss'], 5000.0)
+
+    def test_empty_portfolio(self):
+        with self.app.app_context():
+            Asset.query.delete()
+            db.session.commit()
+        summary = self._summary({})
+
+        self.assertEqual(summary['assets'], [])
+        self.assertEqual(summary['total']['current_value'], 0.0)
+
+    def test_summary_route_prices_each_symbol_once(self):
+        with patch('backend.routes.portfolio.price_service.get_prices_for_assets',
+                   return_value={'AAPL': 180.0}) as mock_prices:
+            response = self.client.get('/api/portfolio/summary')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['assets']), 4)
+        requested = [asset['symbol'] for asset in mock_prices.call_args.args[0]]
+        self.assertEqual(sorted(requested), ['AAPL', 'BTC', 'TCS.NS'])
+
+    def test_summary_route_with_stored_prices(self):
+        with patch('backend.routes.portfolio.price_service.get_prices_for_assets') as mock_prices:
+            response = self.client.get('/api/portfolio/summary?live=false&assets=false')
+
+        mock_prices.assert_not_called()
+        self.assertNotIn('assets', response.json)
+        self.assertEqual(response.json['by_type'][ASSET_TYPE_CRYPTO]['current_value'], 25000.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+from unittest.mock import patch
+import numpy as np
+from backend import create_app
+from backend.models import db, Asset, PriceHistory
+from backend.services.price_store import get_price_store
+from backend.services.value_curve_service import ValueCurveEngine, forward_fill
+from backend.config.settings import ASSET_TYPE_US_STOCK, ASSET_TYPE_CRYPTO
+
+
+class _FixedDate(date):
+    """date whose today() can be moved by the tests"""
+    current = date(2024, 1, 5)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+class TestValueCurveEngine(unittest.TestCase):
+    def setUp(self):
+        """Set up an in-memory database, an empty price store and two holdings"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.app = create_app(config_override={
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'PRICE_STORE_DIR': self.tmpdir,
+        })
+        self.client = self.app.test_client()
+        _FixedDate.current = date(2024, 1, 5)
+        patcher = patch('backend.services.value_curve_service.date', _FixedDate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([
+                Asset(symbol='AAPL', asset_type=ASSET_TYPE_US_STOCK, purchase_price=100.0, quantity=2, purchase_date=datetime(2024, 1, 1)),
+                Asset(symbol='BTC', asset_type=ASSET_TYPE_CRYPTO, purchase_price=40000.0, quantity=0.5, purchase_date=datetime(2024, 1, 3)),
+            ])
+            db.session.commit()
+        self._add_prices(
+            ('AAPL', 101.0, datetime(2024, 1, 1, 16)),
+            ('AAPL', 105.0, datetime(2024, 1, 3, 10)),
+            ('AAPL', 103.0, datetime(2024, 1, 3, 16)),
+            ('BTC', 42000.0, datetime(2024, 1, 4, 12)),
+        )
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _add_prices(self, *ticks):
+        with self.app.app_context():
+            db.session.add_all([
+                PriceHistory(symbol=symbol, asset_type=ASSET_TYPE_US_STOCK, price=price, timestamp=timestamp)
+                for symbol, price, timestamp in ticks
+            ])
+            db.session.commit()
+
+    def _curve(self, engine, **kwargs):
+        with self.app.app_context():
+            # Stands in for the background sync after each history flush
+            get_price_store(self.app).sync()
+            return engine.value_curve(get_price_store(self.app), **kwargs)
+
+    def test_forward_fill(self):
+        matrix = np.array([[np.nan, 1.0], [2.0, np.nan], [np.nan, np.nan], [3.0, 4.0]])
+        expected = np.array([[np.nan, 1.0], [2.0, 1.0], [2.0, 1.0], [3.0, 4.0]])
+        np.testing.assert_array_equal(forward_fill(matrix), expected)
+
+    def test_value_curve(self):
+        """Quantities start on purchase dates and prices carry forward between ticks"""
+        curve = self._curve(ValueCurveEngine())
+
+        self.assertEqual(curve['dates'], ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05'])
+        self.assertEqual(curve['value'], [
+            202.0,                # 2 AAPL @ 101
+            202.0,                # no tick, last price carried
+            206.0 + 20000.0,      # last tick of the day (103); BTC unpriced yet, valued at cost
+            206.0 + 21000.0,
+            206.0 + 21000.0,
+        ])
+        self.assertEqual(curve['invested'], [200.0, 200.0, 20200.0, 20200.0, 20200.0])
+
+    def test_range_filter(self):
+        curve = self._curve(ValueCurveEngine(), start=date(2024, 1, 2), end=date(2024, 1, 3))
+        self.assertEqual(curve['dates'], ['2024-01-02', '2024-01-03'])
+
+    def test_incremental_refresh_matches_full_recompute(self):
+        """New days and back-dated prices only recompute the affected tail"""
+        engine = ValueCurveEngine()
+        self._curve(engine)
+
+        _FixedDate.current = date(2024, 1, 7)
+        self._add_prices(('AAPL', 110.0, datetime(2024, 1, 6, 16)), ('AAPL', 99.0, datetime(2024, 1, 2, 16)))
+        with patch.object(ValueCurveEngine, '_compute', wraps=ValueCurveEngine._compute) as compute:
+            incremental = self._curve(engine)
+        recomputed_days = compute.call_args.args[2]
+
+        self.assertEqual(str(recomputed_days[0]), '2024-01-02')
+        self.assertEqual(incremental, self._curve(ValueCurveEngine()))
+        self.assertEqual(incremental['value'][1], 198.0)
+        self.assertEqual(incremental['value'][-1], 220.0 + 21000.0)
+
+    def test_holdings_change_invalidates_cache(self):
+        engine = ValueCurveEngine()
+        self._curve(engine)
+        with self.app.app_context():
+            Asset.query.filter_by(symbol='BTC').delete()
+            db.session.commit()
+
+        self.assertEqual(self._curve(engine)['value'][-1], 206.0)
+
+    def test_value_history_route(self):
+        response = self.client.get('/api/portfolio/value-history?from=2024-01-04')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['dates'], ['2024-01-04', '2024-01-05'])
+
+        self.assertEqual(self.client.get('/api/portfolio/value-history?from=soon').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -97,17 +97,8 @@ function App() {
   const [priceError, setPriceError] = useState(null);
   const [lastPriceUpdate, setLastPriceUpdate] = useState(null);
 
-  // Purchase value totals (based on what user paid)
-  const [indianStocksTotal, setIndianStocksTotal] = useState(0);
-  const [usStocksTotal, setUsStocksTotal] = useState(0);
-  const [cryptoTotal, setCryptoTotal] = useState(0);
-  const [grandTotal, setGrandTotal] = useState(0);
-  
-  // Current value totals (based on live prices)
-  const [indianStocksCurrentTotal, setIndianStocksCurrentTotal] = useState(0);
-  const [usStocksCurrentTotal, setUsStocksCurrentTotal] = useState(0);
-  const [cryptoCurrentTotal, setCryptoCurrentTotal] = useState(0);
-  const [grandCurrentTotal, setGrandCurrentTotal] = useState(0);
+  // Purchase and current value totals per asset type, from /api/portfolio/summary
+  const [summary, setSummary] = useState(null);
 
   const fetchAssets = async () => {
     setLoading(true);
@@ -160,6 +151,17 @@ function App() {
     }
   };
   
+  // Fetch the totals; the backend values every lot and converts quotes into the base currency
+  const fetchSummary = async () => {
+    try {
+      const response = await fetch(`${config.api.endpoints.portfolioSummary}?assets=false`);
+      if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+      setSummary(await response.json());
+    } catch (e) {
+      console.error("Failed to fetch portfolio summary:", e);
+    }
+  };
+
   // Refresh live prices manually
   const handleRefreshPrices = () => {
     fetchLivePrices();
@@ -177,47 +179,16 @@ function App() {
   }, []);
 
   useEffect(() => {
-    // Calculate purchase value totals
-    let indTotal = 0, usTotal = 0, cryTotal = 0;
-    // Calculate current value totals if we have prices
-    let indCurrentTotal = 0, usCurrentTotal = 0, cryCurrentTotal = 0;
-    
-    assets.forEach(asset => {
-      // Purchase value (what user paid)
-      const purchaseValue = asset.purchase_price * asset.quantity;
-      
-      // Current value (based on live price if available)
-      const livePrice = livePrices[asset.symbol];
-      const currentValue = livePrice ? livePrice * asset.quantity : purchaseValue;
-      
-      // Add to appropriate totals based on asset type
-      if (asset.asset_type === ASSET_TYPE_INDIAN_STOCK) {
-        indTotal += purchaseValue;
-        indCurrentTotal += currentValue;
-      }
-      else if (asset.asset_type === ASSET_TYPE_US_STOCK) {
-        usTotal += purchaseValue;
-        usCurrentTotal += currentValue;
-      }
-      else if (asset.asset_type === ASSET_TYPE_CRYPTO) {
-        cryTotal += purchaseValue;
-        cryCurrentTotal += currentValue;
-      }
-    });
-    
-    // Update purchase value states
-    setIndianStocksTotal(indTotal);
-    setUsStocksTotal(usTotal);
-    setCryptoTotal(cryTotal);
-    setGrandTotal(indTotal + usTotal + cryTotal);
-    
-    // Update current value states
-    setIndianStocksCurrentTotal(indCurrentTotal);
-    setUsStocksCurrentTotal(usCurrentTotal);
-    setCryptoCurrentTotal(cryCurrentTotal);
-    setGrandCurrentTotal(indCurrentTotal + usCurrentTotal + cryCurrentTotal);
+    // Re-read the totals whenever the assets or their prices change
+    fetchSummary();
   }, [assets, livePrices]);
 
+  const totalsFor = (assetType) => (summary && summary.by_type[assetType]) || { purchase_value: 0, current_value: 0 };
+  const indianStocks = totalsFor(ASSET_TYPE_INDIAN_STOCK);
+  const usStocks = totalsFor(ASSET_TYPE_US_STOCK);
+  const crypto = totalsFor(ASSET_TYPE_CRYPTO);
+  const total = (summary && summary.total) || { purchase_value: 0, current_value: 0 };
+
   const handleOpenAddAssetModal = () => setAddAssetModalOpen(true);
   const handleCloseAddAssetModal = () => setAddAssetModalOpen(false);
   const handleAssetAdded = () => fetchAssets();
@@ -433,12 +404,14 @@ function App() {
         <Box sx={{ width: '100%' }}>
           <PortfolioCharts 
             assets={assets}
-            indianStocksTotal={indianStocksTotal}
-            usStocksTotal={usStocksTotal}
-            cryptoTotal={cryptoTotal}
-            indianStocksCurrentTotal={indianStocksCurrentTotal}
-            usStocksCurrentTotal={usStocksCurrentTotal}
-            cryptoCurrentTotal={cryptoCurrentTotal}
+            indianStocksTotal={indianStocks.purchase_value}
+            usStocksTotal={usStocks.purchase_value}
+            cryptoTotal={crypto.purchase_value}
+            indianStocksCurrentTotal={indianStocks.current_value}
+            usStocksCurrentTotal={usStocks.current_value}
+            cryptoCurrentTotal={crypto.current_value}
+            totalPurchaseValue={total.purchase_value}
+            totalPortfolioValue={total.current_value}
             loading={loading}
             loadingPrices={loadingPrices}
           />
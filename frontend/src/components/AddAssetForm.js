@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Button,
   Dialog,
@@ -35,62 +35,60 @@ function AddAssetForm({ open, handleClose, onAssetAdded }) {
   const [submitting, setSubmitting] = useState(false);
   const [error, setError] = useState(null);
 
-  // State for holding fetched symbol lists
-  const [cryptoSymbols, setCryptoSymbols] = useState([]);
-  const [indianStockSymbols, setIndianStockSymbols] = useState([]);
-  const [usStockSymbols, setUsStockSymbols] = useState([]);
   const [symbolOptions, setSymbolOptions] = useState([]); // For Autocomplete
+  const [symbolQuery, setSymbolQuery] = useState('');
+  const searchTimer = useRef(null);
 
-  // Effect to fetch all symbol lists on component mount
+  // Reset the symbol when the asset type changes
   useEffect(() => {
-    const fetchSymbols = async (url, setter) => {
+    setSymbol('');
+    setSymbolOptions([]);
+  }, [assetType]);
+
+  // Ask the backend for matching symbols as the user types, instead of downloading every list.
+  // Requests are debounced and a response for an outdated query is ignored.
+  useEffect(() => {
+    const query = symbolQuery.trim();
+    if (!query) {
+      setSymbolOptions([]);
+      return undefined;
+    }
+
+    let cancelled = false;
+    clearTimeout(searchTimer.current);
+    searchTimer.current = setTimeout(async () => {
       try {
-        const response = await fetch(url);
+        const params = new URLSearchParams({ q: query, type: assetType, limit: '20' });
+        const response = await fetch(`${config.api.endpoints.symbolSearch}?${params}`);
         if (!response.ok) {
-          throw new Error(`Failed to fetch symbols from ${url}`);
+          throw new Error(`Failed to search symbols: ${response.status}`);
         }
         const data = await response.json();
-        setter(data);
+        if (cancelled) return;
+        // The backend returns {results: [{symbol, name, asset_type, id?}], total, offset, limit}.
+        // Autocomplete gets objects with a label for display and value for submission.
+        setSymbolOptions(
+          data.results.map(s => ({
+            label: `${s.symbol.toUpperCase()} - ${s.name}`,
+            value: s.symbol.toUpperCase(),
+            ...s
+          }))
+        );
       } catch (err) {
         console.error(err);
-        // Optionally set an error state here to inform the user
-        setter([]); // Set to empty array on error
+        if (!cancelled) setSymbolOptions([]);
       }
-    };
+    }, 200);
 
-    fetchSymbols(config.api.endpoints.crypto, setCryptoSymbols);
-    fetchSymbols(config.api.endpoints.indianStocks, setIndianStockSymbols);
-    fetchSymbols(config.api.endpoints.usStocks, setUsStockSymbols);
-  }, []); // Empty dependency array means this runs once on mount
-
-  // Effect to update symbolOptions when assetType or fetched symbol lists change
-  useEffect(() => {
-    let currentOptions = [];
-    if (assetType === ASSET_TYPE_CRYPTO) {
-      currentOptions = cryptoSymbols;
-    } else if (assetType === ASSET_TYPE_INDIAN_STOCK) {
-      currentOptions = indianStockSymbols;
-    } else if (assetType === ASSET_TYPE_US_STOCK) {
-      currentOptions = usStockSymbols;
-    }
-    // The backend returns symbols as {id?, symbol, name}. 
-    // Autocomplete needs options in a format like { label: 'BTC - Bitcoin', value: 'BTC' } or just strings.
-    // We will format them to be objects with a label for display and value for submission.
-    setSymbolOptions(
-      currentOptions.map(s => ({
-        label: `${s.symbol.toUpperCase()} - ${s.name}`,
-        value: s.symbol.toUpperCase(),
-        // Keep the original object in case we need other properties later
-        // If Autocomplete's `isOptionEqualToValue` is not customized, it compares the option object itself.
-        // So, it's often better to pass the full object and use getOptionLabel.
-        ...s 
-      }))
-    );
-    setSymbol(''); // Reset symbol when asset type changes
-  }, [assetType, cryptoSymbols, indianStockSymbols, usStockSymbols]);
+    return () => {
+      cancelled = true;
+      clearTimeout(searchTimer.current);
+    };
+  }, [symbolQuery, assetType]);
 
   const resetForm = () => {
     setSymbol('');
+    setSymbolQuery('');
     setAssetType(ASSET_TYPE_INDIAN_STOCK);
     setPurchasePrice('');
     setQuantity('');
@@ -197,11 +195,11 @@ function AddAssetForm({ open, handleClose, onAssetAdded }) {
                   setSymbol(''); // Cleared
                 }
               }}
-              onInputChange={(event, newInputValue) => {
-                // If freeSolo, and user types, we might want to setSymbol directly here too,
-                // depending on desired UX. For now, onChange handles selection or custom string entry.
-                // This is more for when the input text itself changes without selecting an option.
-                // For this setup, relying on onChange is usually sufficient.
+              filterOptions={(options) => options} // Options are already filtered and ranked by the backend
+              onInputChange={(event, newInputValue, reason) => {
+                if (reason === 'input') {
+                  setSymbolQuery(newInputValue);
+                }
               }}
               renderInput={(params) => (
                 <TextField
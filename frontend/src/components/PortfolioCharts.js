@@ -12,25 +12,14 @@ const PortfolioCharts = ({
   indianStocksCurrentTotal = 0,
   usStocksCurrentTotal = 0,
   cryptoCurrentTotal = 0,
+  totalPurchaseValue = 0,
+  totalPortfolioValue = 0,
   loading = false,
   loadingPrices = false
 }) => {
   const theme = useTheme();
   
-  // Calculate values based on the assets
-  
-  // Calculate total values
-  const totalPortfolioValue = (
-    (indianStocksCurrentTotal || 0) + 
-    (usStocksCurrentTotal || 0) + 
-    (cryptoCurrentTotal || 0)
-  );
-  
-  const totalPurchaseValue = (
-    (indianStocksTotal || 0) + 
-    (usStocksTotal || 0) + 
-    (cryptoTotal || 0)
-  );
+  // All totals come from the backend's portfolio summary, already in the base currency
   
   // Use either real data or placeholder data
   const isDataLoaded = assets.length > 0;
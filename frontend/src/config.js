@@ -17,9 +17,11 @@ const config = {
       indianStocks: `${API_BASE_URL}/api/symbols/indian_stocks`,
       usStocks: `${API_BASE_URL}/api/symbols/us_stocks`,
       crypto: `${API_BASE_URL}/api/symbols/crypto`,
+      symbolSearch: `${API_BASE_URL}/api/symbols/search`,
       prices: `${API_BASE_URL}/api/prices`,
       priceForSymbol: (symbol) => `${API_BASE_URL}/api/prices/${symbol}`,
-      refreshPrices: `${API_BASE_URL}/api/prices/refresh`
+      refreshPrices: `${API_BASE_URL}/api/prices/refresh`,
+      portfolioSummary: `${API_BASE_URL}/api/portfolio/summary`
     }
   }
 };
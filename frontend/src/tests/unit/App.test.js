@@ -33,8 +33,12 @@ jest.mock('../../components/AddAssetForm', () => {
 });
 
 jest.mock('../../components/PortfolioCharts', () => {
-  return function MockPortfolioCharts() {
-    return <div data-testid="mock-portfolio-charts">Mock Portfolio Charts</div>;
+  return function MockPortfolioCharts({ totalPurchaseValue, totalPortfolioValue }) {
+    return (
+      <div data-testid="mock-portfolio-charts">
+        Mock Portfolio Charts {totalPurchaseValue} / {totalPortfolioValue}
+      </div>
+    );
   };
 });
 
@@ -48,6 +52,18 @@ describe('App Component', () => {
     
     // Mock successful fetch for assets
     global.fetch.mockImplementation((url) => {
+      // Mock portfolio summary endpoint
+      if (url.includes('/api/portfolio/summary')) {
+        const totals = (purchase, current) => ({ purchase_value: purchase, current_value: current });
+        return Promise.resolve({
+          ok: true,
+          json: () => Promise.resolve({
+            by_type: { 'Indian Stock': totals(10000, 11000), 'US Stock': totals(10000, 11000), 'Crypto': totals(0, 0) },
+            total: totals(20000, 22000)
+          })
+        });
+      }
+
       if (url.includes('/assets')) {
         return Promise.resolve({
           ok: true,
@@ -86,6 +102,15 @@ describe('App Component', () => {
     expect(screen.getByText(/add asset/i)).toBeInTheDocument();
   });
 
+  test('shows totals from the portfolio summary endpoint', async () => {
+    render(<App />);
+    
+    await waitFor(() => {
+      expect(screen.getByTestId('mock-portfolio-charts')).toHaveTextContent('20000 / 22000');
+    });
+    expect(global.fetch).toHaveBeenCalledWith(expect.stringContaining('/api/portfolio/summary'));
+  });
+
   test('handles adding an asset', async () => {
     // Mock successful POST response for adding an asset
     global.fetch.mockImplementationOnce((url, options) => {